@@ -9,6 +9,34 @@ let worker = null;
 let buffer = '';
 const queue = [];
 
+// compact 스키마(v1): 시작 시 meta 한 줄 (names), 프레임 크기는 바뀔 때만 "wh"
+let meta = null;
+let frameWH = [0, 0];
+
+function decodeBoxes(b) {
+  if (typeof b !== 'string') return b; // rows: [[x1,y1,x2,y2,conf,cls],...]
+  const buf = Buffer.from(b, 'base64'); // f32: float32 LE (N*6)
+  const rows = [];
+  for (let off = 0; off + 24 <= buf.length; off += 24) {
+    rows.push([0, 4, 8, 12, 16, 20].map((o) => buf.readFloatLE(off + o)));
+  }
+  return rows;
+}
+
+// compact 응답 → 기존 형식 (frontend 는 boxes[].x1.., imgW/imgH, names 사용)
+function expandCompact(msg) {
+  if (msg.wh) frameWH = msg.wh;
+  return {
+    boxes: decodeBoxes(msg.b).map(([x1, y1, x2, y2, conf, cls]) => ({
+      x1, y1, x2, y2, conf, cls: Math.round(cls),
+    })),
+    imgW: frameWH[0],
+    imgH: frameWH[1],
+    names: meta ? meta.names : {},
+    imgsz: msg.s,
+  };
+}
+
 function startWorker() {
   worker = spawn('python3', [SCRIPT_PATH, '--weights', DEFAULT_WEIGHTS, '--stdin-loop'], {
     stdio: ['pipe', 'pipe', 'pipe'],
@@ -21,14 +49,23 @@ function startWorker() {
     while ((idx = buffer.indexOf('\n')) >= 0) {
       const line = buffer.slice(0, idx).trim();
       buffer = buffer.slice(idx + 1);
-      const item = queue.shift();
-      if (!item) continue;
+      if (!line) continue;
+      let parsed;
       try {
-        const parsed = JSON.parse(line);
-        item.resolve(parsed);
+        parsed = JSON.parse(line);
       } catch (err) {
-        item.reject(err);
+        const item = queue.shift();
+        if (item) item.reject(err);
+        continue;
+      }
+      if (parsed.type === 'meta') {
+        meta = parsed; // 요청에 대한 응답이 아님 → 큐 소비하지 않음
+        continue;
       }
+      const item = queue.shift();
+      if (!item) continue;
+      if (parsed.err) item.reject(new Error(`${parsed.err}: ${parsed.detail || ''}`));
+      else item.resolve(parsed.v ? expandCompact(parsed) : parsed);
     }
   });
 
@@ -43,6 +80,8 @@ function startWorker() {
       queue.shift().reject(new Error('worker exited'));
     }
     worker = null;
+    meta = null;
+    frameWH = [0, 0];
   });
 }
 
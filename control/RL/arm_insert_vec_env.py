@@ -0,0 +1,146 @@
+# ============================
+# ArmInsertVecEnv
+# ArmInsertEnv N개를 (N,3) 위치 / (N,4) 쿼터니언 배열로 한 번에 step
+# obs = [dx, dy, dz, ori_err]  (ArmInsertEnv 와 동일)
+# ============================
+import time
+from typing import List, Optional
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+from batched_vec_env import BatchedVecEnvMixin
+
+# ArmInsertEnv.step / reset 과 같은 상수
+ACTION_SCALE = 0.005                  # [-1,1] → ±5 mm
+SUCCESS_DIST = 0.01                   # m
+SUCCESS_ORI = 10 * np.pi / 180        # rad
+INIT_LOW = np.array([-0.05, -0.05, -0.12], dtype=np.float32)
+INIT_HIGH = np.array([0.05, 0.05, -0.08], dtype=np.float32)
+
+
+class ArmInsertVecEnv(BatchedVecEnvMixin, VecEnv):
+    """
+    SB3 VecEnv 를 직접 구현 (DummyVecEnv 처럼 env 객체 N개를 돌지 않음)
+    - step: 위치 갱신 / 보상 / 종료 판정 / 자동 reset 을 배열 연산 한 번으로
+    - 종료된 env 의 info 에는 SB3 규약대로 terminal_observation (reset 전 obs)
+    - max_steps 를 주면 그 스텝에서 truncate (TimeLimit.truncated=True), 기본은 ArmInsertEnv 처럼 제한 없음
+    - get_attr / set_attr / env_method 는 BatchedVecEnvMixin (전체 env 대상만)
+    """
+
+    def __init__(self, num_envs: int = 8, max_steps: Optional[int] = None, seed: Optional[int] = None):
+        observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(4,), dtype=np.float32)
+        action_space = spaces.Box(low=-1.0, high=1.0, shape=(3,), dtype=np.float32)
+        super().__init__(num_envs, observation_space, action_space)
+
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+        self.rel_pos = np.zeros((num_envs, 3), dtype=np.float32)
+        self.rel_quat = np.zeros((num_envs, 4), dtype=np.float32)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self._actions = np.zeros((num_envs, 3), dtype=np.float32)
+        self._reset_envs(np.ones(num_envs, dtype=bool))
+
+    # ----------------------------
+    # 상태
+    # ----------------------------
+    def _reset_envs(self, mask: np.ndarray):
+        n = int(mask.sum())
+        if n == 0:
+            return
+        self.rel_pos[mask] = self.rng.uniform(INIT_LOW, INIT_HIGH, size=(n, 3)).astype(np.float32)
+        self.rel_quat[mask] = (0.0, 0.0, 0.0, 1.0)   # 초기 상대 쿼터니언 (단위)
+        self.steps[mask] = 0
+
+    def _orientation_error(self) -> np.ndarray:
+        w = np.clip(self.rel_quat[:, 3], -1.0, 1.0)
+        return 2.0 * np.arccos(w)
+
+    def _get_obs(self, ori_err: Optional[np.ndarray] = None) -> np.ndarray:
+        obs = np.empty((self.num_envs, 4), dtype=np.float32)
+        obs[:, :3] = self.rel_pos
+        obs[:, 3] = self._orientation_error() if ori_err is None else ori_err
+        return obs
+
+    # ----------------------------
+    # VecEnv API
+    # ----------------------------
+    def reset(self):
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._get_obs()
+
+    def step_async(self, actions: np.ndarray):
+        self._actions[:] = np.asarray(actions, dtype=np.float32).reshape(self.num_envs, 3)
+
+    def step_wait(self):
+        self.rel_pos += self._actions * ACTION_SCALE
+        self.steps += 1
+
+        dist = np.sqrt(np.einsum("ij,ij->i", self.rel_pos, self.rel_pos))
+        ori_err = self._orientation_error()
+        rewards = (-dist - 0.1 * ori_err).astype(np.float32)
+
+        success = (dist < SUCCESS_DIST) & (ori_err < SUCCESS_ORI)
+        truncated = (self.steps >= self.max_steps) & ~success if self.max_steps else np.zeros_like(success)
+        dones = success | truncated
+
+        obs = self._get_obs(ori_err)
+        infos: List[dict] = [{} for _ in range(self.num_envs)]
+        if dones.any():
+            for i in np.flatnonzero(dones):
+                infos[i]["terminal_observation"] = obs[i].copy()
+                infos[i]["TimeLimit.truncated"] = bool(truncated[i])
+                infos[i]["success"] = bool(success[i])
+            self._reset_envs(dones)
+            obs[dones] = self._get_obs()[dones]
+        return obs, rewards, dones, infos
+
+    def seed(self, seed: Optional[int] = None):
+        self.rng = np.random.default_rng(seed)
+        return [None if seed is None else seed + i for i in range(self.num_envs)]
+
+    def close(self):
+        pass
+
+
+# ============================
+# 벤치마크: DummyVecEnv([ArmInsertEnv]*N) 대비 steps/sec
+# ============================
+def _dummy_vec_env(n: int):
+    import gymnasium as gym
+    from stable_baselines3.common.vec_env import DummyVecEnv
+    from arm_insert_env import ArmInsertEnv
+
+    class _GymnasiumAPI(gym.Wrapper):
+        # ArmInsertEnv 는 구버전 API (reset → obs, step → 4-tuple) → DummyVecEnv(gymnasium) 형식으로
+        def reset(self, **kwargs):
+            return self.env.reset(**kwargs), {}
+
+        def step(self, action):
+            obs, reward, done, info = self.env.step(action)
+            return obs, reward, done, False, info
+
+    return DummyVecEnv([lambda: _GymnasiumAPI(ArmInsertEnv()) for _ in range(n)])
+
+
+def _steps_per_sec(venv, n_steps: int) -> float:
+    venv.reset()
+    actions = np.random.uniform(-1, 1, size=(n_steps, venv.num_envs, 3)).astype(np.float32)
+    t0 = time.perf_counter()
+    for a in actions:
+        venv.step(a)
+    return n_steps * venv.num_envs / (time.perf_counter() - t0)
+
+
+def benchmark(ns=(1, 4, 16, 64, 256, 1024), total_steps: int = 50_000):
+    print(f"{'N':>6} {'DummyVecEnv':>14} {'ArmInsertVecEnv':>16} {'speedup':>8}")
+    for n in ns:
+        n_steps = max(total_steps // n, 20)
+        dummy = _steps_per_sec(_dummy_vec_env(n), max(n_steps // 10, 10))
+        vec = _steps_per_sec(ArmInsertVecEnv(n, seed=0), n_steps)
+        print(f"{n:>6} {dummy:>12,.0f}/s {vec:>14,.0f}/s {vec / dummy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,25 +1,37 @@
 # control/RL/train_ppo_arm_insert.py
+import argparse
 import os
 from datetime import datetime
 
 import gymnasium as gym
 from stable_baselines3 import PPO
 from stable_baselines3.common.callbacks import CheckpointCallback
+from stable_baselines3.common.vec_env import VecMonitor
 
 from arm_insert_env import ArmInsertEnv
+from arm_insert_vec_env import ArmInsertVecEnv
 
+ROLLOUT_STEPS = 2048   # 업데이트당 전체 transition 수 (env 수와 무관하게 유지)
 
-def make_env():
-    # SB3는 gym.Env 인스턴스를 직접 써도 되고, 
-    # vec-env 쓸 거면 래핑해도 된다. 여기선 단순 버전.
-    return ArmInsertEnv()
+
+def make_env(n_envs: int = 8):
+    # n_envs 개를 배열 연산 한 번으로 step 하는 VecEnv (샘플 수집이 병목이었음)
+    # n_envs <= 0 이면 기존처럼 단일 ArmInsertEnv
+    if n_envs <= 0:
+        return ArmInsertEnv()
+    return VecMonitor(ArmInsertVecEnv(n_envs))
 
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n-envs", type=int, default=8, help="병렬 env 수 (0 이면 단일 ArmInsertEnv)")
+    args = parser.parse_args()
+
     logdir = os.path.join("runs", "arm_insert", datetime.now().strftime("%Y%m%d-%H%M%S"))
     os.makedirs(logdir, exist_ok=True)
 
-    env = make_env()
+    env = make_env(args.n_envs)
+    n_steps = max(ROLLOUT_STEPS // max(args.n_envs, 1), 64)
 
     model = PPO(
         "MlpPolicy",
@@ -28,7 +40,7 @@ def main():
         tensorboard_log=logdir,
         gamma=0.99,
         learning_rate=3e-4,
-        n_steps=2048,
+        n_steps=n_steps,
         batch_size=64,
         n_epochs=10,
         clip_range=0.2,
@@ -36,7 +48,7 @@ def main():
 
     # 체크포인트 저장 콜백
     checkpoint_callback = CheckpointCallback(
-        save_freq=10_000,
+        save_freq=max(10_000 // max(args.n_envs, 1), 1),   # save_freq 는 env.step 호출 횟수 기준
         save_path=os.path.join(logdir, "checkpoints"),
         name_prefix="ppo_arm_insert",
         save_replay_buffer=False,
@@ -0,0 +1,45 @@
+# ============================
+# BatchedVecEnvMixin
+# env 객체 N개 없이 (N,...) 배열로 상태를 들고 있는 SB3 VecEnv 공용
+# get_attr / set_attr / env_method / env_is_wrapped
+# - 속성/메서드는 vec env 자신 것 하나뿐 → 쓰기/호출은 전체 env 대상만 지원
+# - 일부 env 만 지정한 set_attr / env_method 는 NotImplementedError
+#   (조용히 전체에 적용되거나 같은 메서드가 N번 호출되는 것 방지)
+# - control/RL/batched_vec_env.py 와 같은 내용 (두 RL 트리는 서로 import 하지 않음)
+# ============================
+from typing import Any, List, Sequence
+
+
+class BatchedVecEnvMixin:
+    num_envs: int
+
+    def _indices(self, indices) -> Sequence[int]:
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
+
+    def _require_all(self, indices, op: str):
+        idx = set(int(i) % self.num_envs for i in self._indices(indices))
+        if idx != set(range(self.num_envs)):
+            raise NotImplementedError(
+                f"{type(self).__name__}.{op}: per-env indices {sorted(idx)} not supported "
+                f"(state is shared across all {self.num_envs} envs)")
+
+    def get_attr(self, attr_name: str, indices=None) -> List[Any]:
+        value = getattr(self, attr_name)
+        return [value for _ in self._indices(indices)]
+
+    def set_attr(self, attr_name: str, value: Any, indices=None) -> None:
+        self._require_all(indices, "set_attr")
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name: str, *method_args, indices=None, **method_kwargs) -> List[Any]:
+        # 전체 env 대상 → vec env 메서드를 한 번만 호출하고 결과를 env 수만큼
+        self._require_all(indices, "env_method")
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        return [result for _ in self._indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None) -> List[bool]:
+        return [False for _ in self._indices(indices)]
@@ -0,0 +1,249 @@
+import time
+from collections.abc import Mapping
+from typing import Optional
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+from batched_vec_env import BatchedVecEnvMixin
+from env_armreach import ArmReachEnv
+
+
+def compute_errors_batch(ee_pos, ee_ori, port_pos, port_axis, target_ori, d_target):
+    """
+    ArmReachEnv._compute_errors 의 배치 버전 (N개 env 를 브로드캐스팅으로 한 번에)
+    ee_pos, ee_ori: (N,3) → d_axial, e_radial, ori_err, axial_err 각각 (N,)
+    """
+    dp = ee_pos - port_pos                                   # (N,3)
+    n = port_axis / (np.linalg.norm(port_axis) + 1e-8)       # (3,)
+    d_axial = dp @ n                                         # 축 방향 성분
+    dp_radial = dp - d_axial[:, None] * n                    # 축에 수직인 성분
+    e_radial = np.sqrt(np.einsum("ij,ij->i", dp_radial, dp_radial))
+    d_ori = target_ori - ee_ori
+    ori_err = np.sqrt(np.einsum("ij,ij->i", d_ori, d_ori))
+    axial_err = np.abs(d_axial - d_target)
+    return d_axial, e_radial, ori_err, axial_err
+
+
+# info 키 → 배열 원소를 파이썬 스칼라로 바꾸는 함수 (ArmReachEnv.step info 와 같은 키)
+_INFO_CAST = {
+    "d_axial": float,       # 포트 축 방향 깊이
+    "e_radial": float,      # 옆으로 벗어난 정도
+    "ori_err": float,       # 자세 오차
+    "axial_err": float,     # 목표 깊이와의 차이
+    "success": bool,
+    "timeout": bool,
+}
+
+
+class RunningInfo(Mapping):
+    """
+    진행 중인 env i 의 info (읽기 전용)
+    - 값은 조회할 때 vec env 의 최신 step 배열에서 꺼내 변환 → dict 할당 없음
+    - env 당 1개를 미리 만들어 매 step 재사용 → 다음 step 뒤에는 새 값이 보임 (보관하려면 dict(info))
+    """
+
+    __slots__ = ("_arrays", "_i")
+
+    def __init__(self, arrays: dict, i: int):
+        self._arrays = arrays    # vec env 가 매 step 제자리 갱신하는 {키: (N,) 배열}
+        self._i = i
+
+    def __getitem__(self, key):
+        cast = _INFO_CAST.get(key)
+        if cast is None:
+            raise KeyError(key)
+        return cast(self._arrays[key][self._i])
+
+    def get(self, key, default=None):
+        # PPO 가 매 step 모든 info 에 get("episode") / get("is_success") → 예외 없이
+        cast = _INFO_CAST.get(key)
+        return default if cast is None else cast(self._arrays[key][self._i])
+
+    def __contains__(self, key) -> bool:
+        return key in _INFO_CAST
+
+    def __iter__(self):
+        return iter(_INFO_CAST)
+
+    def __len__(self) -> int:
+        return len(_INFO_CAST)
+
+    def copy(self) -> dict:
+        return dict(self)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class StepInfos(list):
+    """
+    SB3 infos 리스트 (env 별 info)
+    - 진행 중인 env 는 미리 만든 RunningInfo → 매 step N개 dict 할당 없음
+      (VecMonitor 의 list(infos[:]) / PPO 의 info.get(...) 도 포인터 복사 / 키 조회뿐, 값은 읽을 때만 변환)
+    - 끝난 env 만 dict 생성: terminal_observation, TimeLimit.truncated + 오차/성공 값
+    - 스텝별 오차는 배열 속성으로도 (infos.d_axial / e_radial / ori_err / axial_err / success / timeout)
+    """
+
+    def __init__(self, running, d_axial, e_radial, ori_err, axial_err, success, timeout, truncated, dones,
+                 terminal_obs):
+        super().__init__(running)
+        self.d_axial, self.e_radial, self.ori_err, self.axial_err = d_axial, e_radial, ori_err, axial_err
+        self.success, self.timeout, self.dones = success, timeout, dones
+        idx = np.flatnonzero(dones)
+        if len(idx) == 0:
+            return
+        # 끝난 env 값만 모아 한 번에 파이썬 스칼라로 (원소별 float()/bool() 보다 빠름)
+        cols = zip(d_axial[idx].tolist(), e_radial[idx].tolist(), ori_err[idx].tolist(), axial_err[idx].tolist(),
+                   success[idx].tolist(), timeout[idx].tolist(), truncated[idx].tolist(), terminal_obs[idx])
+        for i, (da, er, oe, ae, ok, to, tr, term) in zip(idx.tolist(), cols):
+            self[i] = {
+                "d_axial": da,            # 포트 축 방향 깊이
+                "e_radial": er,           # 옆으로 벗어난 정도
+                "ori_err": oe,            # 자세 오차
+                "axial_err": ae,          # 목표 깊이와의 차이
+                "success": ok,
+                "timeout": to,
+                "terminal_observation": term,
+                "TimeLimit.truncated": tr,
+            }
+
+
+class ArmReachVecEnv(BatchedVecEnvMixin, VecEnv):
+    """
+    ArmReachEnv N개를 (N,3) ee_pos / ee_ori 배열로 한 번에 step 하는 SB3 VecEnv
+    - 보상/성공/실패 판정은 ArmReachEnv.step 과 동일 (파라미터는 ArmReachEnv 기본값을 그대로 사용)
+    - env 별 step 카운터로 max_steps 타임아웃, 끝난 env 는 자동 reset
+    - 타임아웃만으로 끝난 경우 TimeLimit.truncated=True (SB3 가 value bootstrap)
+    - infos 는 StepInfos (끝난 env 만 dict, 나머지는 읽을 때 값을 꺼내는 RunningInfo)
+    - get_attr / set_attr / env_method 는 BatchedVecEnvMixin (전체 env 대상만)
+    """
+
+    def __init__(self, num_envs: int = 8, seed: Optional[int] = None, template: Optional[ArmReachEnv] = None):
+        cfg = template or ArmReachEnv()
+        self.max_steps = cfg.max_steps
+        self.port_pos = cfg.port_pos.astype(np.float32)
+        self.port_axis = cfg.port_axis.astype(np.float32)
+        self.target_ori = cfg.target_ori.astype(np.float32)
+        self.d_target, self.d_max = cfg.d_target, cfg.d_max
+        self.tol_axial, self.tol_radial, self.tol_ori = cfg.tol_axial, cfg.tol_radial, cfg.tol_ori
+        self.w_axial, self.w_radial, self.w_ori = cfg.w_axial, cfg.w_radial, cfg.w_ori
+        self.pos_low = self.port_pos - np.array([0.05, 0.05, 0.02], dtype=np.float32)
+        self.pos_high = self.port_pos + np.array([0.05, 0.05, 0.06], dtype=np.float32)
+
+        # ArmReachGymEnv 와 같은 space
+        observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(6,), dtype=np.float32)
+        action_space = spaces.Box(low=-0.05, high=0.05, shape=(6,), dtype=np.float32)
+        super().__init__(num_envs, observation_space, action_space)
+
+        self.rng = np.random.default_rng(seed)
+        self.ee_pos = np.zeros((num_envs, 3), dtype=np.float32)
+        self.ee_ori = np.zeros((num_envs, 3), dtype=np.float32)
+        self.step_count = np.zeros(num_envs, dtype=np.int64)
+        self._actions = np.zeros((num_envs, 6), dtype=np.float32)
+        self._info_arrays = {k: np.zeros(num_envs) for k in _INFO_CAST}
+        self._running_infos = [RunningInfo(self._info_arrays, i) for i in range(num_envs)]
+        self._reset_envs(np.ones(num_envs, dtype=bool))
+
+    # ----------------------------
+    # 상태
+    # ----------------------------
+    def _reset_envs(self, mask: np.ndarray):
+        n = int(mask.sum())
+        if n == 0:
+            return
+        # 포트 근처 랜덤 시작 위치 / 롤·피치·요 약 ±15도
+        self.ee_pos[mask] = self.rng.uniform(self.pos_low, self.pos_high, size=(n, 3)).astype(np.float32)
+        self.ee_ori[mask] = self.rng.uniform(-0.26, 0.26, size=(n, 3)).astype(np.float32)
+        self.step_count[mask] = 0
+
+    def _get_state(self) -> np.ndarray:
+        # [dx, dy, dz, droll, dpitch, dyaw] = (포트 - EE, 타겟 자세 - EE 자세)
+        obs = np.empty((self.num_envs, 6), dtype=np.float32)
+        np.subtract(self.port_pos, self.ee_pos, out=obs[:, :3])
+        np.subtract(self.target_ori, self.ee_ori, out=obs[:, 3:])
+        return obs
+
+    # ----------------------------
+    # VecEnv API
+    # ----------------------------
+    def reset(self):
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._get_state()
+
+    def step_async(self, actions: np.ndarray):
+        # 액션 클리핑 (한 번에 너무 크게 안 움직이게)
+        np.clip(np.asarray(actions, dtype=np.float32).reshape(self.num_envs, 6), -0.05, 0.05, out=self._actions)
+
+    def step_wait(self):
+        self.step_count += 1
+        self.ee_pos += self._actions[:, :3]
+        self.ee_ori += self._actions[:, 3:]
+        obs = self._get_state()
+
+        d_axial, e_radial, ori_err, axial_err = compute_errors_batch(
+            self.ee_pos, self.ee_ori, self.port_pos, self.port_axis, self.target_ori, self.d_target)
+
+        rewards = -(self.w_axial * axial_err + self.w_radial * e_radial + self.w_ori * ori_err)
+        # 포트 앞/뒤 범위를 크게 벗어나면 실패
+        failure = (d_axial < 0.0) | (d_axial > self.d_max)
+        # 축 방향 깊이 / 측면 / 자세 모두 허용 범위 안이면 성공
+        success = (axial_err < self.tol_axial) & (e_radial < self.tol_radial) & (ori_err < self.tol_ori)
+        rewards = (rewards - 10.0 * failure + 100.0 * success).astype(np.float32)
+
+        timeout = self.step_count >= self.max_steps
+        terminated = failure | success
+        truncated = timeout & ~terminated
+        dones = terminated | truncated
+
+        terminal_obs = obs
+        if dones.any():
+            terminal_obs = obs.copy()    # reset 전 관측 (SB3 terminal_observation)
+            self._reset_envs(dones)
+            obs[dones] = self._get_state()[dones]
+
+        self._info_arrays.update(d_axial=d_axial, e_radial=e_radial, ori_err=ori_err, axial_err=axial_err,
+                                 success=success, timeout=timeout)
+        infos = StepInfos(self._running_infos, d_axial, e_radial, ori_err, axial_err, success, timeout, truncated,
+                          dones, terminal_obs)
+        return obs, rewards, dones, infos
+
+    def seed(self, seed: Optional[int] = None):
+        self.rng = np.random.default_rng(seed)
+        return [None if seed is None else seed + i for i in range(self.num_envs)]
+
+    def close(self):
+        pass
+
+
+if __name__ == "__main__":
+    # DummyVecEnv([ArmReachGymEnv]*N) 대비 steps/sec — train_ppo 와 같은 VecMonitor 래핑 + PPO 의 info 처리 포함
+    from stable_baselines3.common.vec_env import DummyVecEnv, VecMonitor
+    from env_wrapper import ArmReachGymEnv
+
+    def _ppo_info_pass(infos, dones):
+        # OnPolicyAlgorithm.collect_rollouts 가 매 스텝 하는 일 (_update_info_buffer + timeout bootstrap 확인)
+        for info in infos:
+            info.get("episode")
+            info.get("is_success")
+        for idx, done in enumerate(dones):
+            if done and infos[idx].get("terminal_observation") is not None:
+                infos[idx].get("TimeLimit.truncated", False)
+
+    def _steps_per_sec(venv, n_steps):
+        venv = VecMonitor(venv)
+        venv.reset()
+        actions = np.random.uniform(-0.05, 0.05, size=(n_steps, venv.num_envs, 6)).astype(np.float32)
+        t0 = time.perf_counter()
+        for a in actions:
+            _, _, dones, infos = venv.step(a)
+            _ppo_info_pass(infos, dones)
+        return n_steps * venv.num_envs / (time.perf_counter() - t0)
+
+    print(f"{'N':>6} {'DummyVecEnv':>14} {'ArmReachVecEnv':>16} {'speedup':>8}")
+    for n in (1, 16, 256, 1024):
+        n_steps = max(50_000 // n, 20)
+        dummy = _steps_per_sec(DummyVecEnv([ArmReachGymEnv for _ in range(n)]), max(n_steps // 10, 10))
+        vec = _steps_per_sec(ArmReachVecEnv(n, seed=0), n_steps)
+        print(f"{n:>6} {dummy:>12,.0f}/s {vec:>14,.0f}/s {vec / dummy:>7.1f}x")
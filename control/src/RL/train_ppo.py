@@ -1,16 +1,17 @@
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv
-from env_wrapper import ArmReachGymEnv
+from stable_baselines3.common.vec_env import VecMonitor
+from env_armreach_vec import ArmReachVecEnv
 
-if __name__ == "__main__":
-    def make_env():
-        return ArmReachGymEnv()
+N_ENVS = 8
 
-    vec_env = DummyVecEnv([make_env])
+if __name__ == "__main__":
+    # ArmReachEnv N개를 배열 연산으로 한 번에 step (DummyVecEnv + ArmReachGymEnv 대체)
+    vec_env = VecMonitor(ArmReachVecEnv(num_envs=N_ENVS))
 
     model = PPO(
         policy="MlpPolicy",
         env=vec_env,
+        n_steps=2048 // N_ENVS,   # 업데이트당 transition 수는 기본값(2048)과 동일하게
         verbose=1,
     )
 
@@ -32,5 +33,4 @@ if __name__ == "__main__":
 
         print("rewards:", rewards, "infos:", infos)
 
-        if dones[0]:
-            obs = vec_env.reset()
\ No newline at end of file
+        # 끝난 env 는 VecEnv 안에서 자동 reset 됨
\ No newline at end of file
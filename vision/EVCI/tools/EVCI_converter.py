@@ -1,72 +1,270 @@
+import argparse
 import json
 import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
-def coco_to_yolo(json_path, output_root="datasets/EVCI/"):
+try:
+    import ijson  # 선택: 대용량 instances JSON 스트리밍 파싱
+except ImportError:
+    ijson = None
+
+
+'''
+category id -> yolo class (cfg/datasets/EVCI.yaml names 순서)
+1 -> 1 (DC-) HolePairLeft
+2 -> 2 (DC+) HolePairRight
+3 -> 0 (AC) ACHole
+'''
+CLASS_MAP = {
+    1: 1,
+    2: 2,
+    3: 0,
+}
+
+# 인자 없이 실행했을 때 변환할 기본 세트 (README 절차)
+DEFAULT_JSONS = [
+    "datasets/EVCI/EVCI_A_set_Test/instances_Test.json",
+    "datasets/EVCI/EVCI_A_set_Validation/instances_Validate.json",
+]
+
+STATE_FILE = ".converter_state.json"
+
+
+def infer_split(json_path):
+    # split 구분 (train/val 자동)
+    if "train" in json_path.lower() or "test" in json_path.lower():
+        return "train"
+    elif "val" in json_path.lower() or "validate" in json_path.lower():
+        return "val"
+    return "unknown"
+
+
+def load_class_map(path=None):
+    """{coco category id: yolo class} — path(JSON)가 있으면 그 표 사용"""
+    if not path:
+        return dict(CLASS_MAP)
+    with open(path, "r") as f:
+        return {int(k): int(v) for k, v in json.load(f).items()}
+
+
+# ---------------- COCO 파싱 ----------------
+def _iter_section(json_path, key):
+    """ijson 으로 instances JSON 의 images / annotations 배열을 항목 단위로 스트리밍"""
+    with open(json_path, "rb") as f:
+        # use_float: bbox 를 Decimal 대신 float 로
+        yield from ijson.items(f, f"{key}.item", use_float=True)
+
+
+def _sections(json_path):
+    """
+    → (images, annotations) 순회 가능 객체
+    ijson 있으면 섹션별 스트리밍, 없으면 전체 로드 1회 (기존 방식) 로 두 섹션 모두 반환
+    """
+    if ijson is not None:
+        return _iter_section(json_path, "images"), _iter_section(json_path, "annotations")
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    return data.get("images", []), data.get("annotations", [])
+
+
+def read_coco(json_path, class_map):
+    """
+    → image_info {id: (w, h, file_name)}, lines {image_id: [yolo 라벨 줄]}, 통계
+    annotation 원본(dict, segmentation 포함)은 보관하지 않고 YOLO 한 줄 문자열만 모음
+    """
+    images, annotations = _sections(json_path)
+    image_info = {img["id"]: (img["width"], img["height"], img["file_name"])
+                  for img in images}
+    lines = {}
+    skipped_cls = 0
+    for ann in annotations:
+        class_id = class_map.get(ann["category_id"])
+        info = image_info.get(ann["image_id"])
+        if class_id is None or info is None:
+            skipped_cls += 1
+            continue
+        img_w, img_h, _ = info
+        x, y, w, h = ann["bbox"]
+        x_center = (x + w / 2) / img_w
+        y_center = (y + h / 2) / img_h
+        w /= img_w
+        h /= img_h
+        lines.setdefault(ann["image_id"], []).append(
+            f"{class_id} {x_center:.6f} {y_center:.6f} {w:.6f} {h:.6f}\n")
+    return image_info, lines, {"skipped_annotations": skipped_cls}
+
+
+# ---------------- 출력 ----------------
+def _write_if_changed(path, content):
+    """내용이 같으면 건드리지 않음 (재실행 시 mtime 유지 → 멱등)"""
+    try:
+        with open(path, "r") as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(content)
+    os.replace(tmp, path)
+    return True
+
+
+def _link_image(src, dst, mode):
+    """images/<split> 로 이미지 배치: hardlink (기본) / symlink / copy, 이미 있으면 생략"""
+    if os.path.exists(dst) or not os.path.exists(src):
+        return False
+    if mode == "hardlink":
+        try:
+            os.link(src, dst)
+            return True
+        except OSError:
+            pass  # 다른 파일시스템 등 → 복사
+    elif mode == "symlink":
+        os.symlink(os.path.abspath(src), dst)
+        return True
+    shutil.copy2(src, dst)
+    return True
+
+
+def _find_image_dir(json_path):
+    base = os.path.dirname(json_path)
+    for name in ("images", "img"):
+        if os.path.isdir(os.path.join(base, name)):
+            return os.path.join(base, name)
+    return base
+
+
+def _load_state(state_path):
+    """split 별 상태 파일 → {json 절대경로: 마지막 실행 시각} (같은 split 에 JSON 여러 개 가능)"""
+    if not os.path.isfile(state_path):
+        return {}
+    with open(state_path, "r") as f:
+        state = json.load(f)
+    if "runs" in state:
+        return state["runs"]
+    # 이전 형식 {"last_run", "json"}
+    return {state["json"]: state["last_run"]} if "json" in state and "last_run" in state else {}
+
+
+def _save_state(state_path, json_path, t0):
+    runs = _load_state(state_path)
+    runs[os.path.abspath(json_path)] = t0
+    tmp = state_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"runs": runs}, f, indent=2)
+    os.replace(tmp, state_path)
+
+
+def _parse_since(value, state_path, json_path):
+    if value is None:
+        return None
+    if value == "last":
+        # 이 JSON 의 직전 실행 시각 (같은 split 의 다른 JSON 기록은 무시)
+        return _load_state(state_path).get(os.path.abspath(json_path))
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def coco_to_yolo(json_path, output_root="datasets/EVCI/", split=None, class_map=None,
+                 link=None, images_dir=None, since=None, workers=8):
     """
     COCO JSON 어노테이션을 YOLO 형식 txt 라벨로 변환
     Args:
         json_path (str): COCO JSON 파일 경로
         output_root (str): 출력 루트 폴더 (예: datasets/EVCI)
+        split (str): None이면 파일 이름으로 train/val 추정
+        class_map (dict): {coco category id: yolo class}, None이면 CLASS_MAP
+        link (str): None | "hardlink" | "symlink" | "copy" — images/<split> 에 이미지 배치
+        images_dir (str): 원본 이미지 폴더 (None이면 JSON 옆 images/ 또는 img/)
+        since (str|float): epoch / ISO 시각 / "last" — 그 이후 수정된 원본 이미지(또는 라벨 없는 이미지)만 처리
+        workers (int): 라벨 쓰기 / 이미지 링크 스레드 수
     """
-    # split 구분 (train/val 자동)
-    if "train" in json_path.lower() or "test" in json_path.lower():
-        split_name = "train"
-    elif "val" in json_path.lower() or "validate" in json_path.lower():
-        split_name = "val"
-    else:
-        split_name = "unknown"
-
+    t0 = time.time()
+    split_name = split or infer_split(json_path)
     labels_dir = os.path.join(output_root, "labels", split_name)
-    images_dir = os.path.join(output_root, "images", split_name)
-    os.makedirs(labels_dir, exist_ok=True)
-    os.makedirs(images_dir, exist_ok=True)
+    out_images_dir = os.path.join(output_root, "images", split_name)
+    images_dir = images_dir or _find_image_dir(json_path)
+    state_path = os.path.join(labels_dir, STATE_FILE)
+    since_ts = _parse_since(since, state_path, json_path)
 
-    with open(json_path, "r") as f:
-        data = json.load(f)
+    image_info, lines, stats = read_coco(json_path, class_map or CLASS_MAP)
 
-    # id → (w,h,file_name) 매핑
-    image_info = {img["id"]: (img["width"], img["height"], img["file_name"]) for img in data["images"]}
+    # 작업 목록: (라벨 경로, 내용, 원본 이미지, 링크 대상)
+    jobs = []
+    for img_id, (_, _, file_name) in image_info.items():
+        label_path = os.path.join(labels_dir, os.path.splitext(file_name)[0] + ".txt")
+        src_img = os.path.join(images_dir, file_name)
+        if since_ts is not None and os.path.exists(label_path):
+            try:
+                if os.path.getmtime(src_img) < since_ts:
+                    continue
+            except OSError:
+                continue
+        # 라벨은 어노테이션이 있는 이미지만 (기존 동작), 이미지 배치는 전체
+        content = "".join(lines[img_id]) if img_id in lines else None
+        if content is None and not link:
+            continue
+        jobs.append((label_path, content, src_img, os.path.join(out_images_dir, file_name)))
 
-    '''
-    category id -> yolo class
-    1 -> 1 (DC-) HolePairLeft
-    2 -> 2 (DC+) HolePairRight
-    3 -> 0 (AC) ACHole
-    '''
-    id_to_idx = {
-    1: 1,
-    2: 2,
-    3: 0
-    }
-    
-    # annotation들을 image_id별로 모으기
-    grouped_anns = {}
-    for ann in data["annotations"]:
-        img_id = ann["image_id"]
-        if img_id not in grouped_anns:
-            grouped_anns[img_id] = []
-        grouped_anns[img_id].append(ann)
-
-    # 각 이미지별 라벨 파일 생성
-    for img_id, anns in grouped_anns.items():
-        img_w, img_h, file_name = image_info[img_id]
-        label_name = os.path.splitext(file_name)[0] + ".txt"
-        label_path = os.path.join(labels_dir, label_name)
-
-        with open(label_path, "w") as f:
-            for ann in anns:
-                x, y, w, h = ann["bbox"]
-                x_center = (x + w / 2) / img_w
-                y_center = (y + h / 2) / img_h
-                w /= img_w
-                h /= img_h
-                class_id = id_to_idx[ann["category_id"]]
-                f.write(f"{class_id} {x_center:.6f} {y_center:.6f} {w:.6f} {h:.6f}\n")
-
-    print(f"{json_path} → {split_name} 변환 완료, 저장 경로: {labels_dir}")
-
-
-# ---------------- 사용 예시 ----------------
-# coco_to_yolo("filename.json")
-coco_to_yolo("datasets/EVCI/EVCI_A_set_Test/instances_Test.json")
-coco_to_yolo("datasets/EVCI/EVCI_A_set_Validation/instances_Validate.json")
+    # 디렉터리는 한 번에 생성 (file_name 에 하위 폴더가 있을 수 있음)
+    dirs = {labels_dir, out_images_dir} if link else {labels_dir}
+    for label_path, _, _, dst_img in jobs:
+        dirs.add(os.path.dirname(label_path))
+        if link:
+            dirs.add(os.path.dirname(dst_img))
+    for d in sorted(dirs):
+        os.makedirs(d, exist_ok=True)
+
+    def work(job):
+        label_path, content, src_img, dst_img = job
+        wrote = _write_if_changed(label_path, content) if content is not None else False
+        linked = _link_image(src_img, dst_img, link) if link else False
+        return wrote, linked
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        results = list(ex.map(work, jobs))
+
+    stats.update({
+        "json": json_path,
+        "split": split_name,
+        "images": len(image_info),
+        "processed": len(jobs),
+        "labels_written": sum(w for w, _ in results),
+        "images_linked": sum(l for _, l in results),
+        "elapsed_s": round(time.time() - t0, 3),
+    })
+    _save_state(state_path, json_path, t0)
+
+    print(f"{json_path} → {split_name} 변환 완료, 저장 경로: {labels_dir} "
+          f"(처리 {stats['processed']}/{stats['images']}, 갱신 {stats['labels_written']}, "
+          f"이미지 {stats['images_linked']}, 제외 어노테이션 {stats['skipped_annotations']})")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EVCI COCO → YOLO label converter")
+    parser.add_argument("json", nargs="*", default=DEFAULT_JSONS, help="COCO instances JSON 경로들")
+    parser.add_argument("--output-root", default="datasets/EVCI/")
+    parser.add_argument("--split", default=None, help="train / val (생략 시 파일 이름으로 추정)")
+    parser.add_argument("--class-map", default=None, help='JSON {"coco_id": yolo_class} (생략 시 CLASS_MAP)')
+    parser.add_argument("--link", choices=["hardlink", "symlink", "copy"], default=None,
+                        help="images/<split> 에 이미지 배치 방식 (생략 시 라벨만 생성)")
+    parser.add_argument("--images-dir", default=None, help="원본 이미지 폴더 (생략 시 JSON 옆 images/ 또는 img/)")
+    parser.add_argument("--since", default=None, help='epoch 초 / ISO 시각 / "last" (직전 실행 이후 변경분만)')
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    class_map = load_class_map(args.class_map)
+    for path in args.json:
+        coco_to_yolo(path, args.output_root, args.split, class_map, args.link,
+                     args.images_dir, args.since, args.workers)
+
+
+if __name__ == "__main__":
+    main()
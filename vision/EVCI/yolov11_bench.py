@@ -0,0 +1,183 @@
+"""
+EVCI 검출기(yolo11s) 지연시간/처리량 벤치마크
+
+- imgsz(320~960) × batch × thread 수 × backend(pytorch / onnx / openvino ...) 조합을 고정 프레임 세트로 측정
+- 조합마다 새 프로세스(spawn)에서 실행 → 스레드 설정이 섞이지 않고 peak RSS 를 조합별로 측정 가능
+- warm-up 제외 배치 지연시간 p50/p95/p99 (ms), 프레임당 지연, FPS, peak RSS (MB)
+- (backend, imgsz) 마다 EVCI val mAP50 1회 측정 (batch/thread 와 무관)
+- 결과는 조합 순서가 고정된 JSON + CSV → 커밋 간 diff 가능
+
+사용 예 (vision/EVCI 에서):
+  python yolov11_bench.py --imgsz 320 480 640 960 --batch 1 4 --threads 1 4 --backend pytorch onnx
+  python yolov11_bench.py --no-map --num-frames 50 --out runs/bench/quick
+"""
+
+import argparse
+import csv
+import glob
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import cv2
+import numpy as np
+
+DEFAULT_WEIGHTS = "runs/EVCI_train/yolo11s_setA2/weights/best.pt"
+DEFAULT_DATA = "cfg/datasets/EVCI.yaml"
+DEFAULT_FRAMES = "datasets/EVCI/images/val"
+
+
+def load_frames(src, num_frames):
+    """폴더(이름순) 또는 glob 에서 앞 num_frames 장을 BGR 로 미리 로드 (디스크 I/O 는 측정 제외)"""
+    paths = sorted(glob.glob(os.path.join(src, "*")) if os.path.isdir(src) else glob.glob(src))
+    paths = [p for p in paths if p.lower().endswith((".png", ".jpg", ".jpeg", ".bmp"))][:num_frames]
+    frames = [cv2.imread(p) for p in paths]
+    return [f for f in frames if f is not None], paths
+
+
+def _peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def export_model(weights, backend, imgsz):
+    """pytorch 이외 backend 는 ultralytics export 결과 경로 (imgsz 별 1회, 동적 batch)"""
+    if backend == "pytorch":
+        return weights
+    from ultralytics import YOLO
+    return YOLO(weights).export(format=backend, imgsz=imgsz, dynamic=True, verbose=False)
+
+
+def _run_config(model_path, frames_src, num_frames, imgsz, batch, threads, device, warmup, repeats):
+    """(자식 프로세스) 한 조합 측정"""
+    import torch
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(threads)
+    from ultralytics import YOLO
+
+    frames, _ = load_frames(frames_src, num_frames)
+    model = YOLO(model_path, task="detect")
+    batches = [frames[i:i + batch] for i in range(0, len(frames), batch)]
+    batches = [b for b in batches if len(b) == batch] or [frames[:batch]]
+
+    for b in itertools.islice(itertools.cycle(batches), warmup):
+        model(b, imgsz=imgsz, device=device, verbose=False)
+
+    lat = []
+    t_total = time.perf_counter()
+    for _ in range(repeats):
+        for b in batches:
+            t0 = time.perf_counter()
+            model(b, imgsz=imgsz, device=device, verbose=False)
+            lat.append((time.perf_counter() - t0) * 1e3)
+    t_total = time.perf_counter() - t_total
+
+    lat = np.asarray(lat)
+    n_frames = len(lat) * batch
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+    return {
+        "batches": len(lat),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "per_frame_ms": round(float(lat.mean() / batch), 3),
+        "fps": round(n_frames / t_total, 2),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def _run_map(model_path, data, imgsz, device):
+    """(자식 프로세스) EVCI val mAP50"""
+    from ultralytics import YOLO
+    metrics = YOLO(model_path, task="detect").val(data=data, imgsz=imgsz, device=device,
+                                                  plots=False, verbose=False)
+    return round(float(metrics.box.map50), 4)
+
+
+def _in_fresh_process(fn, *args):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as ex:
+        return ex.submit(fn, *args).result()
+
+
+def env_info():
+    def _git(*cmd):
+        try:
+            return subprocess.check_output(["git", *cmd], stderr=subprocess.DEVNULL, text=True).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    info = {"python": platform.python_version(), "machine": platform.machine(),
+            "cpu_count": os.cpu_count(), "commit": _git("rev-parse", "--short", "HEAD")}
+    try:
+        import torch
+        import ultralytics
+        info.update({"torch": torch.__version__, "ultralytics": ultralytics.__version__})
+    except ImportError:
+        pass
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EVCI detector latency/throughput benchmark")
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    parser.add_argument("--data", default=DEFAULT_DATA, help="mAP50 측정용 데이터셋 yaml")
+    parser.add_argument("--frames", default=DEFAULT_FRAMES, help="고정 프레임 폴더 또는 glob")
+    parser.add_argument("--num-frames", type=int, default=100)
+    parser.add_argument("--imgsz", type=int, nargs="+", default=[320, 480, 640, 800, 960])
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--backend", nargs="+", default=["pytorch"],
+                        help="pytorch / onnx / openvino / torchscript ... (ultralytics export format)")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--warmup", type=int, default=10, help="측정 제외 warm-up 배치 수")
+    parser.add_argument("--repeats", type=int, default=1, help="프레임 세트 반복 횟수")
+    parser.add_argument("--no-map", action="store_true", help="mAP50 측정 생략")
+    parser.add_argument("--out", default="runs/bench/yolo11s", help="출력 경로 (확장자 없이, .json/.csv 생성)")
+    args = parser.parse_args()
+
+    frames, paths = load_frames(args.frames, args.num_frames)
+    if not frames:
+        sys.exit(f"[bench] 프레임 없음: {args.frames}")
+    print(f"[bench] {len(frames)} frames from {args.frames}")
+
+    rows = []
+    maps = {}
+    for backend, imgsz in itertools.product(args.backend, args.imgsz):
+        model_path = export_model(args.weights, backend, imgsz)
+        if not args.no_map:
+            maps[(backend, imgsz)] = _in_fresh_process(_run_map, model_path, args.data, imgsz, args.device)
+        for batch, threads in itertools.product(args.batch, args.threads):
+            res = _in_fresh_process(_run_config, model_path, args.frames, args.num_frames, imgsz,
+                                    batch, threads, args.device, args.warmup, args.repeats)
+            row = {"backend": backend, "imgsz": imgsz, "batch": batch, "threads": threads, **res,
+                   "map50": maps.get((backend, imgsz))}
+            rows.append(row)
+            print(f"[bench] {backend:>10} imgsz={imgsz:<4} batch={batch:<2} threads={threads:<2} "
+                  f"p50={row['p50_ms']:.1f}ms p95={row['p95_ms']:.1f}ms p99={row['p99_ms']:.1f}ms "
+                  f"fps={row['fps']:.1f} rss={row['peak_rss_mb']:.0f}MB map50={row['map50']}")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    report = {
+        "env": env_info(),
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "frames": [os.path.basename(p) for p in paths],
+        "results": rows,
+    }
+    with open(args.out + ".json", "w") as f:
+        json.dump(report, f, indent=2)
+    with open(args.out + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"[bench] ✅ {args.out}.json / .csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+포즈 학습/평가용 디코드 캐시 (memmap)
+
+- 데이터셋 이미지를 한 번만 디코드 + 모델 입력 해상도로 리사이즈해서
+  uint8 (N, H, W, 3) RGB .npy 하나에 저장 (np.lib.format.open_memmap)
+- 옆에 (N, 7) float32 타깃 저장: [x,y,z]*POS_SCALE + [qx,qy,qz,qw] (PoseRegressor 학습 형식)
+- 캐시 키 = 소스 파일 목록(이름/크기/수정시각, 또는 --content-hash 면 바이트) + 입력 크기 + POS_SCALE 해시
+  → 소스가 바뀌면 새 키로 자동 재생성
+- PoseCacheDataset: torch.from_numpy 로 memmap 슬라이스를 복사 없이 반환 (uint8 HWC)
+  정규화는 배치 단위로 normalize_batch (GPU 에서 수행 가능)
+
+기본 입력 크기는 poseInfer.preprocess 와 같게 원본 해상도(640x480, 리사이즈 없음).
+
+사용 예
+  python vision/SEGU/pose_cache.py --src vision/SEGU/datasets/train --cache vision/SEGU/cache
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]  # vision/
+sys.path.append(str(ROOT / "SEGU"))
+from pose_shards import POS_SCALE, IMAGENET_MEAN, IMAGENET_STD, list_images, _label_for, label_to_target  # noqa: E402
+
+try:
+    import torch
+    from torch.utils.data import Dataset
+except ImportError:  # 캐시 생성 / numpy 접근은 torch 없이도 가능
+    torch = None
+    Dataset = object
+
+DEFAULT_INPUT_SIZE = (640, 480)   # (w, h)
+DEFAULT_CACHE_DIR = ROOT / "SEGU" / "cache"
+
+
+# ==============================
+# Key
+# ==============================
+def source_fingerprint(paths: List[str], content: bool = False) -> str:
+    """소스 이미지 집합 해시 (기본: 이름+크기+mtime, content=True 면 파일 바이트까지)"""
+    h = hashlib.sha1()
+    for p in paths:
+        st = os.stat(p)
+        h.update(os.path.basename(p).encode())
+        h.update(f":{st.st_size}".encode())
+        if content:
+            with open(p, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+        else:
+            h.update(f":{st.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+def cache_key(paths: List[str], input_size: Tuple[int, int], pos_scale: float, content: bool = False) -> str:
+    h = hashlib.sha1(source_fingerprint(paths, content).encode())
+    h.update(f"{input_size[0]}x{input_size[1]}:{pos_scale}".encode())
+    return h.hexdigest()[:16]
+
+
+# ==============================
+# Build
+# ==============================
+def _decode_into(images: np.ndarray, i: int, path: str, input_size: Tuple[int, int]) -> bool:
+    img = cv2.imread(path, cv2.IMREAD_COLOR)
+    if img is None:
+        return False
+    if (img.shape[1], img.shape[0]) != tuple(input_size):
+        img = cv2.resize(img, tuple(input_size), interpolation=cv2.INTER_AREA)
+    # memmap 슬라이스에 바로 씀 (중간 버퍼 없음)
+    cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=images[i])
+    return True
+
+
+def build_cache(src: str,
+                cache_dir: str = str(DEFAULT_CACHE_DIR),
+                input_size: Tuple[int, int] = DEFAULT_INPUT_SIZE,
+                pos_scale: float = POS_SCALE,
+                content_hash: bool = False,
+                workers: int = 4) -> str:
+    """
+    src 아래 이미지(파일명 GT 파싱 가능한 것만)를 캐시로 만들고 캐시 폴더 경로 반환.
+    같은 키의 캐시가 이미 있으면 그대로 재사용.
+    """
+    paths = [p for p in list_images(src) if _label_for(p) is not None]
+    key = cache_key(paths, input_size, pos_scale, content_hash)
+    path = os.path.join(cache_dir, key)
+    if os.path.isfile(os.path.join(path, "meta.json")):
+        return path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=f".{key}.", dir=cache_dir)
+    try:
+        w, h = input_size
+        images = np.lib.format.open_memmap(os.path.join(tmp, "images.npy"), mode="w+",
+                                           dtype=np.uint8, shape=(len(paths), h, w, 3))
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+            ok = np.array(list(ex.map(lambda a: _decode_into(images, a[0], a[1], input_size),
+                                      enumerate(paths))), dtype=bool)
+        images.flush()
+        del images
+
+        targets = np.stack([label_to_target(_label_for(p), pos_scale) for p in paths]) if paths \
+            else np.empty((0, 7), np.float32)
+        np.save(os.path.join(tmp, "targets.npy"), targets.astype(np.float32))
+        np.save(os.path.join(tmp, "valid.npy"), ok)
+        np.save(os.path.join(tmp, "names.npy"), np.array([os.path.basename(p) for p in paths]))
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"key": key, "src": os.path.abspath(src), "n": len(paths),
+                       "input_size": list(input_size), "pos_scale": pos_scale,
+                       "content_hash": content_hash, "failed": int((~ok).sum())}, f, indent=2)
+        os.replace(tmp, path)
+    except OSError:
+        # 다른 프로세스가 같은 키를 먼저 만든 경우
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isfile(os.path.join(path, "meta.json")):
+            raise
+    return path
+
+
+def prune_cache(cache_dir: str, keep: str):
+    """keep 이외의 오래된 캐시 폴더 삭제"""
+    for name in os.listdir(cache_dir):
+        full = os.path.join(cache_dir, name)
+        if os.path.isdir(full) and full != os.path.abspath(keep) and name != os.path.basename(keep):
+            shutil.rmtree(full, ignore_errors=True)
+
+
+# ==============================
+# Dataset
+# ==============================
+def normalize_batch(x):
+    """(B,H,W,3) uint8 → (B,3,H,W) float, poseInfer.preprocess 와 같은 ImageNet 정규화"""
+    mean = torch.as_tensor(IMAGENET_MEAN, device=x.device).view(1, 3, 1, 1)
+    std = torch.as_tensor(IMAGENET_STD, device=x.device).view(1, 3, 1, 1)
+    return (x.permute(0, 3, 1, 2).float() / 255.0 - mean) / std
+
+
+class PoseCacheDataset(Dataset):
+    def __init__(self, cache_path: str, only_valid: bool = True):
+        with open(os.path.join(cache_path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        # mode="c": copy-on-write → 쓰기 가능 배열이라 torch.from_numpy 경고 없이 zero-copy, 파일은 불변
+        self.images = np.load(os.path.join(cache_path, "images.npy"), mmap_mode="c")
+        self.targets = np.load(os.path.join(cache_path, "targets.npy"))
+        self.names = np.load(os.path.join(cache_path, "names.npy"))
+        valid = np.load(os.path.join(cache_path, "valid.npy"))
+        self.indices = np.flatnonzero(valid) if only_valid else np.arange(len(valid))
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, i: int):
+        j = self.indices[i]
+        if torch is None:
+            return self.images[j], self.targets[j]
+        return torch.from_numpy(self.images[j]), torch.from_numpy(self.targets[j])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build decoded memmap cache for pose training")
+    parser.add_argument("--src", default=str(ROOT / "SEGU" / "datasets"))
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE_DIR))
+    parser.add_argument("--size", default=f"{DEFAULT_INPUT_SIZE[0]}x{DEFAULT_INPUT_SIZE[1]}", help="입력 크기 WxH")
+    parser.add_argument("--content-hash", action="store_true", help="캐시 키에 파일 바이트까지 포함")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--prune", action="store_true", help="현재 키 이외의 캐시 삭제")
+    args = parser.parse_args()
+
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+    t0 = time.perf_counter()
+    path = build_cache(args.src, args.cache, size, POS_SCALE, args.content_hash, args.workers)
+    print(f"[cache] {path} ready in {time.perf_counter() - t0:.2f}s")
+    if args.prune:
+        prune_cache(args.cache, path)
+
+    ds = PoseCacheDataset(path)
+    t0 = time.perf_counter()
+    total = sum(int(ds[i][0][0, 0, 0]) for i in range(len(ds)))
+    dt = time.perf_counter() - t0
+    print(f"[cache] {len(ds)} samples, random access {dt / max(len(ds), 1) * 1e6:.1f} us/sample")
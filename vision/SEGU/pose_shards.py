@@ -0,0 +1,279 @@
+"""
+포즈 학습 이미지 shard 포맷 (WebDataset 스타일 tar)
+
+- 작은 PNG 수천 장을 고정 크기 tar shard 로 묶어 open/stat 오버헤드 제거 + 머신 간 복사 단순화
+  * 샘플 하나 = <key>.png|.jpg (이미지) + <key>.json (dataset_naming 파싱 라벨)
+  * (선택) 미리 리사이즈 + JPEG 재인코딩 (--resize 224x224 --jpeg 90)
+  * out_dir/shards.json 에 shard 목록/샘플 수 기록
+- ShardedPoseDataset: torch IterableDataset 스트리밍 리더
+  * DataLoader worker 별로 shard 분할 (worker_id::num_workers), epoch 마다 shard 순서 셔플
+  * shuffle buffer 로 shard 내부 순서 섞음
+  * 타깃은 PoseRegressor 학습 형식 [x,y,z]*POS_SCALE + [qx,qy,qz,qw]
+  * torch 가 없으면 numpy (image HWC uint8 RGB, target) 를 그대로 yield
+
+사용 예
+  python vision/SEGU/pose_shards.py --src vision/SEGU/datasets/train --out vision/SEGU/shards/train \
+      --shard-size 1000 --resize 224x224 --jpeg 90
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]  # vision/
+sys.path.append(str(ROOT / "src" / "utils"))
+from dataset_naming import parse_capture_filename  # noqa: E402
+
+try:
+    import torch
+    from torch.utils.data import IterableDataset, get_worker_info
+except ImportError:  # torch 없이도 shard 생성 / numpy 스트리밍은 가능
+    torch = None
+    IterableDataset = object
+
+    def get_worker_info():
+        return None
+
+# poseInfer.py 와 같은 스케일 (학습 시 좌표 배율)
+POS_SCALE = float(os.getenv("POSE_POS_SCALE", "100.0"))
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+IMAGE_EXTS = (".png", ".jpg", ".jpeg")
+
+
+# ==============================
+# Writer
+# ==============================
+def list_images(src: str) -> List[str]:
+    out = []
+    for dirpath, _, files in os.walk(src):
+        out.extend(os.path.join(dirpath, f) for f in files if f.lower().endswith(IMAGE_EXTS))
+    return sorted(out)
+
+
+def _label_for(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        meta = parse_capture_filename(path)
+    except ValueError:
+        return None
+    meta["name"] = os.path.basename(path)
+    return meta
+
+
+def _encode_sample(path: str, resize: Optional[Tuple[int, int]], jpeg_quality: Optional[int]) -> Tuple[str, bytes]:
+    """원본 바이트 그대로(PNG) 또는 리사이즈/JPEG 재인코딩 → (확장자, 바이트)"""
+    ext = os.path.splitext(path)[1].lower()
+    if resize is None and jpeg_quality is None:
+        with open(path, "rb") as f:
+            return ext, f.read()
+    img = cv2.imread(path, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError(f"cannot decode {path}")
+    if resize is not None and (img.shape[1], img.shape[0]) != tuple(resize):
+        img = cv2.resize(img, tuple(resize), interpolation=cv2.INTER_AREA)
+    if jpeg_quality is not None:
+        ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)])
+        ext = ".jpg"
+    else:
+        ok, buf = cv2.imencode(".png", img)
+        ext = ".png"
+    if not ok:
+        raise ValueError(f"cannot encode {path}")
+    return ext, buf.tobytes()
+
+
+def _add_bytes(tar: tarfile.TarFile, name: str, data: bytes, mtime: float):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = mtime
+    tar.addfile(info, io.BytesIO(data))
+
+
+def write_shards(image_paths: List[str],
+                 out_dir: str,
+                 shard_size: int = 1000,
+                 resize: Optional[Tuple[int, int]] = None,
+                 jpeg_quality: Optional[int] = None,
+                 workers: int = 4) -> Dict[str, Any]:
+    """
+    image_paths 를 shard_size 개씩 tar 로 묶음. 파일명 파싱이 안 되는 이미지는 건너뜀.
+    디코드/리사이즈/인코딩은 스레드 풀 (cv2 가 GIL 을 놓음), tar 쓰기는 메인 스레드에서 순서대로.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    samples = [(p, lab) for p in image_paths for lab in [_label_for(p)] if lab is not None]
+    skipped = len(image_paths) - len(samples)
+    shards = []
+    now = time.time()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        for s in range(0, len(samples), shard_size):
+            chunk = samples[s:s + shard_size]
+            name = f"pose-{s // shard_size:06d}.tar"
+            tmp = os.path.join(out_dir, f".{name}.tmp")
+            encoded = ex.map(lambda item: _encode_sample(item[0], resize, jpeg_quality), chunk)
+            with tarfile.open(tmp, "w") as tar:
+                for i, ((path, label), (ext, data)) in enumerate(zip(chunk, encoded)):
+                    key = f"{s + i:08d}"
+                    _add_bytes(tar, key + ext, data, now)
+                    _add_bytes(tar, key + ".json", json.dumps(label).encode("utf-8"), now)
+            os.replace(tmp, os.path.join(out_dir, name))
+            shards.append({"file": name, "count": len(chunk)})
+
+    index = {
+        "version": 1,
+        "shards": shards,
+        "num_samples": len(samples),
+        "resize": list(resize) if resize else None,
+        "jpeg_quality": jpeg_quality,
+        "skipped": skipped,
+    }
+    with open(os.path.join(out_dir, "shards.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    return index
+
+
+# ==============================
+# Reader
+# ==============================
+def iter_shard(path: str) -> Iterator[Tuple[bytes, Dict[str, Any]]]:
+    """tar shard 순차 읽기 → (이미지 바이트, 라벨). 같은 key 의 이미지/JSON 을 묶음"""
+    pending: Dict[str, Dict[str, Any]] = {}
+    with tarfile.open(path, "r|") as tar:   # 스트림 모드 (랜덤 접근 없음)
+        for m in tar:
+            if not m.isfile():
+                continue
+            key, ext = os.path.splitext(m.name)
+            data = tar.extractfile(m).read()
+            item = pending.setdefault(key, {})
+            if ext == ".json":
+                item["label"] = json.loads(data)
+            else:
+                item["image"] = data
+            if "label" in item and "image" in item:
+                del pending[key]
+                yield item["image"], item["label"]
+
+
+def label_to_target(label: Dict[str, Any], pos_scale: float = POS_SCALE) -> np.ndarray:
+    """dataset_naming 라벨 → PoseRegressor 7-D 타깃 [x,y,z]*pos_scale + [qx,qy,qz,qw]"""
+    return np.concatenate([np.asarray(label["pos"], dtype=np.float32) * pos_scale,
+                           np.asarray(label["quat"], dtype=np.float32)])
+
+
+class ShardedPoseDataset(IterableDataset):
+    def __init__(self,
+                 shard_dir: str,
+                 shuffle_buffer: int = 1000,
+                 shuffle_shards: bool = True,
+                 input_size: Optional[Tuple[int, int]] = None,
+                 pos_scale: float = POS_SCALE,
+                 seed: int = 0):
+        """
+        shard_dir: write_shards 출력 폴더 (shards.json)
+        shuffle_buffer: 0/1 이면 순차
+        input_size: (w, h) — shard 가 미리 리사이즈되지 않았을 때만 디코드 후 리사이즈
+        """
+        with open(os.path.join(shard_dir, "shards.json"), "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        self.shards = [os.path.join(shard_dir, s["file"]) for s in self.index["shards"]]
+        self.shuffle_buffer = shuffle_buffer
+        self.shuffle_shards = shuffle_shards
+        self.input_size = tuple(input_size) if input_size else None
+        self.pos_scale = pos_scale
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        """epoch 마다 호출하면 shard 순서/버퍼 셔플이 달라짐"""
+        self.epoch = epoch
+
+    def __len__(self) -> int:
+        return self.index["num_samples"]
+
+    def _worker_shards(self, rng: random.Random) -> List[str]:
+        shards = list(self.shards)
+        if self.shuffle_shards:
+            rng.shuffle(shards)   # 모든 worker 가 같은 seed → 같은 순서에서 나눠 가짐
+        info = get_worker_info()
+        if info is None:
+            return shards
+        return shards[info.id::info.num_workers]
+
+    def _decode(self, data: bytes, label: Dict[str, Any]):
+        img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if self.input_size and (img.shape[1], img.shape[0]) != self.input_size:
+            img = cv2.resize(img, self.input_size, interpolation=cv2.INTER_AREA)
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        target = label_to_target(label, self.pos_scale)
+        if torch is None:
+            return img, target
+        # poseInfer.preprocess 와 같은 정규화 (ToTensor + ImageNet mean/std)
+        x = (img.astype(np.float32) / 255.0 - IMAGENET_MEAN) / IMAGENET_STD
+        return torch.from_numpy(x.transpose(2, 0, 1).copy()), torch.from_numpy(target)
+
+    def __iter__(self):
+        info = get_worker_info()
+        wid = info.id if info is not None else 0
+        rng = random.Random(self.seed + self.epoch)
+        shards = self._worker_shards(rng)
+        buf_rng = random.Random((self.seed + self.epoch) * 1000 + wid)
+
+        buf: List[Tuple[bytes, Dict[str, Any]]] = []
+        for shard in shards:
+            for sample in iter_shard(shard):
+                if self.shuffle_buffer <= 1:
+                    yield self._decode(*sample)
+                    continue
+                # 버퍼가 차면 임의 위치 하나를 내보내고 그 자리를 새 샘플로 교체
+                if len(buf) < self.shuffle_buffer:
+                    buf.append(sample)
+                    continue
+                j = buf_rng.randrange(len(buf))
+                out, buf[j] = buf[j], sample
+                yield self._decode(*out)
+        buf_rng.shuffle(buf)
+        for sample in buf:
+            yield self._decode(*sample)
+
+
+def _parse_size(s: Optional[str]) -> Optional[Tuple[int, int]]:
+    if not s:
+        return None
+    w, h = s.lower().split("x")
+    return int(w), int(h)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack pose images into tar shards")
+    parser.add_argument("--src", default=str(ROOT / "SEGU" / "datasets"), help="이미지 폴더 (재귀)")
+    parser.add_argument("--out", default=str(ROOT / "SEGU" / "shards"))
+    parser.add_argument("--shard-size", type=int, default=1000)
+    parser.add_argument("--resize", default=None, help="미리 리사이즈 WxH (예: 224x224)")
+    parser.add_argument("--jpeg", type=int, default=None, help="JPEG 재인코딩 품질 (생략 시 원본 PNG 유지)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--bench", action="store_true", help="작성 후 스트리밍 읽기 속도 측정")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    index = write_shards(list_images(args.src), args.out, args.shard_size,
+                         _parse_size(args.resize), args.jpeg, args.workers)
+    print(f"[shards] {index['num_samples']} samples → {len(index['shards'])} shards "
+          f"(skipped {index['skipped']}) in {time.perf_counter() - t0:.2f}s → {args.out}")
+
+    if args.bench:
+        ds = ShardedPoseDataset(args.out, shuffle_buffer=256)
+        t0 = time.perf_counter()
+        n = sum(1 for _ in ds)
+        dt = time.perf_counter() - t0
+        print(f"[shards] read {n} samples in {dt:.2f}s ({n / max(dt, 1e-9):.0f} samples/s, 1 process)")
@@ -0,0 +1,111 @@
+"""
+검출기 입력 해상도(imgsz) 적응 제어
+
+- 목표(충전구)가 화면에 크게 보이면 낮은 imgsz, 작거나 놓치면 높은 imgsz
+  * 기준: 가장 신뢰도 높은 박스의 긴 변이 모델 입력에서 min_obj_px 이상이 되는 가장 작은 레벨
+  * 박스가 없으면 마지막 pose z (m) 로 레벨 추정 (z_breaks)
+  * lost_frames 프레임 연속으로 못 찾으면 최고 해상도로 즉시 올림 (재탐색)
+- 히스테리시스: 올리기는 즉시, 내리기는 hold_frames 프레임 연속 + margin 여유가 있을 때만
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+class ResolutionController:
+    def __init__(self,
+                 levels: Sequence[int] = (320, 480, 640, 960),
+                 start: int = 640,
+                 min_obj_px: float = 64.0,
+                 conf_min: float = 0.4,
+                 down_margin: float = 0.25,
+                 hold_frames: int = 5,
+                 lost_frames: int = 3,
+                 z_breaks: Optional[Sequence[float]] = (0.3, 0.6, 1.0)):
+        """
+        levels: 사용할 imgsz 후보 (오름차순, stride 배수)
+        min_obj_px: 모델 입력에서 목표 박스 긴 변의 최소 크기 (px)
+        down_margin: 내릴 때는 min_obj_px * (1 + down_margin) 이상이어야 함 (경계 진동 방지)
+        z_breaks: pose z 경계 (m), len(levels)-1 개 — z < z_breaks[i] 이면 levels[i]
+        """
+        self.levels = sorted(int(v) for v in levels)
+        self.current = start if start in self.levels else self.levels[-1]
+        self.min_obj_px = min_obj_px
+        self.conf_min = conf_min
+        self.down_margin = down_margin
+        self.hold_frames = hold_frames
+        self.lost_frames = lost_frames
+        self.z_breaks = list(z_breaks) if z_breaks else None
+        if self.z_breaks is not None and len(self.z_breaks) != len(self.levels) - 1:
+            raise ValueError(f"z_breaks needs {len(self.levels) - 1} values for {len(self.levels)} levels, "
+                             f"got {len(self.z_breaks)}")
+        self._lost = 0
+        self._pending: Optional[int] = None
+        self._pending_count = 0
+        self.switches = 0
+
+    def _level_for_fraction(self, frac: float, margin: float) -> int:
+        """박스 긴 변 / 프레임 긴 변 = frac 일 때 min_obj_px 를 만족하는 가장 작은 레벨"""
+        need = self.min_obj_px * (1.0 + margin) / max(frac, 1e-6)
+        for lv in self.levels:
+            if lv >= need:
+                return lv
+        return self.levels[-1]
+
+    def _level_for_z(self, z: float) -> int:
+        for lv, zb in zip(self.levels, self.z_breaks):
+            if z < zb:
+                return lv
+        return self.levels[-1]
+
+    def _desired(self, boxes, confs, frame_size, pose_z) -> Optional[int]:
+        if boxes is not None and len(boxes):
+            confs = np.asarray(confs, dtype=np.float32).reshape(-1)
+            i = int(np.argmax(confs))
+            if confs[i] >= self.conf_min:
+                x1, y1, x2, y2 = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)[i]
+                frac = max(x2 - x1, y2 - y1) / float(max(frame_size))
+                # 유지/올리는 방향은 margin 없이, 내리는 방향은 margin 포함해도 더 낮을 때만
+                up = self._level_for_fraction(frac, 0.0)
+                if up >= self.current:
+                    return up
+                down = self._level_for_fraction(frac, self.down_margin)
+                return down if down < self.current else self.current
+        if pose_z is not None and self.z_breaks and np.isfinite(pose_z):
+            return self._level_for_z(float(pose_z))
+        return None
+
+    def update(self, boxes=None, confs=None, frame_size=(640, 480), pose_z: Optional[float] = None) -> int:
+        """
+        방금 처리한 프레임 결과로 다음 프레임 imgsz 결정
+        boxes: (N,4) xyxy 원본 프레임 px, confs: (N,), frame_size: (w, h)
+        """
+        want = self._desired(boxes, confs, frame_size, pose_z)
+        if want is None:
+            self._lost += 1
+            if self._lost >= self.lost_frames:
+                want = self.levels[-1]
+            else:
+                return self.current
+        else:
+            self._lost = 0
+
+        if want > self.current:
+            self._set(want)                      # 올리기: 즉시
+        elif want < self.current:
+            if want == self._pending:
+                self._pending_count += 1
+            else:
+                self._pending, self._pending_count = want, 1
+            if self._pending_count >= self.hold_frames:
+                self._set(want)                  # 내리기: hold_frames 연속일 때만
+        else:
+            self._pending, self._pending_count = None, 0
+        return self.current
+
+    def _set(self, level: int):
+        if level != self.current:
+            self.switches += 1
+        self.current = level
+        self._pending, self._pending_count = None, 0
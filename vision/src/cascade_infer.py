@@ -0,0 +1,176 @@
+"""
+검출 → 포즈 캐스케이드 워커
+
+- 매 프레임 검출기(stream_infer.detect)는 돌리고, PoseRegressor 는 필요할 때만 실행
+  * 실행 조건: 목표 클래스 박스 conf >= conf_min 이고
+    (박스 중심/크기가 move_px 이상 변했거나, 마지막 포즈 후 max_age 프레임 경과, 또는 첫 포즈)
+  * 그 외에는 직전 포즈 + age(프레임/초) 반환 — 포즈용 디코드도 생략
+- 실행/생략 횟수와 사유를 누적 → 충전 세션별 절약된 연산량 확인 ({"reset": true} 로 세션 초기화)
+
+stdin-loop 입력: {"image": <b64>, "reset": bool(선택)}
+출력: {"boxes":[...], "imgW", "imgH", "imgsz", "pose": [...]|null, "pose_age": 프레임, "pose_age_s": 초,
+       "pose_ran": bool, "reason": str, "stats": {...}}
+
+사용 예
+  python vision/src/cascade_infer.py --weights vision/weights/best.pt --pose-weights vision/SEGU/checkpoints/best.pth
+"""
+
+import argparse
+import base64
+import json
+import sys
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+
+@dataclass
+class CascadeStats:
+    frames: int = 0
+    pose_runs: int = 0
+    skipped_no_target: int = 0
+    skipped_static: int = 0
+
+    @property
+    def pose_skips(self) -> int:
+        return self.skipped_no_target + self.skipped_static
+
+    def as_dict(self):
+        d = asdict(self)
+        d["pose_skips"] = self.pose_skips
+        d["saved_ratio"] = round(self.pose_skips / self.frames, 4) if self.frames else 0.0
+        return d
+
+
+class PoseGate:
+    def __init__(self,
+                 conf_min: float = 0.5,
+                 move_px: float = 8.0,
+                 size_px: float = 8.0,
+                 max_age: int = 30,
+                 target_cls: Optional[Sequence[int]] = None):
+        """
+        conf_min: 포즈를 돌릴 최소 검출 신뢰도
+        move_px / size_px: 직전 포즈 시점 박스 대비 중심 이동 / 긴 변 변화 임계값 (원본 px)
+        max_age: 박스가 그대로여도 이 프레임 수가 지나면 다시 포즈 실행 (0 이면 비활성)
+        target_cls: 대상 클래스 id (None 이면 모든 클래스)
+        """
+        self.conf_min = conf_min
+        self.move_px = move_px
+        self.size_px = size_px
+        self.max_age = max_age
+        self.target_cls = None if target_cls is None else set(int(c) for c in target_cls)
+        self.reset()
+
+    def reset(self):
+        """새 충전 세션: 직전 포즈/통계 초기화"""
+        self.stats = CascadeStats()
+        self.pose = None
+        self._ref_box: Optional[np.ndarray] = None   # 마지막 포즈 시점 박스 (cx, cy, long)
+        self._pose_frame = -1
+        self._pose_time = 0.0
+
+    def _best_box(self, xyxy, confs, clss) -> Optional[np.ndarray]:
+        xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        confs = np.asarray(confs, dtype=np.float32).reshape(-1)
+        keep = confs >= self.conf_min
+        if self.target_cls is not None:
+            keep &= np.isin(np.asarray(clss).astype(int).reshape(-1), list(self.target_cls))
+        if not keep.any():
+            return None
+        idx = np.flatnonzero(keep)
+        x1, y1, x2, y2 = xyxy[idx[np.argmax(confs[idx])]]
+        return np.array([(x1 + x2) / 2, (y1 + y2) / 2, max(x2 - x1, y2 - y1)], dtype=np.float32)
+
+    def decide(self, xyxy, confs, clss):
+        """→ (포즈 실행 여부, 사유, 기준 박스)"""
+        box = self._best_box(xyxy, confs, clss)
+        if box is None:
+            return False, "no_target", None
+        if self.pose is None or self._ref_box is None:
+            return True, "first", box
+        if self.max_age and self.stats.frames - self._pose_frame >= self.max_age:
+            return True, "stale", box
+        moved = float(np.hypot(*(box[:2] - self._ref_box[:2])))
+        if moved >= self.move_px or abs(float(box[2] - self._ref_box[2])) >= self.size_px:
+            return True, "moved", box
+        return False, "static", box
+
+    def step(self, xyxy, confs, clss, run_pose: Callable[[], Sequence[float]]):
+        """
+        한 프레임 처리: 필요하면 run_pose() 호출, 아니면 직전 포즈 재사용
+        → {"pose", "pose_age", "pose_age_s", "pose_ran", "reason"}
+        """
+        self.stats.frames += 1
+        run, reason, box = self.decide(xyxy, confs, clss)
+        if run:
+            self.pose = list(run_pose())
+            self._ref_box = box
+            self._pose_frame = self.stats.frames
+            self._pose_time = time.monotonic()
+            self.stats.pose_runs += 1
+        elif reason == "no_target":
+            self.stats.skipped_no_target += 1
+        else:
+            self.stats.skipped_static += 1
+
+        has_pose = self.pose is not None
+        return {
+            "pose": self.pose,
+            "pose_age": self.stats.frames - self._pose_frame if has_pose else None,
+            "pose_age_s": round(time.monotonic() - self._pose_time, 3) if has_pose else None,
+            "pose_ran": run,
+            "reason": reason,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detection → pose cascade worker (stdin loop)")
+    parser.add_argument("--weights", required=True, help="YOLO weights (pt)")
+    parser.add_argument("--pose-weights", default=None, help="PoseRegressor checkpoint (기본: poseInfer.DEFAULT_WEIGHTS)")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--pose-input-size", default=None, help="포즈 입력 WxH (poseInfer --input-size)")
+    parser.add_argument("--conf-min", type=float, default=0.5)
+    parser.add_argument("--move-px", type=float, default=8.0)
+    parser.add_argument("--size-px", type=float, default=8.0)
+    parser.add_argument("--max-age", type=int, default=30, help="이 프레임 수마다 강제로 포즈 재계산 (0=끔)")
+    parser.add_argument("--target-cls", type=int, nargs="*", default=None)
+    args = parser.parse_args()
+
+    # 무거운 의존성 (ultralytics / torch) 은 워커 실행 시에만
+    from stream_infer import YOLO, decode_frame, detect, legacy_result
+    from poseInfer import decode_image, infer_pose, load_pose_model, parse_size
+
+    model = YOLO(args.weights)
+    pose_model, device = load_pose_model(args.pose_weights)
+    pose_size = parse_size(args.pose_input_size)
+    gate = PoseGate(args.conf_min, args.move_px, args.size_px, args.max_age, args.target_cls)
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            payload = json.loads(line)
+            if payload.get("reset"):
+                gate.reset()
+            b64 = payload.get("image") or ""
+            img, (w, h) = decode_frame(base64.b64decode(b64), args.imgsz)
+            xyxy, confs, clss, names = detect(model, img, args.imgsz, (w, h))
+            # 포즈 입력은 실행할 때만 디코드 (PIL, 학습 해상도)
+            pose = gate.step(xyxy, confs, clss,
+                             lambda: infer_pose(pose_model, decode_image(b64, pose_size), device))
+            result = legacy_result(xyxy, confs, clss, names, w, h, args.imgsz)
+            result.update(pose)
+            result["stats"] = gate.stats.as_dict()
+            sys.stdout.write(json.dumps(result) + "\n")
+            sys.stdout.flush()
+        except Exception as e:  # pragma: no cover
+            sys.stderr.write(f"[cascade_infer] loop error: {e}\n")
+            sys.stderr.flush()
+
+
+if __name__ == "__main__":
+    main()
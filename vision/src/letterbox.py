@@ -0,0 +1,99 @@
+"""
+검출기 입력 전처리 (letterbox 캐시)
+
+- 카메라 해상도는 배포마다 고정 → letterbox 기하(스케일/패딩)를 해상도별로 한 번만 계산
+- 미리 할당한 패딩 버퍼의 ROI 에 cv2.resize(dst=...) 로 바로 리사이즈 (프레임마다 새 버퍼 없음)
+- 정규화된 입력 텐서 (1,3,H,W) float 도 재사용 → ultralytics 에 텐서로 넘기면 내부 letterbox 생략
+- 박스는 캐시된 offset/scale 배열로 원본 프레임 좌표로 되돌림
+
+ultralytics 텐서 입력 조건: RGB, 0~1, H/W 가 stride 배수 → auto=True 면 최소 stride 배수 사각형 사용
+"""
+
+import math
+from typing import Dict, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    import torch
+except ImportError:  # torch 없으면 numpy (1,3,H,W) float32 반환
+    torch = None
+
+
+class LetterboxFrontEnd:
+    def __init__(self,
+                 src_size: Tuple[int, int],
+                 imgsz: int = 640,
+                 stride: int = 32,
+                 auto: bool = True,
+                 device: str = "cpu",
+                 half: bool = False,
+                 pad_value: int = 114):
+        """
+        src_size: 카메라 프레임 (w, h)
+        imgsz: 긴 변 기준 모델 입력 크기 (ultralytics imgsz)
+        auto: True면 ultralytics predict 처럼 짧은 변은 stride 배수까지만 패딩 (연산량 감소)
+        """
+        self.src_size = (int(src_size[0]), int(src_size[1]))
+        self.imgsz = int(imgsz)
+        w, h = self.src_size
+        r = min(self.imgsz / w, self.imgsz / h)
+        new_w, new_h = int(round(w * r)), int(round(h * r))
+        if auto:
+            out_w = int(math.ceil(new_w / stride) * stride)
+            out_h = int(math.ceil(new_h / stride) * stride)
+        else:
+            out_w = out_h = int(math.ceil(self.imgsz / stride) * stride)
+        left, top = (out_w - new_w) // 2, (out_h - new_h) // 2
+        self.new_size = (new_w, new_h)
+        self.input_size = (out_w, out_h)
+
+        # 원본 ↔ 입력 좌표 변환 (x1,y1,x2,y2 순서로 브로드캐스트)
+        self.scale = np.array([new_w / w, new_h / h] * 2, dtype=np.float32)
+        self.offset = np.array([left, top] * 2, dtype=np.float32)
+        self.clip_max = np.array([w, h] * 2, dtype=np.float32)
+
+        # 패딩 버퍼 (패딩 영역은 한 번만 채움) + 리사이즈 대상 ROI 뷰
+        self.buffer = np.full((out_h, out_w, 3), pad_value, dtype=np.uint8)
+        self.roi = self.buffer[top:top + new_h, left:left + new_w]
+
+        if torch is not None:
+            dtype = torch.float16 if half else torch.float32
+            self.tensor = torch.empty((1, 3, out_h, out_w), dtype=dtype, device=device)
+            self._hwc = torch.from_numpy(self.buffer)     # buffer 와 메모리 공유
+        else:
+            self.tensor = np.empty((1, 3, out_h, out_w), dtype=np.float32)
+
+    def __call__(self, img_bgr: np.ndarray):
+        """BGR 프레임 → 재사용 입력 텐서 (1,3,H,W) RGB 0~1"""
+        if (img_bgr.shape[1], img_bgr.shape[0]) != self.src_size:
+            raise ValueError(f"frame size {img_bgr.shape[1]}x{img_bgr.shape[0]} != {self.src_size}")
+        if (img_bgr.shape[1], img_bgr.shape[0]) == self.new_size:
+            self.roi[...] = img_bgr
+        else:
+            cv2.resize(img_bgr, self.new_size, dst=self.roi, interpolation=cv2.INTER_LINEAR)
+
+        if torch is not None:
+            # HWC BGR uint8 → CHW RGB float (채널 뒤집기 + /255), 텐서 버퍼에 제자리 기록
+            self.tensor[0].copy_(self._hwc.permute(2, 0, 1).flip(0))
+            self.tensor.mul_(1.0 / 255.0)
+        else:
+            np.multiply(self.buffer[..., ::-1].transpose(2, 0, 1), 1.0 / 255.0, out=self.tensor[0])
+        return self.tensor
+
+    def map_boxes(self, xyxy: np.ndarray) -> np.ndarray:
+        """모델 입력 좌표 (N,4) xyxy → 원본 프레임 픽셀 (clip)"""
+        xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        out = (xyxy - self.offset) / self.scale
+        return np.clip(out, 0, self.clip_max, out=out)
+
+
+# 해상도/imgsz 별 캐시 (배포 중 카메라 해상도가 바뀌는 경우만 새로 생성)
+_FRONT_ENDS: Dict[Tuple[int, int, int], LetterboxFrontEnd] = {}
+
+def get_front_end(src_size: Tuple[int, int], imgsz: int = 640, **kwargs) -> LetterboxFrontEnd:
+    key = (int(src_size[0]), int(src_size[1]), int(imgsz))
+    if key not in _FRONT_ENDS:
+        _FRONT_ENDS[key] = LetterboxFrontEnd(src_size, imgsz, **kwargs)
+    return _FRONT_ENDS[key]
@@ -38,9 +38,30 @@ from SEGU.model.suPoseModel import PoseRegressor  # noqa: E402
 POS_SCALE = float(os.getenv("POSE_POS_SCALE", "100.0"))
 
 
-def decode_image(b64str: str) -> Image.Image:
+def parse_size(text: str | None):
+    """WxH 문자열 (예: 640x480) → (w, h), None/빈 문자열이면 None"""
+    if not text:
+        return None
+    w, h = (int(v) for v in text.lower().split("x"))
+    return w, h
+
+
+def decode_image(b64str: str, input_size: tuple[int, int] | None = None) -> Image.Image:
+    """
+    b64 → RGB PIL 이미지
+    input_size (w, h) 가 주어지면 JPEG 은 draft 로 그 크기를 덮는 가장 작은 1/2^k 스케일로 디코드한 뒤
+    input_size 로 리사이즈 (학습 해상도와 맞춤). None 이면 기존처럼 원본 해상도.
+    """
     buf = base64.b64decode(b64str)
-    return Image.open(io.BytesIO(buf)).convert("RGB")
+    img = Image.open(io.BytesIO(buf))
+    if input_size is None:
+        return img.convert("RGB")
+    if img.format == "JPEG":
+        img.draft("RGB", input_size)
+    img = img.convert("RGB")
+    if img.size != tuple(input_size):
+        img = img.resize(tuple(input_size), Image.BILINEAR)
+    return img
 
 
 def load_model(weights_path: str, device: str = "cpu"):
@@ -94,13 +115,14 @@ def infer_pose(model, img: Image.Image, device: str | None = None):
     return arr.tolist()
 
 
-def infer_pose_b64(model, b64_image: str, device: str | None = None):
-    img = decode_image(b64_image)
+def infer_pose_b64(model, b64_image: str, device: str | None = None,
+                   input_size: tuple[int, int] | None = None):
+    img = decode_image(b64_image, input_size)
     return infer_pose(model, img, device)
 
 
-def run_once(model, device, b64_image: str):
-    return infer_pose_b64(model, b64_image, device)
+def run_once(model, device, b64_image: str, input_size: tuple[int, int] | None = None):
+    return infer_pose_b64(model, b64_image, device, input_size)
 
 
 def main():
@@ -112,7 +134,13 @@ def main():
     )
     parser.add_argument("--test", action="store_true", help="Run inference on bundled sample image and exit")
     parser.add_argument("--stdin-loop", action="store_true", help="Keep process alive and read JSON lines")
+    parser.add_argument(
+        "--input-size",
+        default=None,
+        help="Model input WxH (e.g. 640x480). JPEG frames are decoded at reduced scale and resized to it",
+    )
     args = parser.parse_args()
+    input_size = parse_size(args.input_size)
 
     device = "cuda" if torch.cuda.is_available() else "cpu"
     model = load_model(args.weights, device)
@@ -140,7 +168,7 @@ def main():
                     sys.stdout.flush()
                     continue
                 b64 = payload.get("image") or ""
-                pred = run_once(model, device, b64)
+                pred = run_once(model, device, b64, input_size)
                 sys.stdout.write(json.dumps({"pred": pred}) + "\n")
                 sys.stdout.flush()
             except Exception as e:  # pragma: no cover
@@ -152,7 +180,7 @@ def main():
     b64 = sys.stdin.read().strip()
     if not b64:
         raise RuntimeError("No image provided on stdin")
-    pred = run_once(model, device, b64)
+    pred = run_once(model, device, b64, input_size)
     sys.stdout.write(json.dumps({"pred": pred}))
 
 
@@ -0,0 +1,347 @@
+"""
+공유 메모리 프레임 링 버퍼 (Node/Python 프로듀서 → Python 비전 워커)
+
+- 파이프로 base64 텍스트를 보내는 대신 프레임 바이트를 고정 크기 슬롯에 기록하고
+  요청에는 {"slot": i, "seq": s} 만 실어 보냄 → 워커는 np.ndarray(buffer=...) 로 복사 없이 읽음
+- 슬롯 내용: raw 픽셀 (H,W,C uint8, BGR) 또는 인코딩된 바이트 (JPEG/PNG, c=0) — Node 는 보통 후자
+- 슬롯마다 seqlock: 쓰기 중에는 seq 홀수, 완료 후 짝수 (요청의 seq).
+  읽은 뒤 is_current() 로 그 사이 덮어쓰였는지 확인 → 덮어쓰였으면 결과 폐기 (stale)
+
+메모리 레이아웃 (little-endian, 모두 64B 정렬)
+  [0:64)            header  uint64[8]: magic, version, n_slots, slot_bytes, frames_written, 0, 0, 0
+  [64:64+32*n)      slot 표 (seq u64, nbytes u64, h u32, w u32, c u32, pad u32)
+  [data_off: ...)   슬롯 데이터 n_slots * slot_bytes
+
+Node 쪽 프로듀서는 같은 이름의 /dev/shm/<name> 을 mmap 해서 같은 순서로 쓰면 됨
+(데이터 → nbytes/h/w/c → seq 짝수 순).
+
+사용 예 (Node 없이 테스트)
+  python vision/src/shm_ring.py produce --name evci_frames --images vision/dataset/raw/images/left \\
+      | python vision/src/stream_infer.py --weights vision/weights/best.pt --stdin-loop --shm evci_frames
+  python vision/src/shm_ring.py bench
+"""
+
+import argparse
+import base64
+import glob
+import json
+import os
+import sys
+import time
+from multiprocessing import Process, Queue, shared_memory
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+MAGIC = 0x4556434952494E47   # "EVCIRING"
+VERSION = 1
+HEADER_BYTES = 64
+SLOT_DTYPE = np.dtype([("seq", "<u8"), ("nbytes", "<u8"), ("h", "<u4"), ("w", "<u4"), ("c", "<u4"), ("pad", "<u4")])
+DEFAULT_NAME = "evci_frames"
+
+
+class StaleFrame(Exception):
+    """요청한 seq 의 프레임이 이미 덮어쓰였거나 아직 쓰는 중"""
+
+
+def _align(n: int, a: int = 64) -> int:
+    return (n + a - 1) // a * a
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)   # Python >= 3.13
+    except TypeError:
+        pass
+    # Python < 3.13: attach 만 해도 resource_tracker 에 등록돼 종료 시 unlink 됨 → 등록을 건너뜀 (소유자만 unlink)
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda n, rtype: None if rtype == "shared_memory" else register(n, rtype)
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class FrameRing:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        buf = shm.buf
+        self.header = np.ndarray((8,), dtype="<u8", buffer=buf, offset=0)
+        if int(self.header[0]) != MAGIC or int(self.header[1]) != VERSION:
+            raise ValueError(f"not a frame ring (v{VERSION}): {shm.name}")
+        self.n_slots = int(self.header[2])
+        self.slot_bytes = int(self.header[3])
+        self.slots = np.ndarray((self.n_slots,), dtype=SLOT_DTYPE, buffer=buf, offset=HEADER_BYTES)
+        self.data_off = _align(HEADER_BYTES + SLOT_DTYPE.itemsize * self.n_slots)
+        self.data = np.ndarray((self.n_slots, self.slot_bytes), dtype=np.uint8, buffer=buf, offset=self.data_off)
+
+    # ------------------------------
+    # 생성 / 연결
+    # ------------------------------
+    @classmethod
+    def create(cls, name: str = DEFAULT_NAME, n_slots: int = 8, slot_bytes: int = 1920 * 1080 * 3) -> "FrameRing":
+        """프로듀서(소유자) 쪽: 같은 이름이 남아 있으면 지우고 새로 만듦"""
+        slot_bytes = _align(slot_bytes)
+        size = _align(HEADER_BYTES + SLOT_DTYPE.itemsize * n_slots) + n_slots * slot_bytes
+        try:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((8,), dtype="<u8", buffer=shm.buf, offset=0)
+        header[:] = 0
+        header[2], header[3] = n_slots, slot_bytes
+        header[1] = VERSION
+        np.ndarray((n_slots,), dtype=SLOT_DTYPE, buffer=shm.buf, offset=HEADER_BYTES)[:] = 0
+        header[0] = MAGIC   # 마지막에 기록 → attach 쪽이 반쯤 초기화된 링을 보지 않음
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str = DEFAULT_NAME, timeout: float = 5.0) -> "FrameRing":
+        """워커 쪽: 프로듀서가 링을 만들 때까지 최대 timeout 초 대기"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return cls(_attach(name), owner=False)
+            except (FileNotFoundError, ValueError):
+                # ValueError: 아직 초기화 중 (magic 미기록)
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
+
+    # ------------------------------
+    # 쓰기 (프로듀서)
+    # ------------------------------
+    def write(self, frame: Union[np.ndarray, bytes, bytearray, memoryview]) -> Tuple[int, int]:
+        """
+        다음 슬롯에 프레임 기록 → (slot, seq)
+        ndarray (H,W[,C]) uint8 이면 raw, bytes 류면 인코딩 바이트로 저장
+        """
+        if isinstance(frame, np.ndarray):
+            raw = np.ascontiguousarray(frame, dtype=np.uint8)
+            h, w = raw.shape[:2]
+            c = raw.shape[2] if raw.ndim == 3 else 1
+            payload = raw.reshape(-1)
+        else:
+            payload = np.frombuffer(frame, dtype=np.uint8)
+            h = w = c = 0
+        n = payload.size
+        if n > self.slot_bytes:
+            raise ValueError(f"frame {n} B > slot {self.slot_bytes} B")
+
+        count = int(self.header[4])
+        slot = count % self.n_slots
+        seq = 2 * (count + 1)                 # 프레임마다 고유한 짝수
+        entry = self.slots[slot:slot + 1]
+        entry["seq"] = seq - 1                # 쓰는 중 (홀수)
+        self.data[slot, :n] = payload
+        entry["nbytes"], entry["h"], entry["w"], entry["c"] = n, h, w, c
+        entry["seq"] = seq                    # 완료
+        self.header[4] = count + 1
+        return slot, seq
+
+    # ------------------------------
+    # 읽기 (워커)
+    # ------------------------------
+    def is_current(self, slot: int, seq: int) -> bool:
+        return int(self.slots["seq"][slot]) == int(seq)
+
+    def view(self, slot: int, seq: int) -> np.ndarray:
+        """
+        슬롯 내용을 복사 없이 반환: raw → (H,W,C) uint8, 인코딩 → (nbytes,) uint8
+        사용이 끝난 뒤 is_current(slot, seq) 로 다시 확인할 것
+        """
+        if not 0 <= slot < self.n_slots:
+            raise IndexError(f"slot {slot} out of range (n_slots={self.n_slots})")
+        if not self.is_current(slot, seq):
+            raise StaleFrame(f"slot {slot}: seq {int(self.slots['seq'][slot])} != {seq}")
+        e = self.slots[slot]
+        n, h, w, c = int(e["nbytes"]), int(e["h"]), int(e["w"]), int(e["c"])
+        flat = self.data[slot, :n]
+        if c == 0:
+            return flat
+        return flat.reshape((h, w, c)) if c > 1 else flat.reshape((h, w))
+
+    def read_copy(self, slot: int, seq: int) -> np.ndarray:
+        """복사본이 필요할 때 (다른 스레드로 넘기는 등) — 복사 후 seq 재확인"""
+        out = self.view(slot, seq).copy()
+        if not self.is_current(slot, seq):
+            raise StaleFrame(f"slot {slot} overwritten during read")
+        return out
+
+    # ------------------------------
+    def close(self):
+        # numpy 뷰가 살아 있으면 SharedMemory.close() 가 BufferError → 먼저 해제
+        self.header = self.slots = self.data = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ==============================
+# 참조 프로듀서 / 컨슈머 (Node 없이 테스트)
+# ==============================
+def _load_frames(images: Optional[str], n: int, size=(1280, 720), encode: bool = False):
+    """폴더 이미지 (없으면 합성 프레임) → raw ndarray 또는 JPEG bytes 리스트"""
+    import cv2
+    frames = []
+    if images:
+        paths = sorted(p for p in glob.glob(os.path.join(images, "*"))
+                       if p.lower().endswith((".png", ".jpg", ".jpeg", ".bmp")))[:n]
+        frames = [cv2.imread(p, cv2.IMREAD_COLOR) for p in paths]
+        frames = [f for f in frames if f is not None]
+    if not frames:
+        rng = np.random.default_rng(0)
+        base = cv2.GaussianBlur(rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8), (0, 0), 5)
+        frames = [np.roll(base, 4 * i, axis=1) for i in range(max(n, 1))]
+    if encode:
+        frames = [cv2.imencode(".jpg", f, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes() for f in frames]
+    return frames
+
+
+def produce(name: str, images: Optional[str], n_slots: int, fps: float, count: int, encode: bool):
+    """프레임을 링에 쓰고 stdout 에 {"slot","seq"} JSON 라인 출력 (stream_infer --shm 입력 형식)"""
+    frames = _load_frames(images, max(count, 1) if count else 100, encode=encode)
+    slot_bytes = max(f.nbytes if isinstance(f, np.ndarray) else len(f) for f in frames)
+    with FrameRing.create(name, n_slots, slot_bytes) as ring:
+        period = 1.0 / fps if fps > 0 else 0.0
+        i = 0
+        while not count or i < count:
+            t0 = time.perf_counter()
+            slot, seq = ring.write(frames[i % len(frames)])
+            sys.stdout.write(json.dumps({"slot": slot, "seq": seq}) + "\n")
+            sys.stdout.flush()
+            i += 1
+            if period:
+                time.sleep(max(0.0, period - (time.perf_counter() - t0)))
+        # 소비자가 마지막 프레임을 읽을 시간
+        time.sleep(1.0)
+
+
+def consume(name: str):
+    """stdin 의 {"slot","seq"} 라인마다 프레임을 zero-copy 로 읽어 간단한 통계 출력"""
+    ring = FrameRing.attach(name)
+    ok = stale = 0
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        req = json.loads(line)
+        try:
+            frame = ring.view(req["slot"], req["seq"])
+            mean = float(frame.mean())
+            if not ring.is_current(req["slot"], req["seq"]):
+                raise StaleFrame("overwritten")
+            ok += 1
+            print(json.dumps({"seq": req["seq"], "shape": list(frame.shape), "mean": round(mean, 2)}))
+        except StaleFrame:
+            stale += 1
+    sys.stderr.write(f"[shm_ring] consumed {ok}, stale {stale}\n")
+    ring.close()
+
+
+def _bench_consumer(name: str, q: Queue, done: Queue):
+    ring = FrameRing.attach(name)
+    ok = stale = 0
+    checksum = 0
+    while True:
+        req = q.get()
+        if req is None:
+            break
+        try:
+            frame = ring.view(*req)
+            checksum += int(frame.reshape(-1)[::97].sum())      # 실제 워커 대신 가벼운 접근
+            ok += ring.is_current(*req)
+        except StaleFrame:
+            stale += 1
+    ring.close()
+    done.put((ok, stale, checksum))
+
+
+def _bench_b64_consumer(q: Queue, done: Queue):
+    ok = 0
+    checksum = 0
+    while True:
+        line = q.get()
+        if line is None:
+            break
+        frame = np.frombuffer(base64.b64decode(json.loads(line)["image"]), np.uint8)
+        checksum += int(frame.reshape(-1)[::97].sum())
+        ok += 1
+    done.put((ok, 0, checksum))
+
+
+def bench(n_frames: int = 300, n_slots: int = 8, size=(1280, 720)):
+    """같은 raw 프레임을 base64 JSON 라인 vs 공유 메모리 슬롯으로 다른 프로세스에 전달 (전송 비용만)"""
+    frames = _load_frames(None, 4, size)
+    nbytes = frames[0].nbytes
+
+    q, done = Queue(maxsize=n_slots // 2), Queue()
+    p = Process(target=_bench_b64_consumer, args=(q, done))
+    p.start()
+    t0 = time.perf_counter()
+    for i in range(n_frames):
+        q.put(json.dumps({"image": base64.b64encode(frames[i % 4].tobytes()).decode("ascii")}))
+    q.put(None)
+    res_b64 = done.get()
+    t_b64 = time.perf_counter() - t0
+    p.join()
+
+    name = f"{DEFAULT_NAME}_bench_{os.getpid()}"
+    with FrameRing.create(name, n_slots, nbytes) as ring:
+        # 큐 깊이 < 슬롯 수 → 정상 속도에서는 덮어쓰기 없음
+        q, done = Queue(maxsize=n_slots // 2), Queue()
+        p = Process(target=_bench_consumer, args=(name, q, done))
+        p.start()
+        t0 = time.perf_counter()
+        for i in range(n_frames):
+            q.put(ring.write(frames[i % 4]))
+        q.put(None)
+        res_shm = done.get()
+        t_shm = time.perf_counter() - t0
+        p.join()
+
+    mb = nbytes / 1e6
+    print(f"[shm_ring] {n_frames} frames {size[0]}x{size[1]} ({mb:.1f} MB raw)")
+    print(f"  base64+json pipe : {t_b64 / n_frames * 1e3:7.2f} ms/frame  (ok={res_b64[0]})")
+    print(f"  shared memory    : {t_shm / n_frames * 1e3:7.2f} ms/frame  (ok={res_shm[0]}, stale={res_shm[1]})")
+    print(f"  checksum match   : {res_b64[2] == res_shm[2]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared-memory frame ring (reference producer / consumer)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_prod = sub.add_parser("produce", help="프레임을 링에 쓰고 {slot,seq} 라인 출력")
+    p_prod.add_argument("--name", default=DEFAULT_NAME)
+    p_prod.add_argument("--images", default=None, help="이미지 폴더 (없으면 합성 프레임)")
+    p_prod.add_argument("--slots", type=int, default=8)
+    p_prod.add_argument("--fps", type=float, default=15.0, help="0 이면 최대 속도")
+    p_prod.add_argument("--count", type=int, default=0, help="0 이면 무한 반복")
+    p_prod.add_argument("--encode", action="store_true", help="raw 대신 JPEG 바이트로 저장 (Node 경로와 동일)")
+    p_cons = sub.add_parser("consume", help="stdin {slot,seq} 라인을 읽어 프레임 통계 출력")
+    p_cons.add_argument("--name", default=DEFAULT_NAME)
+    p_bench = sub.add_parser("bench", help="base64 파이프 vs 공유 메모리 전송 비교")
+    p_bench.add_argument("--frames", type=int, default=300)
+    p_bench.add_argument("--slots", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.cmd == "produce":
+        produce(args.name, args.images, args.slots, args.fps, args.count, args.encode)
+    elif args.cmd == "consume":
+        consume(args.name)
+    else:
+        bench(args.frames, args.slots)
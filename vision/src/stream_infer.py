@@ -5,6 +5,10 @@ import base64
 import cv2
 import numpy as np
 
+from letterbox import get_front_end
+from adaptive_imgsz import ResolutionController
+from shm_ring import FrameRing, StaleFrame
+
 try:
     from ultralytics import YOLO
 except Exception as e:  # pragma: no cover
@@ -20,34 +24,178 @@ def decode_base64_to_image(b64str: str):
     return img
 
 
-def run_detection(model_or_path, left_path=None, left_b64=None):
-    model = model_or_path if isinstance(model_or_path, YOLO) else YOLO(model_or_path)
-    if left_b64:
-        img = decode_base64_to_image(left_b64)
-        res = model(img, imgsz=640, conf=0.25, verbose=False)[0]
-    else:
-        res = model(left_path, imgsz=640, conf=0.25, verbose=False)[0]
-    boxes = []
-    for b in res.boxes:
-        xyxy = b.xyxy[0].tolist()
-        boxes.append(
-            {
-                "x1": xyxy[0],
-                "y1": xyxy[1],
-                "x2": xyxy[2],
-                "y2": xyxy[3],
-                "conf": float(b.conf.item()) if hasattr(b.conf, "item") else float(b.conf),
-                "cls": int(b.cls.item()) if hasattr(b.cls, "item") else int(b.cls),
-            }
-        )
+# ==============================
+# 축소 디코드 (libjpeg DCT 스케일링)
+# ==============================
+_REDUCED_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def jpeg_size(buf: bytes):
+    """JPEG 헤더(SOF)에서 (w, h) — JPEG 아니거나 못 찾으면 None (디코드 없이)"""
+    if buf[:2] != b"\xff\xd8":
+        return None
+    i, n = 2, len(buf)
+    while i + 9 <= n:
+        if buf[i] != 0xFF:
+            i += 1
+            continue
+        marker = buf[i + 1]
+        if marker == 0xFF or marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            i += 1 if marker == 0xFF else 2   # fill byte / 길이 없는 마커
+            continue
+        if marker in _SOF_MARKERS:
+            h = int.from_bytes(buf[i + 5:i + 7], "big")
+            w = int.from_bytes(buf[i + 7:i + 9], "big")
+            return w, h
+        i += 2 + int.from_bytes(buf[i + 2:i + 4], "big")
+    return None
+
+
+def reduced_flag(frame_wh, imgsz):
+    """긴 변 / factor 가 imgsz 이상인 가장 큰 factor (8/4/2) → (factor, imread flag)"""
+    long_side = max(frame_wh)
+    for factor, flag in _REDUCED_FLAGS:
+        if long_side // factor >= imgsz:
+            return factor, flag
+    return 1, cv2.IMREAD_COLOR
+
+
+def decode_frame(buf: bytes, imgsz=None):
+    """
+    인코딩된 프레임 → (BGR 이미지, 원본 (w, h))
+    imgsz 가 주어지고 JPEG 이면 모델 입력을 덮는 가장 작은 크기로 축소 디코드
+    (PNG 등은 축소 플래그가 전체 디코드 후 리사이즈라 이득이 없어 그대로 디코드)
+    """
+    arr = np.frombuffer(buf, np.uint8)
+    size = jpeg_size(buf) if imgsz else None
+    flag = reduced_flag(size, imgsz)[1] if size else cv2.IMREAD_COLOR
+    img = cv2.imdecode(arr, flag)
+    if img is None:
+        raise ValueError("Failed to decode image")
+    return img, (size or (img.shape[1], img.shape[0]))
+
+
+def detect(model, img, imgsz=640, orig_wh=None):
+    """
+    BGR 프레임 → (xyxy (N,4) 원본 px, conf (N,), cls (N,), names)
+    orig_wh: img 가 축소 디코드된 경우 원본 프레임 크기 → 박스를 원본 px 로 되돌림
+    """
+    h, w = img.shape[:2]
+    # 해상도별로 캐시된 letterbox → 재사용 텐서를 바로 전달 (ultralytics 내부 letterbox/할당 생략)
+    front = get_front_end((w, h), imgsz, device=str(model.device))
+    res = model(front(img), imgsz=imgsz, conf=0.25, verbose=False)[0]
+
+    xyxy = front.map_boxes(res.boxes.xyxy.cpu().numpy())
+    if orig_wh is not None and tuple(orig_wh) != (w, h):
+        xyxy *= np.array([orig_wh[0] / w, orig_wh[1] / h] * 2, dtype=np.float32)
+    confs = res.boxes.conf.cpu().numpy().astype(np.float32)
+    clss = res.boxes.cls.cpu().numpy().astype(np.float32)
+    return xyxy, confs, clss, res.names
+
+
+def legacy_result(xyxy, confs, clss, names, w, h, imgsz):
+    """기존 응답 스키마 (박스 dict 리스트 + names 매 프레임 포함)"""
+    boxes = [
+        {
+            "x1": float(b[0]),
+            "y1": float(b[1]),
+            "x2": float(b[2]),
+            "y2": float(b[3]),
+            "conf": float(c),
+            "cls": int(k),
+        }
+        for b, c, k in zip(xyxy, confs, clss)
+    ]
     return {
         "boxes": boxes,
-        "imgW": int(res.orig_shape[1]),
-        "imgH": int(res.orig_shape[0]),
-        "names": res.names,
+        "imgW": int(w),
+        "imgH": int(h),
+        "names": names,
+        "imgsz": int(imgsz),
     }
 
 
+def run_detection(model_or_path, left_path=None, left_b64=None, imgsz=640):
+    model = model_or_path if isinstance(model_or_path, YOLO) else YOLO(model_or_path)
+    if left_b64:
+        buf = base64.b64decode(left_b64)
+    else:
+        with open(left_path, "rb") as f:
+            buf = f.read()
+    img, (w, h) = decode_frame(buf, imgsz)
+    xyxy, confs, clss, names = detect(model, img, imgsz, (w, h))
+    return legacy_result(xyxy, confs, clss, names, w, h, imgsz)
+
+
+# ==============================
+# Compact 응답 스키마 (v1)
+# ==============================
+# 시작 시 1회: {"v":1,"type":"meta","names":{...},"fields":[...],"fmt":"rows"|"f32"}
+# 프레임마다: {"v":1,"b":[[x1,y1,x2,y2,conf,cls],...] 또는 "<float32 LE base64>","s":imgsz}
+#            + 프레임 크기가 바뀐 경우에만 "wh":[w,h]
+SCHEMA_VERSION = 1
+BOX_FIELDS = ["x1", "y1", "x2", "y2", "conf", "cls"]
+
+
+def meta_message(names, box_format="rows"):
+    return {"v": SCHEMA_VERSION, "type": "meta", "names": names, "fields": BOX_FIELDS, "fmt": box_format}
+
+
+def pack_boxes(xyxy, confs, clss, box_format="rows"):
+    """(N,6) [x1,y1,x2,y2,conf,cls] → rows: 좌표 0.1px / conf 1e-3 반올림 리스트, f32: float32 LE base64"""
+    table = np.empty((len(confs), 6), dtype=np.float32)
+    table[:, :4] = xyxy
+    table[:, 4] = confs
+    table[:, 5] = clss
+    if box_format == "f32":
+        return base64.b64encode(table.astype("<f4").tobytes()).decode("ascii")
+    # float64 에서 반올림해야 직렬화 시 0.9120000004... 같은 꼬리가 안 붙음
+    rows = table.astype(np.float64)
+    rows[:, :4] = np.round(rows[:, :4], 1)
+    rows[:, 4] = np.round(rows[:, 4], 3)
+    return [[*row[:5], int(row[5])] for row in rows.tolist()]
+
+
+def compact_result(xyxy, confs, clss, imgsz, wh=None, box_format="rows"):
+    out = {"v": SCHEMA_VERSION, "b": pack_boxes(xyxy, confs, clss, box_format), "s": int(imgsz)}
+    if wh is not None:
+        out["wh"] = [int(wh[0]), int(wh[1])]
+    return out
+
+
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        # numpy 스칼라/배열도 직렬화
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def write_line(obj):
+    sys.stdout.buffer.write(_dumps(obj) + b"\n")
+    sys.stdout.flush()
+
+
+def error_message(err: str, exc: Exception, legacy: bool) -> dict:
+    # legacy 소비자는 v1 스키마를 모르므로 기존 {"error": ...} 형식으로
+    if legacy:
+        return {"error": err, "detail": str(exc)}
+    return {"v": SCHEMA_VERSION, "err": err, "detail": str(exc)}
+
+
+def _slot_overwritten(ring, payload) -> bool:
+    if ring is None or not isinstance(payload, dict) or "slot" not in payload:
+        return False
+    try:
+        return not ring.is_current(payload["slot"], payload["seq"])
+    except Exception:
+        return False
+
+
 def main():
     parser = argparse.ArgumentParser(description="Stereo frame YOLO inference (left only)")
     parser.add_argument("--left", help="Left image path")
@@ -55,27 +203,70 @@ def main():
     parser.add_argument("--out", help="Output dir (unused)", default=None)
     parser.add_argument("--stdin-b64", action="store_true", help="Read left image base64 from stdin")
     parser.add_argument("--stdin-loop", action="store_true", help="Keep process alive and read JSON lines {\"image\":b64}")
+    parser.add_argument("--imgsz", type=int, default=640, help="Fixed imgsz (또는 adaptive 시작값)")
+    parser.add_argument("--adaptive-imgsz", action="store_true",
+                        help="(stdin-loop) 직전 bbox 크기/신뢰도 또는 payload pose_z 로 프레임마다 imgsz 선택")
+    parser.add_argument("--imgsz-levels", type=int, nargs="+", default=[320, 480, 640, 960])
+    parser.add_argument("--legacy-schema", action="store_true",
+                        help="(stdin-loop) 기존 응답 형식 (박스 dict + names 매 프레임)")
+    parser.add_argument("--box-format", choices=["rows", "f32"], default="rows",
+                        help="(compact) rows: [[x1,y1,x2,y2,conf,cls],...] / f32: float32 LE base64")
+    parser.add_argument("--shm", default=None,
+                        help="(stdin-loop) 공유 메모리 프레임 링 이름 — 입력 {\"slot\":i,\"seq\":s} 를 복사 없이 읽음")
+    parser.add_argument("--full-decode", action="store_true",
+                        help="(stdin-loop) JPEG 축소 디코드 끄기 (항상 원본 해상도로 디코드)")
     args = parser.parse_args()
 
     if args.stdin_loop:
         model = YOLO(args.weights)
+        ctrl = ResolutionController(args.imgsz_levels, start=args.imgsz) if args.adaptive_imgsz else None
+        if not args.legacy_schema:
+            write_line(meta_message(model.names, args.box_format))   # 클래스 이름은 시작 시 1회
+        ring = FrameRing.attach(args.shm) if args.shm else None
+        last_wh = None
         for line in sys.stdin:
             line = line.strip()
             if not line:
                 continue
+            payload = None
             try:
                 payload = json.loads(line)
-                b64 = payload.get("image") or ""
-                result = run_detection(model, left_b64=b64)
-                sys.stdout.write(json.dumps(result) + "\n")
-                sys.stdout.flush()
+                imgsz = ctrl.current if ctrl else args.imgsz
+                if ring is not None and "slot" in payload:
+                    # 공유 메모리 슬롯: raw 프레임은 그대로, 인코딩 바이트는 슬롯 위에서 바로 디코드
+                    frame = ring.view(payload["slot"], payload["seq"])
+                    if frame.ndim == 3:
+                        img, (w, h) = frame, (frame.shape[1], frame.shape[0])
+                    else:
+                        img, (w, h) = decode_frame(memoryview(frame), None if args.full_decode else imgsz)
+                else:
+                    buf = base64.b64decode(payload.get("image") or "")
+                    img, (w, h) = decode_frame(buf, None if args.full_decode else imgsz)
+                xyxy, confs, clss, names = detect(model, img, imgsz, (w, h))
+                if ring is not None and "slot" in payload and not ring.is_current(payload["slot"], payload["seq"]):
+                    raise StaleFrame(f"slot {payload['slot']} overwritten during inference")
+                if ctrl:
+                    # 다음 프레임 imgsz: 이번 박스 (없으면 호출자가 보낸 마지막 pose z) 기준
+                    ctrl.update(xyxy, confs, (w, h), payload.get("pose_z"))
+                if args.legacy_schema:
+                    write_line(legacy_result(xyxy, confs, clss, names, w, h, imgsz))
+                else:
+                    wh = None if last_wh == (w, h) else (w, h)   # 프레임 크기는 바뀔 때만
+                    last_wh = (w, h)
+                    write_line(compact_result(xyxy, confs, clss, imgsz, wh, args.box_format))
+            except StaleFrame as e:
+                # 요청마다 응답 한 줄 유지 (Node 큐 순서)
+                write_line(error_message("stale_frame", e, args.legacy_schema))
             except Exception as e:  # pragma: no cover
                 sys.stderr.write(f"[stream_infer] loop error: {e}\n")
                 sys.stderr.flush()
+                # 디코드/reshape 실패도 응답 한 줄 — 덮어써진 슬롯이 원인이면 stale_frame 으로 구분
+                err = "stale_frame" if _slot_overwritten(ring, payload) else "loop_error"
+                write_line(error_message(err, e, args.legacy_schema))
         return
 
     left_b64 = sys.stdin.read().strip() if args.stdin_b64 else None
-    result = run_detection(args.weights, left_path=args.left, left_b64=left_b64)
+    result = run_detection(args.weights, left_path=args.left, left_b64=left_b64, imgsz=args.imgsz)
     sys.stdout.write(json.dumps(result))
 
 
@@ -0,0 +1,343 @@
+# batch_ellipse_pnp.py
+# - 녹화 데이터셋(vision/dataset/raw/images/left|right) 전체에 대해
+#   bbox → 8핀 타원 피팅(EllipseFitterModule.fit_pins) → solvePnP 를 오프라인 일괄 실행
+# - ProcessPoolExecutor + 청크 단위 스케줄링, 청크별 결과 파일로 중단 후 재시작(resume) 지원
+# - 최종 결과는 컬럼형 NPZ (pyarrow가 있으면 Parquet도) 로 저장
+# - GT: 파일명(TCP→Socket pose) + labels.csv(카메라/소켓 월드 pose)가 있으면 카메라 기준 GT와 비교
+#
+# 사용 예:
+#   python vision/src/utils/batch_ellipse_pnp.py \
+#       --images-root vision/dataset/raw/images --labels vision/dataset/raw/labels.csv \
+#       --boxes-dir vision/dataset/raw/bbox --out vision/result/batch_pnp --workers 8
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from dataset_naming import parse_capture_filename, read_labels_csv
+from ellipse_run_v2 import (
+    PIN_ORDER, BoxItem, EllipseFitterModule, load_bbox_json,
+    collect_img_points, solve_pnp, to_objpts_from_json,
+)
+from pose_utils import relative_pose_from_components_batch, quat_to_matrix_batch
+
+
+SIDES = ("left", "right")
+
+# Three.js 카메라(-Z 전방, +Y 위) → OpenCV 카메라(+Z 전방, +Y 아래)
+GL_TO_CV = np.diag([1.0, -1.0, -1.0])
+
+
+# ==============================
+# Dataset listing / GT
+# ==============================
+def list_stereo_pairs(images_root: str) -> List[Tuple[str, str]]:
+    """left/ 의 l_*.png 와 같은 이름의 right/ r_*.png 쌍 목록 (이름순)"""
+    left_dir = os.path.join(images_root, "left")
+    right_dir = os.path.join(images_root, "right")
+    pairs = []
+    for name in sorted(os.listdir(left_dir)):
+        if not name.startswith("l_") or not name.lower().endswith(".png"):
+            continue
+        right_path = os.path.join(right_dir, "r_" + name[2:])
+        if os.path.isfile(right_path):
+            pairs.append((os.path.join(left_dir, name), right_path))
+    return pairs
+
+_GT_KEYS = ["cam_tx", "cam_ty", "cam_tz", "cam_qx", "cam_qy", "cam_qz", "cam_qw",
+            "socket_w_tx", "socket_w_ty", "socket_w_tz",
+            "socket_w_qx", "socket_w_qy", "socket_w_qz", "socket_w_qw"]
+
+def camera_gt_table(labels: Dict[Tuple[str, str], Dict[str, float]]) -> Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]]:
+    """
+    labels.csv 전체 행의 cam_* / socket_w_* 로 카메라(OpenCV 축) 기준 소켓 pose 를 배치로 한 번에 계산.
+    필요한 컬럼이 없는 행(구버전 CSV)은 제외.
+    """
+    keys = list(labels)
+    if not keys:
+        return {}
+    vals = np.array([[labels[k].get(c, np.nan) for c in _GT_KEYS] for k in keys], dtype=np.float64)
+    ok = np.all(np.isfinite(vals), axis=1)
+    v = vals[ok]
+    pos, quat = relative_pose_from_components_batch(v[:, 0:3], v[:, 3:7], v[:, 7:10], v[:, 10:14])
+    pos = pos @ GL_TO_CV.T
+    R = np.einsum("ij,njk->nik", GL_TO_CV, quat_to_matrix_batch(quat))
+    ok_keys = [k for k, good in zip(keys, ok) if good]
+    return {k: (pos[i], R[i]) for i, k in enumerate(ok_keys)}
+
+
+# ==============================
+# Worker (프로세스별 1회 초기화)
+# ==============================
+_WORKER: Dict[str, Any] = {}
+
+def _load_intrinsics(calib_path: str):
+    fs = cv2.FileStorage(calib_path, cv2.FILE_STORAGE_READ)
+    calib = {
+        "left": (fs.getNode("K1").mat().astype(np.float64), fs.getNode("D1").mat().astype(np.float64)),
+        "right": (fs.getNode("K2").mat().astype(np.float64), fs.getNode("D2").mat().astype(np.float64)),
+    }
+    fs.release()
+    return calib
+
+def _init_worker(calib_path: str, objpoints_json: Optional[str], boxes_dir: Optional[str],
+                 weights: Optional[str], labels_path: Optional[str], margin_px: int, method: str):
+    cv2.setNumThreads(1)  # 프로세스 단위 병렬이므로 OpenCV 내부 스레드는 끔
+    _WORKER["fitter"] = EllipseFitterModule(margin_px=margin_px)
+    _WORKER["calib"] = _load_intrinsics(calib_path)
+    _WORKER["obj_pts"] = to_objpts_from_json(objpoints_json)
+    _WORKER["boxes_dir"] = boxes_dir
+    _WORKER["method"] = method
+    labels = read_labels_csv(labels_path) if labels_path and os.path.isfile(labels_path) else {}
+    _WORKER["gt"] = camera_gt_table(labels)
+    _WORKER["model"] = None
+    if weights:
+        from ultralytics import YOLO  # 선택 의존성: bbox JSON이 없을 때만 필요
+        _WORKER["model"] = YOLO(weights)
+
+def _detect_boxes(img, img_path: str) -> List[BoxItem]:
+    boxes_dir = _WORKER["boxes_dir"]
+    if boxes_dir:
+        stem = os.path.basename(img_path).split(".")[0]
+        bbox_json = os.path.join(boxes_dir, f"{stem}_bbox.json")
+        return load_bbox_json(bbox_json) if os.path.isfile(bbox_json) else []
+    model = _WORKER["model"]
+    if model is None:
+        return []
+    res = model(img, verbose=False)[0]
+    return [
+        BoxItem(bbox=b.tolist(), confidence=float(s), cls=int(c))
+        for b, s, c in zip(res.boxes.xyxy.cpu().numpy(),
+                           res.boxes.conf.cpu().numpy(),
+                           res.boxes.cls.cpu().numpy())
+    ]
+
+def _process_image(img_path: str, side: str) -> Dict[str, Any]:
+    out = {
+        "pins": np.full((len(PIN_ORDER), 2), np.nan, dtype=np.float32),
+        "rvec": np.full(3, np.nan), "tvec": np.full(3, np.nan),
+        "reproj": np.nan, "ok": False,
+    }
+    img = cv2.imread(img_path, cv2.IMREAD_COLOR)
+    if img is None:
+        return out
+    pins = _WORKER["fitter"].fit_pins(img, _detect_boxes(img, img_path))
+    for i, name in enumerate(PIN_ORDER):
+        if name in pins:
+            out["pins"][i] = (pins[name]["cx"], pins[name]["cy"])
+
+    img_pts = collect_img_points(pins)
+    if img_pts is None:
+        return out
+    K, D = _WORKER["calib"][side]
+    pose = solve_pnp(img_pts, _WORKER["obj_pts"], K, D, method=_WORKER["method"])
+    if pose is None:
+        return out
+    out.update(rvec=np.array(pose["rvec"]), tvec=np.array(pose["tvec"]),
+               reproj=pose["reprojection_error_px"], ok=True)
+    return out
+
+def _process_chunk(chunk_path: str, pairs: List[Tuple[str, str]]) -> str:
+    n = len(pairs)
+    cols: Dict[str, np.ndarray] = {
+        "name": np.array([os.path.basename(l)[2:] for l, _ in pairs]),
+        "gt_tcp_pos": np.full((n, 3), np.nan), "gt_tcp_quat": np.full((n, 4), np.nan),
+        "gt_dist": np.full(n, np.nan), "visible": np.full(n, np.nan),
+    }
+    for side in SIDES:
+        cols[f"pins_{side}"] = np.full((n, len(PIN_ORDER), 2), np.nan, dtype=np.float32)
+        cols[f"rvec_{side}"] = np.full((n, 3), np.nan)
+        cols[f"tvec_{side}"] = np.full((n, 3), np.nan)
+        cols[f"reproj_{side}"] = np.full(n, np.nan)
+        cols[f"ok_{side}"] = np.zeros(n, dtype=bool)
+        cols[f"gt_cam_pos_{side}"] = np.full((n, 3), np.nan)
+        cols[f"pos_err_{side}"] = np.full(n, np.nan)
+        cols[f"rot_err_deg_{side}"] = np.full(n, np.nan)
+
+    for i, (left_path, right_path) in enumerate(pairs):
+        meta = parse_capture_filename(left_path)
+        cols["gt_tcp_pos"][i] = meta["pos"]
+        cols["gt_tcp_quat"][i] = meta["quat"]
+        cols["gt_dist"][i] = meta["dist"]
+        cols["visible"][i] = meta["visible"]
+
+        for side, path in zip(SIDES, (left_path, right_path)):
+            r = _process_image(path, side)
+            cols[f"pins_{side}"][i] = r["pins"]
+            cols[f"rvec_{side}"][i] = r["rvec"]
+            cols[f"tvec_{side}"][i] = r["tvec"]
+            cols[f"reproj_{side}"][i] = r["reproj"]
+            cols[f"ok_{side}"][i] = r["ok"]
+
+            gt = _WORKER["gt"].get((meta["timestamp"], side[0]))
+            if gt is None:
+                continue
+            gt_pos, gt_R = gt
+            cols[f"gt_cam_pos_{side}"][i] = gt_pos
+            if r["ok"]:
+                cols[f"pos_err_{side}"][i] = np.linalg.norm(r["tvec"] - gt_pos)
+                R_est, _ = cv2.Rodrigues(r["rvec"])
+                cos = np.clip((np.trace(gt_R.T @ R_est) - 1.0) / 2.0, -1.0, 1.0)
+                cols[f"rot_err_deg_{side}"][i] = np.degrees(np.arccos(cos))
+
+    # 원자적 저장: 중간에 죽어도 반쯤 쓰인 청크가 남지 않도록
+    tmp_path = chunk_path + ".tmp.npz"
+    np.savez(tmp_path, **cols)
+    os.replace(tmp_path, chunk_path)
+    return chunk_path
+
+
+# ==============================
+# Merge / export
+# ==============================
+def merge_chunks(chunk_paths: List[str], out_path: str) -> Dict[str, np.ndarray]:
+    merged: Dict[str, List[np.ndarray]] = {}
+    for p in chunk_paths:
+        with np.load(p) as data:
+            for k in data.files:
+                merged.setdefault(k, []).append(data[k])
+    cols = {k: np.concatenate(v) for k, v in merged.items()}
+    np.savez(out_path, **cols)
+    return cols
+
+def write_parquet(cols: Dict[str, np.ndarray], out_path: str) -> bool:
+    """pyarrow가 있을 때만 Parquet 저장 (다차원 컬럼은 name_0, name_1 ... 로 펼침)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return False
+    flat = {}
+    for k, v in cols.items():
+        if v.ndim == 1:
+            flat[k] = v
+        else:
+            v2 = v.reshape(len(v), -1)
+            for j in range(v2.shape[1]):
+                flat[f"{k}_{j}"] = v2[:, j]
+    pq.write_table(pa.table(flat), out_path)
+    return True
+
+
+# ==============================
+# Runner
+# ==============================
+def run_batch(pairs: List[Tuple[str, str]],
+              out_dir: str,
+              init_args: Tuple,
+              workers: int = os.cpu_count() or 1,
+              chunk_size: int = 256) -> List[str]:
+    """
+    pairs를 chunk_size 단위로 나눠 프로세스 풀에서 처리.
+    이미 존재하는 청크 파일은 건너뛴다(resume). 진행 중 청크는 workers*2개로 제한.
+    """
+    chunk_dir = os.path.join(out_dir, "chunks")
+    os.makedirs(chunk_dir, exist_ok=True)
+
+    chunks = [(os.path.join(chunk_dir, f"chunk_{i // chunk_size:06d}.npz"), pairs[i:i + chunk_size])
+              for i in range(0, len(pairs), chunk_size)]
+    todo = [(p, c) for p, c in chunks if not os.path.isfile(p)]
+    print(f"[batch] {len(pairs)} pairs, {len(chunks)} chunks ({len(chunks) - len(todo)} done, {len(todo)} todo)")
+
+    t0 = time.time()
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as ex:
+        pending = set()
+        it = iter(todo)
+        while True:
+            while len(pending) < workers * 2:
+                nxt = next(it, None)
+                if nxt is None:
+                    break
+                pending.add(ex.submit(_process_chunk, *nxt))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in finished:
+                f.result()
+                done += 1
+                rate = done / max(time.time() - t0, 1e-6)
+                print(f"[batch] chunk {done}/{len(todo)} ({rate:.2f} chunks/s)")
+
+    return [p for p, _ in chunks]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline batch ellipse + PnP over a stereo dataset")
+    parser.add_argument("--images-root", default="vision/dataset/raw/images", help="left/ right/ 를 가진 폴더")
+    parser.add_argument("--labels", default="vision/dataset/raw/labels.csv", help="labels.csv (카메라 기준 GT 비교용)")
+    parser.add_argument("--boxes-dir", default=None, help="<stem>_bbox.json 폴더 (yolo_run.py 출력 형식)")
+    parser.add_argument("--weights", default=None, help="bbox JSON 대신 워커에서 YOLO 실행 (ultralytics 필요)")
+    parser.add_argument("--calib", default="vision/config/stereo_calib.yaml")
+    parser.add_argument("--objpoints", default="vision/config/ccs_type1_reference.json")
+    parser.add_argument("--method", default="IPPE", help="IPPE | ITERATIVE | AP3P")
+    parser.add_argument("--margin", type=int, default=5)
+    parser.add_argument("--out", default="vision/result/batch_pnp")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--limit", type=int, default=None, help="앞에서부터 N쌍만 처리")
+    args = parser.parse_args()
+
+    if not args.boxes_dir and not args.weights:
+        sys.stderr.write("[batch] --boxes-dir 또는 --weights 중 하나가 필요합니다\n")
+        sys.exit(1)
+
+    pairs = list_stereo_pairs(args.images_root)
+    if args.limit:
+        pairs = pairs[:args.limit]
+
+    # 청크 구성이나 청크 내용을 바꾸는 설정이 바뀌면 resume 결과가 섞이므로 실행 설정을 기록/검증
+    os.makedirs(args.out, exist_ok=True)
+    manifest_path = os.path.join(args.out, "manifest.json")
+
+    def _abs(path):
+        return os.path.abspath(path) if path else None
+
+    manifest = {"n_pairs": len(pairs), "chunk_size": args.chunk_size,
+                "first": os.path.basename(pairs[0][0]) if pairs else None,
+                "images_root": _abs(args.images_root), "boxes_dir": _abs(args.boxes_dir),
+                "weights": _abs(args.weights), "calib": _abs(args.calib), "objpoints": _abs(args.objpoints),
+                "labels": _abs(args.labels), "method": args.method, "margin": args.margin}
+    if os.path.isfile(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            if json.load(f) != manifest:
+                for p in glob.glob(os.path.join(args.out, "chunks", "chunk_*.npz")):
+                    os.remove(p)
+                print("[batch] 설정이 바뀌어 기존 청크를 삭제하고 처음부터 실행합니다")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    init_args = (args.calib, args.objpoints, args.boxes_dir, args.weights,
+                 args.labels, args.margin, args.method)
+    chunk_paths = run_batch(pairs, args.out, init_args, args.workers, args.chunk_size)
+    if not chunk_paths:
+        print("[batch] 처리할 이미지가 없습니다")
+        return
+
+    cols = merge_chunks(chunk_paths, os.path.join(args.out, "results.npz"))
+    if write_parquet(cols, os.path.join(args.out, "results.parquet")):
+        print(f"[batch] ✅ parquet: {os.path.join(args.out, 'results.parquet')}")
+    print(f"[batch] ✅ npz: {os.path.join(args.out, 'results.npz')}")
+
+    for side in SIDES:
+        ok = cols[f"ok_{side}"]
+        err = cols[f"pos_err_{side}"][ok]
+        err = err[np.isfinite(err)]
+        msg = f"[batch] {side}: PnP ok {ok.sum()}/{len(ok)}"
+        if ok.any():
+            msg += f", reproj median {np.median(cols[f'reproj_{side}'][ok]):.2f}px"
+        if len(err):
+            msg += f", pos err median {np.median(err) * 100:.2f}cm"
+        print(msg)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+# dataset_index.py
+# - 포즈 데이터셋(파일명 GT + labels.csv)을 한 번만 스캔해 컬럼형 인덱스로 저장
+#   * 파일명 숫자 필드(m/d 인코딩)는 np.char 로 한 번에 디코드
+#   * labels.csv 는 (id, side) 키로 조인 → (N, 37) float64 행렬 (없는 값 NaN)
+#   * 컬럼별 비압축 .npy + meta.json → DatasetIndex 가 np.load(mmap_mode='r') 로 즉시 로드
+# - 증분 갱신: 기존 인덱스에 없는 파일만 파싱해서 추가 (사라진 파일은 제거),
+#   labels.csv 가 바뀌었으면 라벨 조인만 다시 수행
+#
+# 사용 예:
+#   python vision/src/utils/dataset_index.py --images-root vision/dataset/raw/images \
+#       --labels vision/dataset/raw/labels.csv --out vision/dataset/index
+
+import argparse
+import csv
+import json
+import os
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from dataset_naming import LABEL_COLUMNS
+
+
+INDEX_VERSION = 1
+IMAGE_EXTS = (".png", ".jpg", ".jpeg")
+LABEL_FIELDS = LABEL_COLUMNS[2:]          # id, side 제외한 숫자 컬럼 (37)
+_NUM_FIELDS = ("tx", "ty", "tz", "qx", "qy", "qz", "qw", "dist", "visible")
+
+
+# ==============================
+# Scan / decode
+# ==============================
+def scan_images(images_root: str) -> List[str]:
+    """images_root 아래 모든 이미지 상대 경로 (정렬)"""
+    out = []
+    stack = [images_root]
+    while stack:
+        d = stack.pop()
+        with os.scandir(d) as it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path)
+                elif e.name.lower().endswith(IMAGE_EXTS):
+                    out.append(os.path.relpath(e.path, images_root))
+    out.sort()
+    return out
+
+def decode_filenames(rel_paths: List[str]) -> Dict[str, np.ndarray]:
+    """
+    캡처 파일명 {side}_{ts}_{x}_{y}_{z}_{qx}_{qy}_{qz}_{qw}_{dist}_{vis} 일괄 디코드.
+    ts 에 '_' 가 들어갈 수 있어 숫자 9개는 뒤에서부터 자른다. 형식이 다른 파일은 ok=False.
+    """
+    n = len(rel_paths)
+    side = np.full(n, "", dtype="U8")
+    ts = np.full(n, "", dtype="U32")
+    tokens = np.full((n, len(_NUM_FIELDS)), "nan", dtype="U16")
+    ok = np.zeros(n, dtype=bool)
+    for i, p in enumerate(rel_paths):
+        parts = os.path.basename(p).rsplit(".", 1)[0].split("_")
+        if len(parts) < 11:
+            continue
+        side[i] = parts[0]
+        ts[i] = "_".join(parts[1:-9])
+        tokens[i] = parts[-9:]
+        ok[i] = True
+
+    # 'm' → '-', 'd' → '.' 를 배열 단위로 치환 후 한 번에 float 변환
+    if n == 0:
+        return {"side": side, "timestamp": ts, "ok": ok, "pos": np.empty((0, 3)), "quat": np.empty((0, 4)),
+                "dist": np.empty(0), "visible": np.empty(0)}
+    tokens = np.char.replace(np.char.replace(tokens, "m", "-"), "d", ".")
+    try:
+        nums = tokens.astype(np.float64)
+    except ValueError:
+        nums = np.full(tokens.shape, np.nan)
+        for i in range(n):
+            try:
+                nums[i] = tokens[i].astype(np.float64)
+            except ValueError:
+                ok[i] = False
+    nums[~ok] = np.nan
+    return {
+        "side": side, "timestamp": ts, "ok": ok,
+        "pos": nums[:, 0:3], "quat": nums[:, 3:7],
+        "dist": nums[:, 7], "visible": nums[:, 8],
+    }
+
+def read_labels_table(csv_path: str) -> Tuple[Dict[Tuple[str, str], int], np.ndarray]:
+    """
+    labels.csv → ({(id, side): 행 번호}, (M, 37) float64).
+    헤더보다 긴 행은 LABEL_COLUMNS 기준, 중복 키는 마지막 행 사용 (read_labels_csv 와 동일 규칙).
+    """
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or LABEL_COLUMNS
+        rows = [r for r in reader if r]
+
+    width = len(LABEL_FIELDS)
+    cells = np.full((len(rows), width), "", dtype=object)
+    keys: Dict[Tuple[str, str], int] = {}
+    col_idx = {c: j for j, c in enumerate(LABEL_FIELDS)}
+    short_map = [col_idx.get(c, -1) for c in header[2:]]
+    for i, r in enumerate(rows):
+        keys[(r[0], r[1] if len(r) > 1 else "")] = i
+        if len(r) > len(header):
+            vals = r[2:2 + width]
+            cells[i, :len(vals)] = vals
+        else:
+            for j, v in zip(short_map, r[2:]):
+                if j >= 0:
+                    cells[i, j] = v
+
+    flat = cells.ravel().astype(str)
+    flat[flat == ""] = "nan"
+    try:
+        table = flat.astype(np.float64).reshape(cells.shape)
+    except ValueError:
+        table = np.array([float(v) if _is_float(v) else np.nan for v in flat]).reshape(cells.shape)
+    return keys, table
+
+def _is_float(v: str) -> bool:
+    try:
+        float(v)
+        return True
+    except ValueError:
+        return False
+
+def _file_sig(path: Optional[str]) -> Optional[List[float]]:
+    if not path or not os.path.isfile(path):
+        return None
+    st = os.stat(path)
+    return [st.st_mtime, st.st_size]
+
+
+# ==============================
+# Build / refresh
+# ==============================
+def _join_labels(side: np.ndarray, ts: np.ndarray, labels_csv: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(side)
+    labels = np.full((n, len(LABEL_FIELDS)), np.nan)
+    has = np.zeros(n, dtype=bool)
+    if not labels_csv or not os.path.isfile(labels_csv):
+        return labels, has
+    keys, table = read_labels_table(labels_csv)
+    rows = np.array([keys.get((t, s[:1]), keys.get((t, s), -1)) for s, t in zip(side, ts)], dtype=np.int64)
+    has = rows >= 0
+    labels[has] = table[rows[has]]
+    return labels, has
+
+def _save_columns(out_dir: str, cols: Dict[str, np.ndarray], meta: Dict[str, Any]):
+    os.makedirs(out_dir, exist_ok=True)
+    for name, arr in cols.items():
+        tmp = os.path.join(out_dir, f".{name}.tmp.npy")
+        np.save(tmp, np.ascontiguousarray(arr))
+        os.replace(tmp, os.path.join(out_dir, f"{name}.npy"))
+    # meta.json 을 마지막에 교체 → 읽는 쪽은 meta 의 n 으로 길이 확인
+    tmp = os.path.join(out_dir, ".meta.tmp.json")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(out_dir, "meta.json"))
+
+def build_index(images_root: str, labels_csv: Optional[str], out_dir: str,
+                incremental: bool = True) -> Dict[str, Any]:
+    """
+    인덱스 생성/갱신. 반환: meta (+ "added" / "removed" / "relabelled" 통계)
+    컬럼: path(U), side(U), timestamp(U), pos(N,3), quat(N,4), dist, visible,
+          ok(파일명 파싱 성공), has_label, labels(N,37) — 순서는 path 정렬 순
+    """
+    t0 = time.perf_counter()
+    paths = scan_images(images_root)
+    old = DatasetIndex.open(out_dir) if incremental and os.path.isfile(os.path.join(out_dir, "meta.json")) else None
+    if old is not None and os.path.abspath(old.meta.get("images_root", "")) != os.path.abspath(images_root):
+        old = None
+
+    # 1) 파일명 컬럼: 기존 행 재사용 + 새 파일만 디코드
+    name_cols = ("side", "timestamp", "ok", "pos", "quat", "dist", "visible")
+    if old is not None:
+        old_paths = np.asarray(old.cols["path"])
+        pos_in_old = {p: i for i, p in enumerate(old_paths.tolist())}
+        keep_src = np.array([pos_in_old.get(p, -1) for p in paths], dtype=np.int64)
+        new_mask = keep_src < 0
+        new_dec = decode_filenames([p for p, m in zip(paths, new_mask) if m])
+        cols = {}
+        for c in name_cols:
+            src = np.asarray(old.cols[c])
+            arr = np.empty((len(paths),) + src.shape[1:], dtype=np.result_type(src.dtype, new_dec[c].dtype))
+            arr[~new_mask] = src[keep_src[~new_mask]]
+            arr[new_mask] = new_dec[c]
+            cols[c] = arr
+        added, removed = int(new_mask.sum()), len(old_paths) - int((~new_mask).sum())
+    else:
+        cols = decode_filenames(paths)
+        added, removed = len(paths), 0
+
+    # 2) 라벨 조인: CSV 가 바뀌었거나 새 파일이 있으면 다시 (CSV 파싱 1회)
+    labels_sig = _file_sig(labels_csv)
+    relabel = old is None or added or labels_sig != old.meta.get("labels_sig")
+    if relabel:
+        cols["labels"], cols["has_label"] = _join_labels(cols["side"], cols["timestamp"], labels_csv)
+    else:
+        cols["labels"] = np.asarray(old.cols["labels"])[keep_src]
+        cols["has_label"] = np.asarray(old.cols["has_label"])[keep_src]
+    cols["path"] = np.array(paths, dtype=f"U{max([len(p) for p in paths] + [1])}")
+
+    meta = {
+        "version": INDEX_VERSION,
+        "n": len(paths),
+        "images_root": os.path.abspath(images_root),
+        "labels_csv": os.path.abspath(labels_csv) if labels_csv else None,
+        "labels_sig": labels_sig,
+        "label_fields": LABEL_FIELDS,
+        "columns": {k: {"dtype": str(v.dtype), "shape": list(v.shape)} for k, v in cols.items()},
+        "built_at": time.time(),
+    }
+    if old is not None:
+        old.close()
+    _save_columns(out_dir, cols, meta)
+    meta.update({"added": added, "removed": removed, "relabelled": bool(relabel),
+                 "elapsed_s": time.perf_counter() - t0})
+    return meta
+
+
+# ==============================
+# Reader
+# ==============================
+class DatasetIndex:
+    def __init__(self, out_dir: str, meta: Dict[str, Any], cols: Dict[str, np.ndarray]):
+        self.out_dir = out_dir
+        self.meta = meta
+        self.cols = cols
+        self._key_to_row: Optional[Dict[Tuple[str, str], int]] = None
+        self._label_idx = {c: j for j, c in enumerate(meta["label_fields"])}
+
+    @classmethod
+    def open(cls, out_dir: str) -> "DatasetIndex":
+        with open(os.path.join(out_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        cols = {name: np.load(os.path.join(out_dir, f"{name}.npy"), mmap_mode="r") for name in meta["columns"]}
+        for name, arr in cols.items():
+            if len(arr) != meta["n"]:
+                raise ValueError(f"index column {name} has {len(arr)} rows, expected {meta['n']}")
+        return cls(out_dir, meta, cols)
+
+    def close(self):
+        self.cols = {}
+
+    def __len__(self) -> int:
+        return self.meta["n"]
+
+    def image_path(self, i: int) -> str:
+        return os.path.join(self.meta["images_root"], str(self.cols["path"][i]))
+
+    def label(self, i: int, field: str) -> float:
+        return float(self.cols["labels"][i, self._label_idx[field]])
+
+    def label_column(self, field: str) -> np.ndarray:
+        return self.cols["labels"][:, self._label_idx[field]]
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        c = self.cols
+        return {
+            "path": self.image_path(i),
+            "side": str(c["side"][i]),
+            "timestamp": str(c["timestamp"][i]),
+            "pos": np.asarray(c["pos"][i]),
+            "quat": np.asarray(c["quat"][i]),
+            "dist": float(c["dist"][i]),
+            "visible": float(c["visible"][i]),
+            "has_label": bool(c["has_label"][i]),
+            "labels": np.asarray(c["labels"][i]),
+        }
+
+    def find(self, timestamp: str, side: str) -> int:
+        """(timestamp, side) → 행 번호 (없으면 -1). 첫 호출 때 dict 1회 생성"""
+        if self._key_to_row is None:
+            self._key_to_row = {
+                (t, s[:1]): i for i, (t, s) in enumerate(zip(self.cols["timestamp"].tolist(),
+                                                              self.cols["side"].tolist()))
+            }
+        return self._key_to_row.get((timestamp, side[:1]), -1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pose dataset columnar index builder")
+    parser.add_argument("--images-root", default="vision/dataset/raw/images")
+    parser.add_argument("--labels", default="vision/dataset/raw/labels.csv")
+    parser.add_argument("--out", default="vision/dataset/index")
+    parser.add_argument("--rebuild", action="store_true", help="증분 갱신 대신 전체 재생성")
+    args = parser.parse_args()
+
+    meta = build_index(args.images_root, args.labels, args.out, incremental=not args.rebuild)
+    print(f"[index] {meta['n']} rows (+{meta['added']} / -{meta['removed']}, "
+          f"relabel={meta['relabelled']}) in {meta['elapsed_s']:.3f}s → {args.out}")
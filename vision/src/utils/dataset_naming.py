@@ -6,16 +6,42 @@ Filename format (per spec):
 
 - Decimal points are replaced with 'd'
 - Minus sign is replaced with 'm'
+
+Raw capture format (backend wsHandler.buildFilename):
+    {side}_{timestamp}_{x}_{y}_{z}_{qx}_{qy}_{qz}_{qw}_{dist}_{visible}.png
+
+The matching per-frame rows live in labels.csv (see LABEL_COLUMNS).
 """
 
 from __future__ import annotations
 
+import csv
+import math
+import os
+
+# Full labels.csv column order written by wsHandler.appendCsvRow.
+# Older files keep a shorter header (no tcp_w_*/socket_w_* columns).
+LABEL_COLUMNS = [
+    "id", "side",
+    "tx", "ty", "tz", "qx", "qy", "qz", "qw",
+    "j1", "j2", "j3", "j4", "j5", "j6", "j7",
+    "cam_tx", "cam_ty", "cam_tz", "cam_qx", "cam_qy", "cam_qz", "cam_qw",
+    "tcp_w_tx", "tcp_w_ty", "tcp_w_tz", "tcp_w_qx", "tcp_w_qy", "tcp_w_qz", "tcp_w_qw",
+    "socket_w_tx", "socket_w_ty", "socket_w_tz", "socket_w_qx", "socket_w_qy", "socket_w_qz", "socket_w_qw",
+    "dist_tcp_socket", "visible",
+]
+
 
 def encode_number(x: float, digits: int = 3) -> str:
     s = f"{float(x):.{digits}f}"
     return s.replace("-", "m").replace(".", "d")
 
 
+def decode_number(token: str) -> float:
+    """Reverse of encode_number ('nan' tokens decode to NaN)."""
+    return float(token.replace("m", "-").replace("d", "."))
+
+
 def build_filename(idx: int, timestamp: int, pos, quat, digits: int = 6) -> str:
     """
     Args:
@@ -41,9 +67,53 @@ def parse_filename(name: str):
     idx = int(parts[0])
     timestamp = parts[1]
 
-    def decode(token: str) -> float:
-        return float(token.replace("m", "-").replace("d", "."))
-
-    pos = tuple(decode(t) for t in parts[2:5])
-    quat = tuple(decode(t) for t in parts[5:9])
+    pos = tuple(decode_number(t) for t in parts[2:5])
+    quat = tuple(decode_number(t) for t in parts[5:9])
     return idx, timestamp, pos, quat
+
+
+def parse_capture_filename(name: str):
+    """
+    Parse a raw capture name (wsHandler.buildFilename).
+    The timestamp may itself contain '_' (e.g. m_251207_183158454_...),
+    so the 9 numeric fields are taken from the end.
+
+    Returns dict: side, timestamp, pos, quat, dist, visible (NaN if unknown)
+    """
+    stem = os.path.basename(name).rsplit(".", 1)[0]
+    parts = stem.split("_")
+    if len(parts) < 11:
+        raise ValueError(f"invalid capture filename pattern: {name}")
+    nums = [decode_number(t) for t in parts[-9:]]
+    return {
+        "side": parts[0],
+        "timestamp": "_".join(parts[1:-9]),
+        "pos": tuple(nums[0:3]),
+        "quat": tuple(nums[3:7]),
+        "dist": nums[7],
+        "visible": nums[8],
+    }
+
+
+def read_labels_csv(csv_path: str):
+    """
+    Read labels.csv into {(id, side): {column: float}}.
+    Rows longer than the file header use LABEL_COLUMNS; empty cells become NaN.
+    Duplicate (id, side) keys keep the last row.
+    """
+    rows = {}
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or LABEL_COLUMNS
+        for row in reader:
+            if not row:
+                continue
+            cols = LABEL_COLUMNS if len(row) > len(header) else header
+            rec = {}
+            for key, val in zip(cols[2:], row[2:]):
+                try:
+                    rec[key] = float(val) if val != "" else math.nan
+                except ValueError:
+                    rec[key] = math.nan
+            rows[(row[0], row[1])] = rec
+    return rows
@@ -0,0 +1,131 @@
+# depth_io.py
+# - SGBM 시차(disparity) 결과를 손실 없이 저장/재사용하는 artifact 포맷
+#   * "npy"   : float32 .npy (무효 = NaN)
+#   * "npy16" : float16 .npy (용량 절반, 1/16 px 단위 시차는 |d| < 128 px 에서만 정확
+#               → 유효 시차가 128 px 이상이면 저장 거부, npy / png16 사용)
+#   * "png16" : 16-bit 고정소수점 PNG  v = round((d - offset) * scale) + 1, 무효 = 0
+#               scale=16 이면 SGBM 원본 해상도(1/16 px) 그대로 → 무손실
+# - 어떤 포맷이든 <base>.json 사이드카에 scale/offset/Q/캘리브레이션 해시를 함께 기록
+# - .npy 는 np.load(mmap_mode='r') 로 읽음 → SGBM 재계산 / 전체 복사 없이 재사용
+#
+# 사용 예:
+#   save_disparity("vision/Inference/image/depth_map/disparity", disp, Q, calib_key=rectifier.key)
+#   disp, meta = load_disparity("vision/Inference/image/depth_map/disparity.npy")
+
+import json
+import os
+from typing import Dict, Any, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+FORMAT_VERSION = 1
+NPY16_MAX_EXACT = 128.0    # float16 가수 10비트 → 이 미만에서 1/16 px 간격 표현 가능
+ARTIFACT_NAME = "disparity"
+_EXT = {"npy": ".npy", "npy16": ".npy", "png16": ".png"}
+
+
+def sidecar_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".json"
+
+
+def save_disparity(base_path: str,
+                   disp: np.ndarray,
+                   Q: Optional[np.ndarray] = None,
+                   calib_key: Optional[str] = None,
+                   fmt: str = "npy",
+                   min_disparity: int = 0,
+                   num_disparities: Optional[int] = None,
+                   scale: float = 16.0) -> str:
+    """
+    disp: compute_depth_map 의 float 시차 (SGBM raw / 16, 무효 = minDisparity 미만)
+    base_path: 확장자 없는 경로 (포맷에 맞는 확장자 + .json 사이드카 생성)
+    반환: 저장된 데이터 파일 경로
+    """
+    if fmt not in _EXT:
+        raise ValueError(f"unknown disparity format: {fmt}")
+    base_path = os.path.splitext(base_path)[0]
+    path = base_path + _EXT[fmt]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    disp = np.asarray(disp, dtype=np.float32)
+    invalid = ~np.isfinite(disp) | (disp < min_disparity)
+    meta: Dict[str, Any] = {
+        "version": FORMAT_VERSION,
+        "format": fmt,
+        "shape": list(disp.shape),
+        "min_disparity": int(min_disparity),
+        "num_disparities": None if num_disparities is None else int(num_disparities),
+        "Q": None if Q is None else np.asarray(Q, dtype=np.float64).tolist(),
+        "calib_hash": calib_key,
+    }
+
+    # 임시 파일에 쓴 뒤 교체 → 읽는 쪽이 반쯤 쓰인 파일을 보지 않음
+    tmp = path + ".tmp" + _EXT[fmt]
+    if fmt == "png16":
+        offset = float(min_disparity)
+        v = np.round((disp - offset) * scale) + 1
+        if np.any(v[~invalid] > np.iinfo(np.uint16).max):
+            raise ValueError("disparity range too large for png16 at this scale")
+        v[invalid] = 0
+        cv2.imwrite(tmp, v.astype(np.uint16))
+        meta.update({"dtype": "uint16", "scale": float(scale), "offset": offset, "invalid": 0})
+    else:
+        dtype = np.float16 if fmt == "npy16" else np.float32
+        if fmt == "npy16" and np.any(np.abs(disp[~invalid]) >= NPY16_MAX_EXACT):
+            raise ValueError(f"disparity >= {NPY16_MAX_EXACT:g} px loses 1/16 px precision in npy16")
+        out = disp.astype(dtype)
+        out[invalid] = np.nan
+        np.save(tmp, out)
+        meta.update({"dtype": np.dtype(dtype).name, "scale": 1.0, "offset": 0.0, "invalid": "nan"})
+    os.replace(tmp, path)
+
+    with open(sidecar_path(path), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return path
+
+
+def load_meta(path: str) -> Optional[Dict[str, Any]]:
+    side = sidecar_path(path)
+    if not os.path.isfile(side):
+        return None
+    with open(side, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_disparity(path: str, mmap: bool = True) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    artifact → (float 시차, meta). 무효 픽셀은 NaN.
+    .npy 는 mmap (읽기 전용, float16 이면 dtype 그대로 — 필요 시 호출 측에서 astype)
+    png16 은 디코드 후 float32 로 복원.
+    """
+    meta = load_meta(path)
+    if meta is None:
+        raise FileNotFoundError(f"disparity sidecar not found: {sidecar_path(path)}")
+
+    if meta["format"] == "png16":
+        v = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if v is None:
+            raise FileNotFoundError(path)
+        disp = (v.astype(np.float32) - 1) / meta["scale"] + meta["offset"]
+        disp[v == 0] = np.nan
+        return disp, meta
+    return np.load(path, mmap_mode="r" if mmap else None), meta
+
+
+def find_artifact(path_or_dir: str) -> Optional[str]:
+    """
+    폴더(또는 같은 폴더의 다른 파일 경로)에서 ARTIFACT_NAME.{npy,png} + 사이드카 검색.
+    레거시 depth_map.png 경로를 받아도 옆에 저장된 artifact 를 찾아준다.
+    """
+    d = path_or_dir if os.path.isdir(path_or_dir) else os.path.dirname(path_or_dir)
+    for ext in (".npy", ".png"):
+        cand = os.path.join(d, ARTIFACT_NAME + ext)
+        if os.path.isfile(cand) and load_meta(cand) is not None:
+            return cand
+    return None
+
+
+def meta_Q(meta: Dict[str, Any]) -> Optional[np.ndarray]:
+    return None if meta.get("Q") is None else np.asarray(meta["Q"], dtype=np.float64)
@@ -7,8 +7,9 @@
 # 검증 안함
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, asdict
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterable
 
 import cv2
 import numpy as np
@@ -70,11 +71,59 @@ def load_bbox_json(json_path: str) -> List[BoxItem]:
 # Core class
 # ------------------------------
 class EllipseFitterModule:
-    def __init__(self, margin_px: int = 5, canny_low: int = 80, canny_high: int = 200):
+    def __init__(self,
+                 margin_px: int = 5,
+                 canny_low: int = 80,
+                 canny_high: int = 200,
+                 max_workers: Optional[int] = None,
+                 executor: Optional[ThreadPoolExecutor] = None):
         self.margin = margin_px
         self.canny_low = canny_low
         self.canny_high = canny_high
 
+        # 좌/우 사이드 + 박스 단위 병렬 처리용 스레드 풀
+        # (Canny/findContours/fitEllipse는 GIL을 놓기 때문에 스레드로 충분)
+        # - executor 지정: 외부 풀 공유 (close()에서 종료하지 않음)
+        # - max_workers > 1: 처음 사용할 때 내부 풀 생성
+        # - 둘 다 없으면 기존처럼 직렬 처리
+        self._executor = executor
+        self._owns_executor = False
+        self._max_workers = max_workers
+
+    # ------------------------------
+    # Thread pool helpers
+    # ------------------------------
+    def _get_executor(self) -> Optional[ThreadPoolExecutor]:
+        if self._executor is None and self._max_workers and self._max_workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                thread_name_prefix="ellipse")
+            self._owns_executor = True
+        return self._executor
+
+    def _map(self, fn: Callable, arg_list: Iterable[Tuple]) -> List[Any]:
+        """
+        arg_list 각 항목으로 fn(*args) 실행 후 입력 순서대로 결과 반환.
+        항상 호출 스레드(메인)에서만 submit 하므로 풀 내부에서 다시 대기하는 일이 없다.
+        """
+        arg_list = list(arg_list)
+        ex = self._get_executor()
+        if ex is None or len(arg_list) <= 1:
+            return [fn(*args) for args in arg_list]
+        futures = [ex.submit(fn, *args) for args in arg_list]
+        return [f.result() for f in futures]
+
+    def close(self):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._owns_executor = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
     def _fit_one_box(self, img_bgr, box_item, edges_all):
         """
         안정형 타원 피팅 버전
@@ -150,68 +199,45 @@ class EllipseFitterModule:
             residual=residual
         )
 
-    def process_one_side(
+    def _load_side(self, original_img_path: str, bbox_json_path: str):
+        """원본 이미지 / bbox / 공통 Canny 로드 (사이드 단위)"""
+        img = cv2.imread(original_img_path, cv2.IMREAD_COLOR)
+        if img is None:
+            raise FileNotFoundError(f"원본 이미지가 없습니다: {original_img_path}")
+
+        boxes = load_bbox_json(bbox_json_path)  # 0~N개 (최대 3개 기대)
+        # 공통 Canny (원본 전체)
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        edges_all = cv2.Canny(gray, self.canny_low, self.canny_high)
+        return img, boxes, edges_all
+
+    def _save_side(
         self,
-        side_name: str,                        # "left" / "right"
-        original_img_path: str,               # 원본 이미지 경로
-        detect_dir: str,                      # bbox JSON 및 출력 저장 폴더 (detect_*_view)
-        bbox_json_path: str                   # 해당 사이드의 bbox JSON 경로
+        side_name: str,
+        original_img_path: str,
+        detect_dir: str,
+        img,
+        boxes: List[BoxItem],
+        edges_all,
+        results: List[EllipseResult]
     ) -> Dict[str, Any]:
-        """
-        반환:
-        {
-          "side": "left",
-          "image": "path/to/original.png",
-          "results": [ EllipseResult... ],
-          "outputs": {
-             "mask_image": "...",
-             "edges_image": "...",
-             "ellipse_image": "...",
-             "ellipse_json": "..."
-          }
-        }
-        """
+        """시각화 3종 + JSON 저장 후 반환 dict 구성"""
         os.makedirs(detect_dir, exist_ok=True)
 
         # 파일 이름 베이스 (고유 저장용)
         base = os.path.splitext(os.path.basename(original_img_path))[0]
 
         tag = f"{base}_{side_name}"
-
-        # 1) 이미지/박스 로드
-        img = cv2.imread(original_img_path, cv2.IMREAD_COLOR)
-        if img is None:
-            raise FileNotFoundError(f"원본 이미지가 없습니다: {original_img_path}")
         h, w = img.shape[:2]
 
-        boxes = load_bbox_json(bbox_json_path)  # 0~N개 (최대 3개 기대)
-        # 2) 공통 Canny (원본 전체)
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        edges_all = cv2.Canny(gray, self.canny_low, self.canny_high)
-
-        # 3) 전체 ROI 마스크/엣지 합성용 초기화
+        # 전체 ROI 마스크/엣지 합성 (시각화용)
         union_mask = np.zeros((h, w), dtype=np.uint8)
-        union_edges = np.zeros((h, w), dtype=np.uint8)
-
-        # 4) 박스별 처리
-        results: List[EllipseResult] = []
         for b in boxes:
-            # 박스 확장/마스크
-            bx = expand_and_clamp_box(b.bbox, self.margin, w, h)
-            x1, y1, x2, y2 = bx
+            x1, y1, x2, y2 = expand_and_clamp_box(b.bbox, self.margin, w, h)
             union_mask[y1:y2, x1:x2] = 255
+        union_edges = cv2.bitwise_and(edges_all, edges_all, mask=union_mask)
 
-            # 박스 반영된 엣지
-            edges_roi = cv2.bitwise_and(edges_all, edges_all, mask=union_mask)
-            # 개별 피팅 (개별 ROI만 사용해서 다시 계산해야 하므로 별도 호출)
-            res = self._fit_one_box(img, b, edges_all)
-            if res is not None:
-                results.append(res)
-
-            # union_edges는 누적(시각화용)
-            union_edges = cv2.bitwise_or(union_edges, edges_roi)
-
-        # 5) 시각화 3종 생성
+        # 시각화 3종 생성
         # (1) 마스크 시각화
         mask_vis = union_mask.copy()
 
@@ -246,7 +272,7 @@ class EllipseFitterModule:
                 cv2.LINE_AA
             )
 
-        # 6) 저장 경로
+        # 저장 경로
         out_mask_path = os.path.join(detect_dir, f"{tag}_mask_all.png")
         out_edges_path = os.path.join(detect_dir, f"{tag}_edges_all.png")
         out_ellipse_path = os.path.join(detect_dir, f"{tag}_ellipse_all.png")
@@ -256,7 +282,7 @@ class EllipseFitterModule:
         cv2.imwrite(out_edges_path, edges_vis)
         cv2.imwrite(out_ellipse_path, ell_vis)
 
-        # 7) 결과 JSON 저장
+        # 결과 JSON 저장
         json_payload = {
             "side": side_name,
             "image": original_img_path,
@@ -283,6 +309,73 @@ class EllipseFitterModule:
             }
         }
 
+    def process_one_side(
+        self,
+        side_name: str,                        # "left" / "right"
+        original_img_path: str,               # 원본 이미지 경로
+        detect_dir: str,                      # bbox JSON 및 출력 저장 폴더 (detect_*_view)
+        bbox_json_path: str                   # 해당 사이드의 bbox JSON 경로
+    ) -> Dict[str, Any]:
+        """
+        반환:
+        {
+          "side": "left",
+          "image": "path/to/original.png",
+          "results": [ EllipseResult... ],
+          "outputs": {
+             "mask_image": "...",
+             "edges_image": "...",
+             "ellipse_image": "...",
+             "ellipse_json": "..."
+          }
+        }
+        """
+        # 1) 이미지/박스 로드 + 공통 Canny
+        img, boxes, edges_all = self._load_side(original_img_path, bbox_json_path)
+
+        # 2) 박스별 피팅 (풀이 있으면 병렬, 결과는 박스 순서 유지)
+        fitted = self._map(self._fit_one_box, [(img, b, edges_all) for b in boxes])
+        results: List[EllipseResult] = [r for r in fitted if r is not None]
+
+        # 3) 시각화 + 저장
+        return self._save_side(side_name, original_img_path, detect_dir,
+                               img, boxes, edges_all, results)
+
+    def process_stereo_pair(
+        self,
+        left: Tuple[str, str, str],           # (원본 이미지, detect_dir, bbox JSON)
+        right: Tuple[str, str, str]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        좌/우를 한 번에 처리. 로드 → (좌+우 전체 박스) 피팅 → 저장 각 단계를
+        스레드 풀에 동시에 올린다. 반환은 항상 (left_pack, right_pack) 순서.
+        """
+        sides = [("left", *left), ("right", *right)]
+
+        # 1) 좌/우 로드 동시 실행
+        loaded = self._map(self._load_side, [(ori, bbox) for _, ori, _, bbox in sides])
+
+        # 2) 좌/우 모든 박스를 한 번에 풀에 투입
+        jobs = [(img, b, edges_all) for img, boxes, edges_all in loaded for b in boxes]
+        fitted = self._map(self._fit_one_box, jobs)
+
+        # 사이드별로 다시 분리 (투입 순서 = 결과 순서)
+        per_side: List[List[EllipseResult]] = []
+        offset = 0
+        for _, boxes, _ in loaded:
+            chunk = fitted[offset:offset + len(boxes)]
+            per_side.append([r for r in chunk if r is not None])
+            offset += len(boxes)
+
+        # 3) 저장 동시 실행
+        save_args = [
+            (side_name, ori, det_dir, img, boxes, edges_all, results)
+            for (side_name, ori, det_dir, _), (img, boxes, edges_all), results
+            in zip(sides, loaded, per_side)
+        ]
+        left_pack, right_pack = self._map(self._save_side, save_args)
+        return left_pack, right_pack
+
 
 # ------------------------------
 # Main
@@ -295,9 +388,11 @@ if __name__ == "__main__":
     LEFT_BBOX_JSON  = os.path.join(LEFT_DET_DIR,  "left_view_bbox.json")
     RIGHT_BBOX_JSON = os.path.join(RIGHT_DET_DIR, "right_view_bbox.json")
 
-    fitter = EllipseFitterModule(margin_px=5, canny_low=80, canny_high=200)
-
-    left_pack  = fitter.process_one_side("left",  LEFT_ORI,  LEFT_DET_DIR,  LEFT_BBOX_JSON)
-    right_pack = fitter.process_one_side("right", RIGHT_ORI, RIGHT_DET_DIR, RIGHT_BBOX_JSON)
+    # 좌/우 + 박스 병렬 처리 (max_workers=None이면 직렬)
+    with EllipseFitterModule(margin_px=5, canny_low=80, canny_high=200, max_workers=4) as fitter:
+        left_pack, right_pack = fitter.process_stereo_pair(
+            (LEFT_ORI,  LEFT_DET_DIR,  LEFT_BBOX_JSON),
+            (RIGHT_ORI, RIGHT_DET_DIR, RIGHT_BBOX_JSON),
+        )
 
     # 필요 시 여기서 left/right 결과를 합쳐 반환/저장하거나 다음 단계(스테레오 매칭)로 넘기세요.
@@ -8,8 +8,10 @@
 
 import os
 import json
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, asdict
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterable
 
 import cv2
 import numpy as np
@@ -132,6 +134,13 @@ def to_objpts_from_json(json_path: Optional[str]) -> np.ndarray:
         arr_cm = np.array([FALLBACK_OBJ_POINTS_CM[name] for name in PIN_ORDER], dtype=np.float64)
         return arr_cm * 0.01
 
+@lru_cache(maxsize=8)
+def _objpts_cached(json_path: Optional[str]) -> np.ndarray:
+    """to_objpts_from_json 결과를 경로별로 1회만 읽어 캐시 (읽기 전용)"""
+    arr = to_objpts_from_json(json_path)
+    arr.setflags(write=False)
+    return arr
+
 
 # ==============================
 # Core class
@@ -140,11 +149,56 @@ class EllipseFitterModule:
     def __init__(self,
                  margin_px: int = 5,
                  canny_low: int = 80,
-                 canny_high: int = 200):
+                 canny_high: int = 200,
+                 max_workers: Optional[int] = None,
+                 executor: Optional[ThreadPoolExecutor] = None):
         self.margin = margin_px
         self.canny_low = canny_low
         self.canny_high = canny_high
 
+        # 좌/우 사이드 + 박스 단위 병렬 처리용 스레드 풀
+        # (Canny/findContours/fitEllipse는 GIL을 놓기 때문에 스레드로 충분)
+        # - executor 지정: 외부 풀 공유 (close()에서 종료하지 않음)
+        # - max_workers > 1: 처음 사용할 때 내부 풀 생성
+        # - 둘 다 없으면 기존처럼 직렬 처리
+        self._executor = executor
+        self._owns_executor = False
+        self._max_workers = max_workers
+
+    # ------------------------------
+    # Thread pool helpers
+    # ------------------------------
+    def _get_executor(self) -> Optional[ThreadPoolExecutor]:
+        if self._executor is None and self._max_workers and self._max_workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                thread_name_prefix="ellipse")
+            self._owns_executor = True
+        return self._executor
+
+    def _map(self, fn: Callable, arg_list: Iterable[Tuple]) -> List[Any]:
+        """
+        arg_list 각 항목으로 fn(*args) 실행 후 입력 순서대로 결과 반환.
+        항상 호출 스레드(메인)에서만 submit 하므로 풀 내부에서 다시 대기하는 일이 없다.
+        """
+        arg_list = list(arg_list)
+        ex = self._get_executor()
+        if ex is None or len(arg_list) <= 1:
+            return [fn(*args) for args in arg_list]
+        futures = [ex.submit(fn, *args) for args in arg_list]
+        return [f.result() for f in futures]
+
+    def close(self):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._owns_executor = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
     def _fit_one_box(self, img_bgr, box_item, edges_all):
         h, w = img_bgr.shape[:2]
         bx = expand_and_clamp_box(box_item.bbox, self.margin, w, h)
@@ -212,52 +266,30 @@ class EllipseFitterModule:
             residual=residual
         )
 
-    def process_one_side(self,
-                         side_name: str,                 # "left" / "right"
-                         original_img_path: str,         # 원본 이미지
-                         detect_dir: str,                # 결과 저장 폴더
-                         bbox_json_path: str             # YOLO bbox JSON
-                         ) -> Dict[str, Any]:
-        """
-        반환 JSON:
-        {
-          "side": "left",
-          "image": ".../left_view.png",
-          "points": {
-              "center": {"cx":..,"cy":..,"major":..,"minor":..,"angle_deg":..,"residual":..,"cls":0,"confidence":..,"bbox":[...]},
-              "L1": {...}, ...
-          },
-          "outputs": { "ellipse_image": ".../xxx_ellipse_all.png", "ellipse_json": ".../xxx_ellipse.json" }
-        }
-        """
-        ensure_dir(detect_dir)
-
-        base = os.path.splitext(os.path.basename(original_img_path))[0]
-        tag = f"{base}_{side_name}"
+    def _edges_all(self, img_bgr):
+        """전역 edges (residual 계산용)"""
+        return cv2.Canny(cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY), self.canny_low, self.canny_high)
 
+    def _load_side(self, original_img_path: str, bbox_json_path: str):
+        """원본 이미지 / bbox / 전역 edges 로드 (사이드 단위)"""
         img = cv2.imread(original_img_path, cv2.IMREAD_COLOR)
         if img is None:
             raise FileNotFoundError(f"원본 이미지가 없습니다: {original_img_path}")
-        h, w = img.shape[:2]
-
         boxes = load_bbox_json(bbox_json_path)
+        return img, boxes, self._edges_all(img)
 
-        # 전역 edges (residual 계산용)
-        edges_all = cv2.Canny(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), self.canny_low, self.canny_high)
-
-        # 결과 수집
+    @staticmethod
+    def _assign_pins(boxes: List[BoxItem], fitted: List[Any]) -> Dict[str, Dict[str, Any]]:
+        """박스별 피팅 결과(박스 순서) → 핀 이름별 dict"""
         results_by_pin: Dict[str, Dict[str, Any]] = {}
-        vis = img.copy()
-
-        for b in boxes:
+        for b, res in zip(boxes, fitted):
             if b.cls == 0:
                 # 큰 원(class 0): 내부 6개 타원 검출
-                multi_res = self._fit_one_box(img, b, edges_all)
+                multi_res = res
                 if not multi_res:
                     continue
 
                 # 중심좌표 기반 자동 정렬
-                pts = np.array([[r.cx, r.cy] for r in multi_res])
                 # y기준 정렬 (위쪽 3, 아래쪽 3)
                 pts_sorted = sorted(multi_res, key=lambda r: r.cy)
                 top3 = sorted(pts_sorted[:3], key=lambda r: r.cx)
@@ -270,11 +302,35 @@ class EllipseFitterModule:
 
             else:
                 # class1,2: DC-, DC+ 그대로
-                res = self._fit_one_box(img, b, edges_all)
                 if res:
                     pin_name = PIN_MAP.get(res.cls, f"cls_{res.cls}")
                     results_by_pin[pin_name] = asdict(res)
+        return results_by_pin
+
+    def fit_pins(self, img_bgr, boxes: List[BoxItem], edges_all=None) -> Dict[str, Dict[str, Any]]:
+        """
+        메모리 상의 이미지 + bbox 리스트로 8핀 타원 피팅 (파일 저장 없음).
+        박스들은 스레드 풀에서 병렬 처리되고, 결과는 박스 순서대로 핀에 할당된다.
+        """
+        if edges_all is None:
+            edges_all = self._edges_all(img_bgr)
+        fitted = self._map(self._fit_one_box, [(img_bgr, b, edges_all) for b in boxes])
+        return self._assign_pins(boxes, fitted)
+
+    def _save_side(self,
+                   side_name: str,
+                   original_img_path: str,
+                   detect_dir: str,
+                   img,
+                   results_by_pin: Dict[str, Dict[str, Any]]
+                   ) -> Dict[str, Any]:
+        """시각화 + JSON 저장 후 반환 dict 구성"""
+        ensure_dir(detect_dir)
 
+        base = os.path.splitext(os.path.basename(original_img_path))[0]
+        tag = f"{base}_{side_name}"
+
+        vis = img.copy()
 
         # 시각화
         color_map = {
@@ -318,10 +374,78 @@ class EllipseFitterModule:
             }
         }
 
+    def process_one_side(self,
+                         side_name: str,                 # "left" / "right"
+                         original_img_path: str,         # 원본 이미지
+                         detect_dir: str,                # 결과 저장 폴더
+                         bbox_json_path: str             # YOLO bbox JSON
+                         ) -> Dict[str, Any]:
+        """
+        반환 JSON:
+        {
+          "side": "left",
+          "image": ".../left_view.png",
+          "points": {
+              "center": {"cx":..,"cy":..,"major":..,"minor":..,"angle_deg":..,"residual":..,"cls":0,"confidence":..,"bbox":[...]},
+              "L1": {...}, ...
+          },
+          "outputs": { "ellipse_image": ".../xxx_ellipse_all.png", "ellipse_json": ".../xxx_ellipse.json" }
+        }
+        """
+        img, boxes, edges_all = self._load_side(original_img_path, bbox_json_path)
+        results_by_pin = self.fit_pins(img, boxes, edges_all)
+        return self._save_side(side_name, original_img_path, detect_dir, img, results_by_pin)
+
+    def process_stereo_pair(self,
+                            left: Tuple[str, str, str],      # (원본 이미지, detect_dir, bbox JSON)
+                            right: Tuple[str, str, str]
+                            ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        좌/우를 한 번에 처리. 로드 → (좌+우 전체 박스) 피팅 → 저장 각 단계를
+        스레드 풀에 동시에 올린다. 반환은 항상 (left_pack, right_pack) 순서.
+        """
+        sides = [("left", *left), ("right", *right)]
+
+        # 1) 좌/우 로드 동시 실행
+        loaded = self._map(self._load_side, [(ori, bbox) for _, ori, _, bbox in sides])
+
+        # 2) 좌/우 모든 박스를 한 번에 풀에 투입
+        jobs = [(img, b, edges_all) for img, boxes, edges_all in loaded for b in boxes]
+        fitted = self._map(self._fit_one_box, jobs)
+
+        # 사이드별로 다시 분리 (투입 순서 = 결과 순서) 후 핀 할당
+        pins_per_side: List[Dict[str, Dict[str, Any]]] = []
+        offset = 0
+        for _, boxes, _ in loaded:
+            pins_per_side.append(self._assign_pins(boxes, fitted[offset:offset + len(boxes)]))
+            offset += len(boxes)
+
+        # 3) 저장 동시 실행
+        save_args = [
+            (side_name, ori, det_dir, img, pins)
+            for (side_name, ori, det_dir, _), (img, _, _), pins
+            in zip(sides, loaded, pins_per_side)
+        ]
+        left_pack, right_pack = self._map(self._save_side, save_args)
+        return left_pack, right_pack
+
 
 # ==============================
 # PnP / Pose 유틸
 # ==============================
+def collect_img_points(points: Dict[str, Dict[str, Any]]) -> Optional[np.ndarray]:
+    """
+    핀 이름별 타원 dict(process_one_side의 "points")에서 PIN_ORDER 순서대로 (u,v) 배열 반환.
+    하나라도 빠지면 None.
+    """
+    pts = []
+    for name in PIN_ORDER:
+        if name not in points:
+            return None
+        entry = points[name]
+        pts.append([entry["cx"], entry["cy"]])
+    return np.array(pts, dtype=np.float64)
+
 def collect_img_points_for_pnp(ellipse_json_path: str) -> Optional[np.ndarray]:
     """
     ellipse JSON에서 PIN_ORDER 순서대로 (u,v) 픽셀 좌표 배열 반환
@@ -331,30 +455,25 @@ def collect_img_points_for_pnp(ellipse_json_path: str) -> Optional[np.ndarray]:
         return None
     with open(ellipse_json_path, "r", encoding="utf-8") as f:
         data = json.load(f)
-    pts = []
-    for name in PIN_ORDER:
-        if name not in data["points"]:
-            return None
-        entry = data["points"][name]
-        pts.append([entry["cx"], entry["cy"]])
-    return np.array(pts, dtype=np.float64)
-
-def solve_pnp_from_files(ellipse_json_path: str,
-                         obj_points_json_path: Optional[str],
-                         K: np.ndarray,
-                         dist: np.ndarray,
-                         method: str = "IPPE") -> Optional[Dict[str, Any]]:
+    return collect_img_points(data["points"])
+
+def rot2euler_zyx(Rm: np.ndarray) -> Tuple[float,float,float]:
+    """오일러(roll-pitch-yaw; ZYX 기준) 계산"""
+    sy = np.sqrt(Rm[0,0]**2 + Rm[1,0]**2)
+    yaw   = np.arctan2(Rm[1,0], Rm[0,0])
+    pitch = np.arctan2(-Rm[2,0], sy)
+    roll  = np.arctan2(Rm[2,1], Rm[2,2])
+    return roll, pitch, yaw
+
+def solve_pnp(img_pts: np.ndarray,
+              obj_pts_m: np.ndarray,
+              K: np.ndarray,
+              dist: np.ndarray,
+              method: str = "IPPE") -> Optional[Dict[str, Any]]:
     """
-    ellipse JSON + CAD 기준점 JSON + K,dist로 PnP 수행.
+    이미지 좌표 (N,2) + CAD 기준점 (N,3, m) + K,dist로 PnP 수행 (파일 I/O 없음).
     method: "IPPE" | "ITERATIVE" | "AP3P" | "RANSAC"
     """
-    img_pts = collect_img_points_for_pnp(ellipse_json_path)
-    if img_pts is None:
-        print("[WARN] PnP 실패: 필요한 핀 좌표가 충분치 않습니다.")
-        return None
-
-    obj_pts_m = to_objpts_from_json(obj_points_json_path)
-
     flag = cv2.SOLVEPNP_IPPE if method.upper() == "IPPE" else \
            cv2.SOLVEPNP_ITERATIVE if method.upper() == "ITERATIVE" else \
            cv2.SOLVEPNP_AP3P if method.upper() == "AP3P" else \
@@ -373,25 +492,18 @@ def solve_pnp_from_files(ellipse_json_path: str,
         print("[WARN] solvePnP 실패")
         return None
 
-    R, _ = cv2.Rodrigues(rvec)
-
-    # 오일러(roll-pitch-yaw; ZYX 기준) 계산
-    def rot2euler_zyx(Rm: np.ndarray) -> Tuple[float,float,float]:
-        sy = np.sqrt(Rm[0,0]**2 + Rm[1,0]**2)
-        yaw   = np.arctan2(Rm[1,0], Rm[0,0])
-        pitch = np.arctan2(-Rm[2,0], sy)
-        roll  = np.arctan2(Rm[2,1], Rm[2,2])
-        return roll, pitch, yaw
-
-    roll, pitch, yaw = rot2euler_zyx(R)
-    x, y, z = tvec.flatten()
     # 재투영 오차
     proj, _ = cv2.projectPoints(obj_pts_m, rvec, tvec, K, dist)
     reproj_err = np.linalg.norm(proj.reshape(-1,2) - img_pts, axis=1).mean()
+    return pose_to_dict(rvec, tvec, reproj_err)
 
+def pose_to_dict(rvec: np.ndarray, tvec: np.ndarray, reproj_err: float) -> Dict[str, Any]:
+    """rvec/tvec → solve_pnp 반환 형식 dict"""
+    R, _ = cv2.Rodrigues(np.asarray(rvec, dtype=np.float64).reshape(3, 1))
+    roll, pitch, yaw = rot2euler_zyx(R)
     return {
-        "rvec": rvec.flatten().tolist(),
-        "tvec": tvec.flatten().tolist(),
+        "rvec": np.asarray(rvec).flatten().tolist(),
+        "tvec": np.asarray(tvec).flatten().tolist(),
         "R": R.tolist(),
         "roll_deg": float(np.degrees(roll)),
         "pitch_deg": float(np.degrees(pitch)),
@@ -399,6 +511,23 @@ def solve_pnp_from_files(ellipse_json_path: str,
         "reprojection_error_px": float(reproj_err)
     }
 
+def solve_pnp_from_files(ellipse_json_path: str,
+                         obj_points_json_path: Optional[str],
+                         K: np.ndarray,
+                         dist: np.ndarray,
+                         method: str = "IPPE") -> Optional[Dict[str, Any]]:
+    """
+    ellipse JSON + CAD 기준점 JSON + K,dist로 PnP 수행.
+    method: "IPPE" | "ITERATIVE" | "AP3P" | "RANSAC"
+    """
+    img_pts = collect_img_points_for_pnp(ellipse_json_path)
+    if img_pts is None:
+        print("[WARN] PnP 실패: 필요한 핀 좌표가 충분치 않습니다.")
+        return None
+
+    obj_pts_m = _objpts_cached(obj_points_json_path)
+    return solve_pnp(img_pts, obj_pts_m, K, dist, method=method)
+
 
 # ==============================
 # Main
@@ -426,11 +555,12 @@ if __name__ == "__main__":
     # 왜곡계수(예시는 0)
     dist = np.zeros(5, dtype=np.float64)
 
-    fitter = EllipseFitterModule(margin_px=5, canny_low=80, canny_high=200)
-
-    # 좌/우 처리
-    left_pack  = fitter.process_one_side("left",  LEFT_ORI,  LEFT_DIR,  LEFT_BBOX)
-    right_pack = fitter.process_one_side("right", RIGHT_ORI, RIGHT_DIR, RIGHT_BBOX)
+    # 좌/우 처리 (좌/우 + 박스 단위 병렬, max_workers=None이면 직렬)
+    with EllipseFitterModule(margin_px=5, canny_low=80, canny_high=200, max_workers=4) as fitter:
+        left_pack, right_pack = fitter.process_stereo_pair(
+            (LEFT_ORI,  LEFT_DIR,  LEFT_BBOX),
+            (RIGHT_ORI, RIGHT_DIR, RIGHT_BBOX),
+        )
 
     # (선택) PnP 계산: 좌/우 모두 시도
     left_ellipse_json  = left_pack["outputs"]["ellipse_json"]
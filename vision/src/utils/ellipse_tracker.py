@@ -0,0 +1,226 @@
+# ellipse_tracker.py
+# - 영상 스트림용 8핀 타원 추적기
+# - 첫 프레임(또는 추적 실패 시)은 EllipseFitterModule.fit_pins로 전체 검출
+# - 이후 프레임은 핀별 예측 위치 주변 작은 윈도우에서만 Canny → Contour → fitEllipse
+# - residual이 크거나 피팅 실패 시 전체 검출로 fallback
+# - 핀 이름(identity)은 이전 프레임 트랙에서 이어받고, 전체 검출 시에도
+#   예측 위치와 가까운 순서로 재연결 (top3/bottom3 재정렬에 의존하지 않음)
+
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ellipse_run_v2 import BoxItem, EllipseResult, EllipseFitterModule
+
+
+# class 0 박스 안에서 위치 정렬로 이름이 정해지는 핀들 (identity 재연결 대상)
+AC_PIN_GROUP = ["L2", "center", "L1", "CP", "PE", "CS"]
+
+
+# ==============================
+# Dataclasses
+# ==============================
+@dataclass
+class PinTrack:
+    name: str
+    ellipse: EllipseResult
+    vx: float = 0.0            # 프레임당 중심 이동량 (px)
+    vy: float = 0.0
+    tracked_frames: int = 0    # 연속 로컬 추적 성공 프레임 수
+
+    def predict(self) -> Tuple[float, float]:
+        return self.ellipse.cx + self.vx, self.ellipse.cy + self.vy
+
+
+# ==============================
+# Tracker
+# ==============================
+class PinEllipseTracker:
+    def __init__(self,
+                 fitter: Optional[EllipseFitterModule] = None,
+                 window_scale: float = 1.5,
+                 min_window_px: int = 8,
+                 max_residual: float = 30.0,
+                 max_size_change: float = 0.5,
+                 velocity_alpha: float = 0.5,
+                 min_pins: int = 4):
+        """
+        fitter: 전체 검출용 모듈 (스레드 풀도 함께 사용)
+        window_scale: 탐색 윈도우 반경 = window_scale * (이전 장축/2)
+        max_residual: 로컬 피팅 residual 상한 (넘으면 전체 검출로 fallback)
+        max_size_change: 이전 대비 장/단축 변화율 상한
+        velocity_alpha: 속도 추정 지수평활 계수
+        min_pins: 전체 검출 결과가 이 개수 미만이면 트랙을 초기화하지 않음 (PnP 최소 4점)
+        """
+        self.fitter = fitter or EllipseFitterModule()
+        self.window_scale = window_scale
+        self.min_window_px = min_window_px
+        self.max_residual = max_residual
+        self.max_size_change = max_size_change
+        self.velocity_alpha = velocity_alpha
+        self.min_pins = min_pins
+
+        self.tracks: Dict[str, PinTrack] = {}
+        self.n_local = 0       # 로컬 추적으로 끝난 프레임 수
+        self.n_full = 0        # 전체 검출을 수행한 프레임 수
+
+    def reset(self):
+        self.tracks = {}
+
+    # ------------------------------
+    # Local window fitting
+    # ------------------------------
+    def _window(self, track: PinTrack, w: int, h: int) -> List[int]:
+        px, py = track.predict()
+        r = max(self.min_window_px,
+                self.window_scale * 0.5 * max(track.ellipse.major, track.ellipse.minor))
+        x1 = int(np.clip(px - r, 0, w - 1))
+        y1 = int(np.clip(py - r, 0, h - 1))
+        x2 = int(np.clip(px + r, x1 + 1, w))
+        y2 = int(np.clip(py + r, y1 + 1, h))
+        return [x1, y1, x2, y2]
+
+    def _fit_window(self, img_bgr, track: PinTrack) -> Optional[EllipseResult]:
+        h, w = img_bgr.shape[:2]
+        x1, y1, x2, y2 = self._window(track, w, h)
+        gray = cv2.cvtColor(img_bgr[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+
+        # ellipse_run_v2._fit_one_box와 같은 전처리
+        blur = cv2.GaussianBlur(gray, (3, 3), 0)
+        edges = cv2.Canny(blur, 10, 60)
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        px, py = track.predict()
+        prev = track.ellipse
+        best, best_cost = None, None
+        for cnt in contours:
+            if len(cnt) < 5:
+                continue
+            (cx_e, cy_e), (major, minor), angle_deg = cv2.fitEllipse(cnt)
+            cx_e += x1
+            cy_e += y1
+            # 크기가 급변한 후보는 다른 구조물로 간주
+            if abs(major - prev.major) > self.max_size_change * prev.major or \
+               abs(minor - prev.minor) > self.max_size_change * prev.minor:
+                continue
+            cost = np.hypot(cx_e - px, cy_e - py)
+            if best_cost is None or cost < best_cost:
+                best, best_cost = ((cx_e, cy_e), (major, minor), angle_deg), cost
+        if best is None:
+            return None
+
+        # residual: 윈도우 내부만 (전역 edges와 같은 Canny 임계값)
+        (cx_e, cy_e), (major, minor), angle_deg = best
+        edges_win = cv2.Canny(gray, self.fitter.canny_low, self.fitter.canny_high)
+        ell_mask = np.zeros_like(edges_win)
+        cv2.ellipse(ell_mask, ((cx_e - x1, cy_e - y1), (major, minor), angle_deg), 255, 1)
+        residual = float(np.mean(cv2.absdiff(ell_mask, edges_win)))
+
+        return EllipseResult(
+            cls=prev.cls,
+            confidence=prev.confidence,
+            bbox=[x1, y1, x2, y2],
+            cx=float(cx_e),
+            cy=float(cy_e),
+            major=float(major),
+            minor=float(minor),
+            angle_deg=float(angle_deg),
+            residual=residual
+        )
+
+    def _track_local(self, img_bgr) -> Optional[Dict[str, EllipseResult]]:
+        names = list(self.tracks)
+        fitted = self.fitter._map(self._fit_window, [(img_bgr, self.tracks[n]) for n in names])
+        out: Dict[str, EllipseResult] = {}
+        for name, res in zip(names, fitted):
+            if res is None or res.residual > self.max_residual:
+                return None
+            out[name] = res
+        return out
+
+    # ------------------------------
+    # Full detection + identity
+    # ------------------------------
+    def _associate(self, detected: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        전체 검출 결과의 AC 핀 이름을 이전 트랙 예측 위치 기준으로 다시 붙인다.
+        (거리 오름차순 greedy 매칭, DC-/DC+는 class id로 정해지므로 그대로)
+        """
+        group = [n for n in AC_PIN_GROUP if n in detected]
+        prev = [n for n in AC_PIN_GROUP if n in self.tracks]
+        if not group or not prev:
+            return detected
+
+        det_xy = np.array([[detected[n]["cx"], detected[n]["cy"]] for n in group])
+        pred_xy = np.array([self.tracks[n].predict() for n in prev])
+        cost = np.linalg.norm(det_xy[:, None, :] - pred_xy[None, :, :], axis=2)
+
+        out = {k: v for k, v in detected.items() if k not in AC_PIN_GROUP}
+        used_det, used_prev = set(), set()
+        for flat in np.argsort(cost, axis=None):
+            i, j = np.unravel_index(flat, cost.shape)
+            if i in used_det or j in used_prev:
+                continue
+            out[prev[j]] = detected[group[i]]
+            used_det.add(i)
+            used_prev.add(j)
+
+        # 트랙과 연결되지 못한 검출은 정렬로 붙은 이름 중 빈 자리에 유지
+        for i, n in enumerate(group):
+            if i not in used_det and n not in out:
+                out[n] = detected[n]
+        return out
+
+    def _full_detect(self, img_bgr, boxes: Optional[List[BoxItem]]) -> Optional[Dict[str, EllipseResult]]:
+        if not boxes:
+            return None
+        self.n_full += 1
+        detected = self.fitter.fit_pins(img_bgr, boxes)
+        if self.tracks:
+            detected = self._associate(detected)
+        if len(detected) < self.min_pins and not self.tracks:
+            return None
+        return {name: EllipseResult(**d) for name, d in detected.items()}
+
+    # ------------------------------
+    # Public API
+    # ------------------------------
+    def _commit(self, results: Dict[str, EllipseResult], local: bool):
+        a = self.velocity_alpha
+        new_tracks: Dict[str, PinTrack] = {}
+        for name, res in results.items():
+            old = self.tracks.get(name)
+            if old is None:
+                new_tracks[name] = PinTrack(name=name, ellipse=res)
+                continue
+            vx = a * (res.cx - old.ellipse.cx) + (1 - a) * old.vx
+            vy = a * (res.cy - old.ellipse.cy) + (1 - a) * old.vy
+            new_tracks[name] = PinTrack(
+                name=name, ellipse=res, vx=vx, vy=vy,
+                tracked_frames=old.tracked_frames + 1 if local else 0,
+            )
+        self.tracks = new_tracks
+
+    def update(self, img_bgr, boxes: Optional[List[BoxItem]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        한 프레임 처리. 반환 형식은 EllipseFitterModule.fit_pins와 동일
+        ({핀 이름: EllipseResult dict}). 추적/검출 모두 실패하면 빈 dict.
+        boxes: 현재 프레임 YOLO bbox (전체 검출 fallback 시에만 사용)
+        """
+        results = self._track_local(img_bgr) if self.tracks else None
+        local = results is not None
+        if local:
+            self.n_local += 1
+        else:
+            results = self._full_detect(img_bgr, boxes)
+            if results is None:
+                self.reset()
+                return {}
+
+        self._commit(results, local)
+        return {name: asdict(res) for name, res in results.items()}
+
+    def stats(self) -> Dict[str, int]:
+        return {"local_frames": self.n_local, "full_frames": self.n_full, "tracks": len(self.tracks)}
@@ -1,43 +1,83 @@
 import json
 import os
 
-def merge_left_right(left_json_path, right_json_path, save_path="vision/inference/result/ellipse_centers.json"):
-    # --- 파일 로드 ---
-    with open(left_json_path, "r") as f:
-        left_data = json.load(f)
-    with open(right_json_path, "r") as f:
-        right_data = json.load(f)
+import cv2
+import numpy as np
 
-    left_results = left_data["results"]
-    right_results = right_data["results"]
+from ellipse_run_v2 import PIN_ORDER
+from stereo_matching import match_stereo
+from stereo_rectify import get_rectifier
 
-    merged = {"left": [], "right": []}
 
-    # --- 클래스별 매칭 (cls 기준) ---
-    for l_obj in left_results:
-        l_cls = l_obj["cls"]
-        l_cx, l_cy = l_obj["cx"], l_obj["cy"]
+def _load(data_or_path):
+    if isinstance(data_or_path, dict):
+        return data_or_path
+    with open(data_or_path, "r") as f:
+        return json.load(f)
+
 
-        # 오른쪽 JSON에서 같은 class 찾기
-        matched = next((r for r in right_results if r["cls"] == l_cls), None)
-        if matched is None:
-            print(f"⚠️ class {l_cls} : 오른쪽 이미지에서 대응 객체 없음 → skip")
-            continue
+def _candidates(data):
+    """
+    타원 결과 → (클래스 목록, (N,2) 중심)
+    - "results": ellipse_fitting 형식 [{cls, cx, cy, ...}] (클래스당 후보 여러 개 가능)
+    - "points" : ellipse_run_v2 형식 {핀 이름: {cx, cy, ...}} → 클래스 = PIN_ORDER 인덱스
+    """
+    if "results" in data:
+        items = data["results"]
+        cls = [r["cls"] for r in items]
+        pts = [[r["cx"], r["cy"]] for r in items]
+    else:
+        names = [n for n in PIN_ORDER if n in data.get("points", {})]
+        cls = [PIN_ORDER.index(n) for n in names]
+        pts = [[data["points"][n]["cx"], data["points"][n]["cy"]] for n in names]
+    return cls, np.array(pts, dtype=np.float64).reshape(-1, 2)
 
-        r_cx, r_cy = matched["cx"], matched["cy"]
 
-        merged["left"].append({"class": l_cls, "center": [l_cx, l_cy]})
-        merged["right"].append({"class": l_cls, "center": [r_cx, r_cy]})
+def merge_left_right(left_json_path, right_json_path, save_path="vision/inference/result/ellipse_centers.json",
+                     rectifier=None, max_dy=3.0, d_range=(0.0, np.inf)):
+    """
+    left/right_json_path: 타원 결과 JSON 경로 또는 이미 로드된 dict
+    rectifier: StereoRectifier 등 (있으면 정렬 좌표에서 epipolar 비용 계산)
+    max_dy: 정렬 좌표 |yL - yR| 허용치 — rectifier 가 없으면 원본 좌표라 y 게이트 끔
+    save_path: None이면 파일 저장 생략 (삼각측량에 바로 넘길 때)
+    반환: 기존 병합 dict {"left": [...], "right": [...]} + "match" (stereo_matching 결과, 리스트로 변환 → JSON 가능)
+    """
+    # --- 파일 로드 ---
+    left_cls, left_pts = _candidates(_load(left_json_path))
+    right_cls, right_pts = _candidates(_load(right_json_path))
+
+    # --- 클래스별 epipolar 매칭 ---
+    if rectifier is None:
+        max_dy = np.inf
+    match = match_stereo(left_cls, left_pts, right_cls, right_pts,
+                         rectifier=rectifier, max_dy=max_dy, d_range=d_range)
+
+    unmatched = sorted(set(left_cls) - set(match["cls"].tolist()))
+    for c in unmatched:
+        print(f"⚠️ class {c} : 오른쪽 이미지에서 대응 객체 없음 → skip")
+
+    merged = {"left": [], "right": []}
+    for c, pl, pr in zip(match["cls"].tolist(), match["pts_left"].tolist(), match["pts_right"].tolist()):
+        merged["left"].append({"class": c, "center": pl})
+        merged["right"].append({"class": c, "center": pr})
 
     # --- 저장 ---
-    os.makedirs(os.path.dirname(save_path), exist_ok=True)
-    with open(save_path, "w") as f:
-        json.dump(merged, f, indent=2)
-    print(f"병합 완료 → {save_path}")
+    if save_path:
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        with open(save_path, "w") as f:
+            json.dump(merged, f, indent=2)
+        print(f"병합 완료 → {save_path}")
+    merged["match"] = {k: v.tolist() for k, v in match.items()}
     return merged
 
 
 if __name__ == "__main__":
     left_json_path = "vision/Inference/image/detect_left_view/left_view_left_ellipse.json"
     right_json_path = "vision/Inference/image/detect_right_view/right_view_right_ellipse.json"
-    merge_left_right(left_json_path, right_json_path)
+    calib_file = "vision/Inference/config/stereo_calib.yaml"
+    left_img = "vision/Inference/image/original_left_view/left_view.png"
+
+    # 정렬 좌표에서 y 게이트를 쓰기 위해 rectifier 생성 (점만 정렬 → remap 맵 불필요)
+    h, w = cv2.imread(left_img).shape[:2]
+    rectifier = get_rectifier(calib_file, (w, h), lazy_maps=True)
+    merge_left_right(left_json_path, right_json_path, rectifier=rectifier)
@@ -0,0 +1,158 @@
+# pnp_tracker.py
+# - 스트리밍용 상태 유지 PnP (PnPTracker)
+#   * CAD 기준점(vision/config/ccs_type1_reference.json)은 생성 시 1회만 로드
+#   * 이미지 좌표는 (8,2) 배열로 직접 입력 (JSON 파일 왕복 없음, 누락 핀은 NaN)
+#   * 이전 프레임 rvec/tvec를 useExtrinsicGuess 로 넘겨 ITERATIVE / LM 으로 미세 보정
+#   * 재투영 오차가 튀면 IPPE 콜드 스타트 → 그래도 크면 RANSAC
+# - 오프라인 평가용 배치 모드: 프레임 순서대로 warm-start 풀이, 재투영 오차는 update() 결과 재사용
+
+import os
+from typing import Dict, Any, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ellipse_run_v2 import PIN_ORDER, to_objpts_from_json, pose_to_dict
+
+
+DEFAULT_OBJPOINTS_JSON = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "config", "ccs_type1_reference.json"
+)
+
+
+# ==============================
+# Tracker
+# ==============================
+class PnPTracker:
+    def __init__(self,
+                 K: np.ndarray,
+                 dist: Optional[np.ndarray] = None,
+                 obj_points_json: Optional[str] = DEFAULT_OBJPOINTS_JSON,
+                 refine: str = "ITERATIVE",
+                 max_reproj_px: float = 4.0,
+                 jump_px: float = 2.0,
+                 ransac_iters: int = 200,
+                 ransac_reproj_px: float = 2.0):
+        """
+        refine: warm-start 방식 "ITERATIVE" (solvePnP + useExtrinsicGuess) | "LM" (solvePnPRefineLM)
+        max_reproj_px: 이 값 이하면 무조건 수용
+        jump_px: 직전 오차 + jump_px 를 넘으면 '튄 것'으로 보고 콜드 스타트
+                 (직전 오차는 max_reproj_px 로 상한 → 나쁜 프레임이 기준을 계속 올리지 않음)
+        """
+        self.K = np.asarray(K, dtype=np.float64)
+        self.dist = np.zeros(5) if dist is None else np.asarray(dist, dtype=np.float64)
+        self.obj_pts = to_objpts_from_json(obj_points_json)   # (8,3) m, PIN_ORDER 순서
+        self.refine = refine.upper()
+        self.max_reproj_px = max_reproj_px
+        self.jump_px = jump_px
+        self.ransac_iters = ransac_iters
+        self.ransac_reproj_px = ransac_reproj_px
+
+        self.rvec: Optional[np.ndarray] = None
+        self.tvec: Optional[np.ndarray] = None
+        self.last_err: Optional[float] = None
+        self.counts = {"warm": 0, "cold": 0, "ransac": 0, "fail": 0}
+
+    def reset(self):
+        self.rvec = self.tvec = self.last_err = None
+
+    def _reproj(self, obj, img, rvec, tvec) -> float:
+        proj, _ = cv2.projectPoints(obj, rvec, tvec, self.K, self.dist)
+        return float(np.linalg.norm(proj.reshape(-1, 2) - img, axis=1).mean())
+
+    def _accept(self, err: float) -> bool:
+        if err <= self.max_reproj_px:
+            return True
+        if self.last_err is None:
+            return False
+        return err <= min(self.last_err, self.max_reproj_px) + self.jump_px
+
+    def _warm(self, obj, img) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        rvec, tvec = self.rvec.copy(), self.tvec.copy()
+        if self.refine == "LM":
+            rvec, tvec = cv2.solvePnPRefineLM(obj, img, self.K, self.dist, rvec, tvec)
+            return rvec, tvec
+        ok, rvec, tvec = cv2.solvePnP(obj, img, self.K, self.dist, rvec, tvec,
+                                      useExtrinsicGuess=True, flags=cv2.SOLVEPNP_ITERATIVE)
+        return (rvec, tvec) if ok else None
+
+    def update(self, img_pts: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        img_pts: (8,2) PIN_ORDER 순서 픽셀 좌표 (누락 핀은 NaN, 최소 4점)
+        반환: solve_pnp 와 같은 dict + "mode" ("warm" | "cold" | "ransac"), 실패 시 None
+        """
+        img_pts = np.asarray(img_pts, dtype=np.float64).reshape(-1, 2)
+        valid = np.all(np.isfinite(img_pts), axis=1)
+        if valid.sum() < 4:
+            self.counts["fail"] += 1
+            self.reset()
+            return None
+        obj = np.ascontiguousarray(self.obj_pts[valid])
+        img = np.ascontiguousarray(img_pts[valid])
+
+        # 1) warm start
+        if self.rvec is not None:
+            sol = self._warm(obj, img)
+            if sol is not None:
+                err = self._reproj(obj, img, *sol)
+                if self._accept(err):
+                    return self._store(*sol, err, "warm")
+
+        # 2) cold start (평면 타깃 → IPPE)
+        ok, rvec, tvec = cv2.solvePnP(obj, img, self.K, self.dist, flags=cv2.SOLVEPNP_IPPE)
+        if ok:
+            err = self._reproj(obj, img, rvec, tvec)
+            if err <= self.max_reproj_px:
+                return self._store(rvec, tvec, err, "cold")
+
+        # 3) 오차가 튄 경우에만 RANSAC
+        ok_r, rvec_r, tvec_r, _ = cv2.solvePnPRansac(
+            obj, img, self.K, self.dist,
+            iterationsCount=self.ransac_iters, reprojectionError=self.ransac_reproj_px,
+            flags=cv2.SOLVEPNP_AP3P
+        )
+        if ok_r:
+            err_r = self._reproj(obj, img, rvec_r, tvec_r)
+            if not ok or err_r < err:
+                return self._store(rvec_r, tvec_r, err_r, "ransac")
+        if ok:
+            return self._store(rvec, tvec, err, "cold")
+
+        self.counts["fail"] += 1
+        self.reset()
+        return None
+
+    def _store(self, rvec, tvec, err: float, mode: str) -> Dict[str, Any]:
+        self.rvec = np.asarray(rvec, dtype=np.float64).reshape(3, 1)
+        self.tvec = np.asarray(tvec, dtype=np.float64).reshape(3, 1)
+        self.last_err = err
+        self.counts[mode] += 1
+        pose = pose_to_dict(self.rvec, self.tvec, err)
+        pose["mode"] = mode
+        return pose
+
+    # ------------------------------
+    # Offline batch
+    # ------------------------------
+    def solve_batch(self, img_pts: np.ndarray, warm_start: bool = True) -> Dict[str, np.ndarray]:
+        """
+        img_pts: (F,8,2) 프레임별 핀 좌표 (NaN 허용)
+        warm_start: True면 프레임 순서대로 이전 해를 초기값으로 사용 (연속 시퀀스용)
+        반환: rvec (F,3), tvec (F,3), reproj (F,), ok (F,) — 실패 프레임은 NaN / False
+        """
+        img_pts = np.asarray(img_pts, dtype=np.float64).reshape(-1, len(PIN_ORDER), 2)
+        F = len(img_pts)
+        rvecs = np.full((F, 3), np.nan)
+        tvecs = np.full((F, 3), np.nan)
+        reproj = np.full(F, np.nan)
+        self.reset()
+        for i in range(F):
+            if not warm_start:
+                self.reset()
+            if self.update(img_pts[i]) is not None:
+                rvecs[i] = self.rvec.ravel()
+                tvecs[i] = self.tvec.ravel()
+                reproj[i] = self.last_err      # update() 에서 이미 계산한 재투영 오차 (유효 핀 기준)
+
+        ok = np.all(np.isfinite(rvecs), axis=1)
+        return {"rvec": rvecs, "tvec": tvecs, "reproj": reproj, "ok": ok}
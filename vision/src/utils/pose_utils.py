@@ -6,12 +6,123 @@ Key API:
     - from_matrix(matrix) -> (position, quaternion)
     - relative_pose(t_world_tcp, t_world_socket) -> dict with position/orientation
 
+Batched counterparts (leading N axis, no Python loops):
+    - quat_to_matrix_batch((N,4)) -> (N,3,3)
+    - matrix_to_quat_batch((N,3,3)) -> (N,4)
+    - to_matrix_batch((N,3), (N,4)) -> (N,4,4)
+    - from_matrix_batch((N,4,4)) -> ((N,3), (N,4))
+    - invert_rigid_batch / compose_batch / relative_pose_batch
+
 All quaternions are in (x, y, z, w) order.
 """
 
 import numpy as np
 
 
+# ---------------------------------------------------------------------------
+# Batched pose math
+# ---------------------------------------------------------------------------
+def quat_to_matrix_batch(q):
+    """Convert (N,4) quaternions (x, y, z, w) to (N,3,3) rotation matrices."""
+    q = np.asarray(q, dtype=float).reshape(-1, 4)
+    x, y, z, w = q.T
+    xx, yy, zz = x * x, y * y, z * z
+    xy, xz, yz = x * y, x * z, y * z
+    wx, wy, wz = w * x, w * y, w * z
+
+    return np.stack(
+        [
+            1 - 2 * (yy + zz), 2 * (xy - wz), 2 * (xz + wy),
+            2 * (xy + wz), 1 - 2 * (xx + zz), 2 * (yz - wx),
+            2 * (xz - wy), 2 * (yz + wx), 1 - 2 * (xx + yy),
+        ],
+        axis=1,
+    ).reshape(-1, 3, 3)
+
+
+def matrix_to_quat_batch(R):
+    """
+    Convert (N,3,3) rotation matrices to (N,4) quaternions (x, y, z, w).
+
+    Branch-free version of the classic trace / largest-diagonal method. Row c of
+    the symmetric matrix K below equals 4*q_c*q for the (x, y, z, w) candidate c,
+    so the stable candidate is picked per pose with np.where (same case order as
+    the scalar implementation) and scaled by 1 / (2*sqrt(K[c, c])).
+    """
+    m = np.asarray(R, dtype=float).reshape(-1, 3, 3)
+    m00, m01, m02, m10, m11, m12, m20, m21, m22 = m.reshape(-1, 9).T
+
+    k = np.stack(
+        [
+            1 + m00 - m11 - m22, m01 + m10, m02 + m20, m21 - m12,
+            m01 + m10, 1 - m00 + m11 - m22, m12 + m21, m02 - m20,
+            m02 + m20, m12 + m21, 1 - m00 - m11 + m22, m10 - m01,
+            m21 - m12, m02 - m20, m10 - m01, 1 + m00 + m11 + m22,
+        ],
+        axis=1,
+    ).reshape(-1, 4, 4)
+
+    # 3 = w (trace > 0), else 0/1/2 = x/y/z by largest diagonal element
+    case = np.where(m00 + m11 + m22 > 0, 3,
+                    np.where((m00 > m11) & (m00 > m22), 0,
+                             np.where(m11 > m22, 1, 2)))
+    idx = np.arange(len(k))
+    row = k[idx, case]
+    return row / (2.0 * np.sqrt(row[idx, case]))[:, None]
+
+
+def to_matrix_batch(position, quaternion):
+    """Build (N,4,4) homogeneous matrices from (N,3) positions and (N,4) quaternions."""
+    pos = np.asarray(position, dtype=float).reshape(-1, 3)
+    t = np.zeros((len(pos), 4, 4), dtype=float)
+    t[:, :3, :3] = quat_to_matrix_batch(quaternion)
+    t[:, :3, 3] = pos
+    t[:, 3, 3] = 1.0
+    return t
+
+
+def from_matrix_batch(matrix):
+    """Decompose (N,4,4) homogeneous matrices into ((N,3) positions, (N,4) quaternions)."""
+    m = np.asarray(matrix, dtype=float).reshape(-1, 4, 4)
+    return m[:, :3, 3].copy(), matrix_to_quat_batch(m[:, :3, :3])
+
+
+def invert_rigid_batch(t):
+    """Closed-form inverse of (N,4,4) rigid transforms: [R^T, -R^T t]."""
+    t = np.asarray(t, dtype=float).reshape(-1, 4, 4)
+    rt = np.swapaxes(t[:, :3, :3], 1, 2)
+    inv = np.zeros_like(t)
+    inv[:, :3, :3] = rt
+    inv[:, :3, 3] = -np.einsum("nij,nj->ni", rt, t[:, :3, 3])
+    inv[:, 3, 3] = 1.0
+    return inv
+
+
+def compose_batch(a, b):
+    """Batched a @ b for (N,4,4) (or broadcastable (1,4,4)) transforms."""
+    return np.einsum("nij,njk->nik", np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+
+
+def relative_pose_batch(t_world_tcp, t_world_socket):
+    """
+    T_tcp_socket = inverse(T_world_tcp) · T_world_socket for N poses.
+
+    Returns:
+        position: (N,3), quaternion: (N,4) in (x, y, z, w)
+    """
+    return from_matrix_batch(compose_batch(invert_rigid_batch(t_world_tcp),
+                                           np.asarray(t_world_socket, dtype=float).reshape(-1, 4, 4)))
+
+
+def relative_pose_from_components_batch(tcp_pos, tcp_quat, socket_pos, socket_quat):
+    """Batched relative_pose_from_components: (N,3)/(N,4) inputs -> ((N,3), (N,4))."""
+    return relative_pose_batch(to_matrix_batch(tcp_pos, tcp_quat),
+                               to_matrix_batch(socket_pos, socket_quat))
+
+
+# ---------------------------------------------------------------------------
+# Single-pose API (scalar fast path — numpy batch overhead dominates at N=1)
+# ---------------------------------------------------------------------------
 def _quat_to_matrix(q):
     """Convert quaternion (x, y, z, w) to 3x3 rotation matrix."""
     x, y, z, w = q
@@ -113,3 +224,33 @@ def relative_pose_from_components(tcp_pos, tcp_quat, socket_pos, socket_quat):
     t_world_tcp = to_matrix(tcp_pos, tcp_quat)
     t_world_socket = to_matrix(socket_pos, socket_quat)
     return relative_pose(t_world_tcp, t_world_socket)
+
+
+if __name__ == "__main__":
+    # Benchmark: scalar relative_pose_from_components loop vs batched GT computation
+    import time
+
+    rng = np.random.default_rng(0)
+    n = 100_000
+    q1 = rng.normal(size=(n, 4))
+    q1 /= np.linalg.norm(q1, axis=1, keepdims=True)
+    q2 = rng.normal(size=(n, 4))
+    q2 /= np.linalg.norm(q2, axis=1, keepdims=True)
+    p1 = rng.uniform(-1, 1, (n, 3))
+    p2 = rng.uniform(-1, 1, (n, 3))
+
+    n_loop = 5_000
+    t0 = time.perf_counter()
+    loop = [relative_pose_from_components(p1[i], q1[i], p2[i], q2[i]) for i in range(n_loop)]
+    t_loop = (time.perf_counter() - t0) / n_loop
+
+    t0 = time.perf_counter()
+    pos, quat = relative_pose_from_components_batch(p1, q1, p2, q2)
+    t_batch = (time.perf_counter() - t0) / n
+
+    pos_ref = np.array([r["position"] for r in loop])
+    quat_ref = np.array([r["orientation"] for r in loop])
+    print(f"loop : {t_loop * 1e6:8.2f} us/pose")
+    print(f"batch: {t_batch * 1e6:8.2f} us/pose  ({t_loop / t_batch:.0f}x)")
+    print("max |dpos| :", np.abs(pos[:n_loop] - pos_ref).max())
+    print("max |dquat|:", np.abs(quat[:n_loop] - quat_ref).max())
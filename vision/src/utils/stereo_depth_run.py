@@ -5,6 +5,9 @@ import numpy as np
 import os
 import sys
 
+from stereo_rectify import get_rectifier
+from depth_io import save_disparity
+
 def generate_stereo_yaml_from_json(json_path, calib_path):
     with open(json_path, "r") as f:
         params = json.load(f)
@@ -52,21 +55,8 @@ def generate_stereo_yaml_from_json(json_path, calib_path):
 
 
 
-def compute_depth_map(left_img_path, right_img_path, calib_file):
-    fs = cv2.FileStorage(calib_file, cv2.FILE_STORAGE_READ)
-    K1 = fs.getNode("K1").mat()
-    D1 = fs.getNode("D1").mat()
-    K2 = fs.getNode("K2").mat()
-    D2 = fs.getNode("D2").mat()
-    R = fs.getNode("R").mat()
-    T = fs.getNode("T").mat()
-    Q = fs.getNode("Q").mat()
-    fs.release()
-
-    # 🔹 T 형상 수정
-    if T.shape == (1, 3):
-        T = T.T
-
+def compute_depth_map(left_img_path, right_img_path, calib_file,
+                      out_dir="vision/Inference/image/depth_map", disp_format="npy"):
     imgL = cv2.imread(left_img_path)
     imgR = cv2.imread(right_img_path)
     if imgL is None or imgR is None:
@@ -74,11 +64,10 @@ def compute_depth_map(left_img_path, right_img_path, calib_file):
         sys.exit(1)
 
     h, w = imgL.shape[:2]
-    R1, R2, P1, P2, Q, _, _ = cv2.stereoRectify(K1, D1, K2, D2, (w, h), R, T, alpha=0)
-    mapLx, mapLy = cv2.initUndistortRectifyMap(K1, D1, R1, P1, (w, h), cv2.CV_32FC1)
-    mapRx, mapRy = cv2.initUndistortRectifyMap(K2, D2, R2, P2, (w, h), cv2.CV_32FC1)
-    rectL = cv2.remap(imgL, mapLx, mapLy, cv2.INTER_LINEAR)
-    rectR = cv2.remap(imgR, mapRx, mapRy, cv2.INTER_LINEAR)
+    # 정렬 맵은 캘리브레이션당 1회 생성 후 디스크 캐시(mmap) / 프로세스 내 재사용
+    rectifier = get_rectifier(calib_file, (w, h))
+    Q = rectifier.Q
+    rectL, rectR = rectifier.rectify(imgL, imgR)
 
     matcher = cv2.StereoSGBM_create(
         minDisparity=0,
@@ -97,9 +86,17 @@ def compute_depth_map(left_img_path, right_img_path, calib_file):
     points_3D = cv2.reprojectImageTo3D(disp, Q)
     depth_map = points_3D[:, :, 2]
 
+    # 실제 시차값 저장 (float .npy / 16-bit PNG + Q·캘리브레이션 해시 사이드카)
+    # → 후단(stereo_point_reconstruct 등)은 SGBM 재계산 없이 mmap 으로 재사용
+    disp_path = save_disparity(os.path.join(out_dir, "disparity"), disp, Q,
+                               calib_key=rectifier.key, fmt=disp_format,
+                               min_disparity=0, num_disparities=96)
+    print(f"✅ disparity saved → {disp_path}")
+
+    # 시각화용 (이미지별 MIN-MAX 정규화라 값 복원 불가)
     disp_vis = cv2.normalize(disp, None, 0, 255, cv2.NORM_MINMAX)
     disp_vis = np.uint8(disp_vis)
-    cv2.imwrite("vision/Inference/image/depth_map/depth_map.png", disp_vis)
+    cv2.imwrite(os.path.join(out_dir, "depth_map.png"), disp_vis)
     print("✅ depth_map.png saved")
 
     return disp, depth_map, points_3D
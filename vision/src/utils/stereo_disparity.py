@@ -0,0 +1,383 @@
+# stereo_disparity.py
+# - 정렬된 스테레오 쌍에서 충전구 주변만 SGBM 수행하는 DisparityEngine
+#   (a) 검출 박스 주변 가로 띠(band)만 매칭, 탐색 범위는 예상 깊이 z_min~z_max 에서 유도
+#   (b) (선택) 축소 영상으로 먼저 돌려 minDisparity/numDisparities 창을 좁힌 뒤 원본 해상도 수행
+# - 결과는 박스 영역의 float 시차(px)만 반환 (무효 픽셀은 NaN)
+# - TiledSGBM: 전체 프레임이 필요할 때 가로 띠(strip) + 상하 overlap 으로 나눠
+#   스레드 풀에서 병렬 SGBM 후 overlap 을 버리고 이어 붙임 (단일 호출과 허용오차 내 일치)
+# - __main__: 전체 프레임 SGBM 대비 벤치마크 (ROI / tiled 스레드 수별)
+#
+# 사용 예:
+#   python vision/src/utils/stereo_disparity.py --left L.png --right R.png --boxes L_bbox.json
+#   python vision/src/utils/stereo_disparity.py --tiled --threads 1 2 4 8 16
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional, Any
+
+import cv2
+import numpy as np
+
+
+# compute_depth_map 과 같은 SGBM 설정
+SGBM_BLOCK_SIZE = 5
+SGBM_PARAMS = dict(
+    uniquenessRatio=10,
+    speckleWindowSize=50,
+    speckleRange=2,
+    preFilterCap=63,
+    mode=cv2.STEREO_SGBM_MODE_SGBM_3WAY,
+)
+
+
+def make_sgbm(min_disparity: int, num_disparities: int, block_size: int = SGBM_BLOCK_SIZE, channels: int = 3):
+    return cv2.StereoSGBM_create(
+        minDisparity=int(min_disparity),
+        numDisparities=int(num_disparities),
+        blockSize=block_size,
+        P1=8 * channels * block_size**2,
+        P2=32 * channels * block_size**2,
+        **SGBM_PARAMS,
+    )
+
+def round_up16(n: float) -> int:
+    return max(16, int(np.ceil(n / 16.0)) * 16)
+
+def disparity_range_for_depth(fx: float, baseline: float, z_min: float, z_max: float,
+                              margin_px: int = 4) -> Tuple[int, int]:
+    """
+    깊이 범위 [z_min, z_max] (m) → SGBM (minDisparity, numDisparities)
+    d = fx * B / Z, numDisparities는 16의 배수
+    """
+    d_lo = fx * baseline / z_max
+    d_hi = fx * baseline / z_min
+    min_d = max(0, int(np.floor(d_lo)) - margin_px)
+    num_d = round_up16(np.ceil(d_hi) + margin_px - min_d)
+    return min_d, num_d
+
+
+# ==============================
+# Result
+# ==============================
+@dataclass
+class RoiDisparity:
+    box: List[int]              # 정렬 영상 기준 [x1,y1,x2,y2]
+    min_disparity: int
+    num_disparities: int
+    disparity: np.ndarray       # (y2-y1, x2-x1) float32, 무효 = NaN
+
+    def median(self) -> float:
+        valid = self.disparity[np.isfinite(self.disparity)]
+        return float(np.median(valid)) if valid.size else float("nan")
+
+
+# ==============================
+# Engine
+# ==============================
+class DisparityEngine:
+    def __init__(self,
+                 fx: float,
+                 baseline: float,
+                 z_range: Tuple[float, float] = (0.1, 1.5),
+                 block_size: int = SGBM_BLOCK_SIZE,
+                 pad_px: int = 8,
+                 coarse_scale: int = 0,
+                 coarse_margin_px: int = 6):
+        """
+        fx, baseline: 정렬 후 초점거리(px) / 기선(m)
+        z_range: 예상 깊이 범위 (m) → 탐색 시차 범위
+        pad_px: 박스 상하좌우 여유 (SGBM 블록/집계 창 보호)
+        coarse_scale: 0이면 끔, 2/4 등이면 축소 패스로 시차 창을 먼저 좁힘
+        coarse_margin_px: 축소 패스에서 찾은 범위에 더할 여유 (원본 px)
+        """
+        self.fx = fx
+        self.baseline = baseline
+        self.block_size = block_size
+        self.pad = pad_px
+        self.coarse_scale = coarse_scale
+        self.coarse_margin = coarse_margin_px
+        self.min_d, self.num_d = disparity_range_for_depth(fx, baseline, z_range[0], z_range[1])
+        self._matchers: Dict[Tuple[int, int, int], cv2.StereoSGBM] = {}
+
+    @classmethod
+    def from_rectifier(cls, rectifier, **kwargs) -> "DisparityEngine":
+        """StereoRectifier(P1/P2)에서 fx, baseline 추출"""
+        fx = float(rectifier.P1[0, 0])
+        baseline = float(-rectifier.P2[0, 3] / rectifier.P2[0, 0])
+        return cls(fx, baseline, **kwargs)
+
+    def _matcher(self, min_d: int, num_d: int, channels: int):
+        key = (min_d, num_d, channels)
+        if key not in self._matchers:
+            self._matchers[key] = make_sgbm(min_d, num_d, self.block_size, channels)
+        return self._matchers[key]
+
+    def _band_disparity(self, rectL, rectR, box: List[int], min_d: int, num_d: int,
+                        scale: int = 1) -> np.ndarray:
+        """
+        box 주변 띠만 잘라 SGBM. 오른쪽 탐색 구간(x - d)과 SGBM 왼쪽 무효 구간을 위해
+        왼쪽으로 min_d + num_d 만큼 더 포함해서 자른다. 반환은 box 영역 float 시차 (원본 px).
+        """
+        h, w = rectL.shape[:2]
+        x1, y1, x2, y2 = box
+        by1, by2 = max(0, y1 - self.pad), min(h, y2 + self.pad)
+        bx1, bx2 = max(0, x1 - self.pad - min_d - num_d), min(w, x2 + self.pad)
+        L = rectL[by1:by2, bx1:bx2]
+        R = rectR[by1:by2, bx1:bx2]
+
+        if scale > 1:
+            size = (max(1, L.shape[1] // scale), max(1, L.shape[0] // scale))
+            L = cv2.resize(L, size, interpolation=cv2.INTER_AREA)
+            R = cv2.resize(R, size, interpolation=cv2.INTER_AREA)
+            min_d_s, num_d_s = min_d // scale, round_up16(num_d / scale)
+        else:
+            min_d_s, num_d_s = min_d, num_d
+
+        channels = 1 if L.ndim == 2 else L.shape[2]
+        raw = self._matcher(min_d_s, num_d_s, channels).compute(L, R)
+        disp = raw.astype(np.float32) / 16.0
+        disp[raw < min_d_s * 16] = np.nan       # SGBM 무효값 (minDisparity-1)*16
+
+        if scale > 1:
+            disp = cv2.resize(disp, (bx2 - bx1, by2 - by1), interpolation=cv2.INTER_NEAREST) * scale
+        return disp[y1 - by1:y2 - by1, x1 - bx1:x2 - bx1]
+
+    def _coarse_window(self, rectL, rectR, box: List[int]) -> Tuple[int, int]:
+        """축소 패스 결과의 시차 분포(5~95%)로 원본 패스 탐색 창 결정"""
+        coarse = self._band_disparity(rectL, rectR, box, self.min_d, self.num_d, self.coarse_scale)
+        valid = coarse[np.isfinite(coarse)]
+        if valid.size < 16:
+            return self.min_d, self.num_d
+        lo, hi = np.percentile(valid, [5, 95])
+        margin = self.coarse_margin + self.coarse_scale
+        min_d = max(self.min_d, int(np.floor(lo)) - margin)
+        num_d = round_up16(np.ceil(hi) + margin - min_d)
+        num_d = min(num_d, round_up16(self.min_d + self.num_d - min_d))
+        return min_d, num_d
+
+    def compute_roi(self, rectL, rectR, boxes: List[List[float]]) -> List[RoiDisparity]:
+        """
+        boxes: 정렬 영상 기준 [x1,y1,x2,y2] 목록 (검출 박스를 rectify_points로 옮긴 값)
+        """
+        h, w = rectL.shape[:2]
+        out = []
+        for b in boxes:
+            x1, y1 = int(np.clip(np.floor(b[0]), 0, w - 1)), int(np.clip(np.floor(b[1]), 0, h - 1))
+            x2, y2 = int(np.clip(np.ceil(b[2]), x1 + 1, w)), int(np.clip(np.ceil(b[3]), y1 + 1, h))
+            box = [x1, y1, x2, y2]
+            if self.coarse_scale and self.coarse_scale > 1:
+                min_d, num_d = self._coarse_window(rectL, rectR, box)
+            else:
+                min_d, num_d = self.min_d, self.num_d
+            disp = self._band_disparity(rectL, rectR, box, min_d, num_d)
+            out.append(RoiDisparity(box=box, min_disparity=min_d, num_disparities=num_d, disparity=disp))
+        return out
+
+    def compute_full(self, rectL, rectR, num_disparities: int = 96) -> np.ndarray:
+        """기준선: compute_depth_map 과 같은 전체 프레임 SGBM (float px)"""
+        channels = 1 if rectL.ndim == 2 else rectL.shape[2]
+        raw = self._matcher(0, num_disparities, channels).compute(rectL, rectR)
+        return raw.astype(np.float32) / 16.0
+
+
+# ==============================
+# Tiled full-frame SGBM
+# ==============================
+class TiledSGBM:
+    def __init__(self,
+                 min_disparity: int = 0,
+                 num_disparities: int = 96,
+                 block_size: int = SGBM_BLOCK_SIZE,
+                 n_strips: Optional[int] = None,
+                 overlap_px: int = 32,
+                 max_workers: Optional[int] = None,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        """
+        n_strips: 가로 띠 개수 (None이면 스레드 수와 같게)
+        overlap_px: 띠 위/아래로 더 계산할 행 수. blockSize/2 + 3WAY 수직 경로 집계가
+                    경계에서 충분히 수렴하도록 여유를 둔다 (버려지는 영역)
+        max_workers / executor: ellipse_fitting 과 같은 규칙 (외부 풀 공유 또는 내부 풀 생성)
+        """
+        self.min_d = int(min_disparity)
+        self.num_d = int(num_disparities)
+        self.block_size = block_size
+        self.overlap = max(int(overlap_px), block_size // 2 + 1)
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self.n_strips = n_strips or self._max_workers
+        self._executor = executor
+        self._owns_executor = False
+        # SGBM 객체는 스레드 간 공유하지 않음 → 스레드별 matcher
+        self._local = threading.local()
+
+    def _get_executor(self) -> Optional[ThreadPoolExecutor]:
+        if self._executor is None and self._max_workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                thread_name_prefix="sgbm")
+            self._owns_executor = True
+        return self._executor
+
+    def close(self):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._owns_executor = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _matcher(self, channels: int):
+        cache = getattr(self._local, "matchers", None)
+        if cache is None:
+            cache = self._local.matchers = {}
+        if channels not in cache:
+            cache[channels] = make_sgbm(self.min_d, self.num_d, self.block_size, channels)
+        return cache[channels]
+
+    def strips(self, h: int) -> List[Tuple[int, int, int, int]]:
+        """[(core_y1, core_y2, pad_y1, pad_y2)] — core 는 결과에 쓰이는 행, pad 는 실제 계산 행"""
+        n = max(1, min(self.n_strips, h // (2 * self.overlap) or 1))
+        edges = np.linspace(0, h, n + 1).astype(int)
+        return [(int(a), int(b), max(0, int(a) - self.overlap), min(h, int(b) + self.overlap))
+                for a, b in zip(edges[:-1], edges[1:])]
+
+    def _strip(self, rectL, rectR, out, strip):
+        y1, y2, p1, p2 = strip
+        channels = 1 if rectL.ndim == 2 else rectL.shape[2]
+        raw = self._matcher(channels).compute(rectL[p1:p2], rectR[p1:p2])
+        out[y1:y2] = raw[y1 - p1:y2 - p1].astype(np.float32) / 16.0
+
+    def compute(self, rectL, rectR) -> np.ndarray:
+        """전체 프레임 float 시차 (px). 값/무효 표현은 compute_full 과 같음 ((minD-1) 이하 = 무효)"""
+        out = np.empty(rectL.shape[:2], dtype=np.float32)
+        strips = self.strips(rectL.shape[0])
+        ex = self._get_executor()
+        if ex is None or len(strips) <= 1:
+            for s in strips:
+                self._strip(rectL, rectR, out, s)
+        else:
+            # 띠마다 out 의 서로 다른 행에만 쓰므로 잠금 불필요
+            for f in [ex.submit(self._strip, rectL, rectR, out, s) for s in strips]:
+                f.result()
+        return out
+
+
+# ==============================
+# Benchmark
+# ==============================
+def _timeit(fn, repeats: int) -> float:
+    fn()  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - t0) / repeats * 1e3
+
+def benchmark_roi(rectL, rectR, boxes, engine: DisparityEngine, repeats: int = 5) -> Dict[str, float]:
+    """전체 프레임 vs ROI vs ROI+coarse-to-fine 평균 시간(ms) 및 박스 중앙 시차 비교"""
+    full = engine.compute_full(rectL, rectR, round_up16(engine.min_d + engine.num_d))
+    roi = engine.compute_roi(rectL, rectR, boxes)
+    c2f_engine = DisparityEngine(engine.fx, engine.baseline, block_size=engine.block_size,
+                                 pad_px=engine.pad, coarse_scale=engine.coarse_scale or 2)
+    c2f_engine.min_d, c2f_engine.num_d = engine.min_d, engine.num_d
+    c2f = c2f_engine.compute_roi(rectL, rectR, boxes)
+
+    def full_median(r: RoiDisparity) -> float:
+        x1, y1, x2, y2 = r.box
+        crop = full[y1:y2, x1:x2]
+        valid = crop[crop >= 0]
+        return float(np.median(valid)) if valid.size else float("nan")
+
+    return {
+        "full_ms": _timeit(lambda: engine.compute_full(rectL, rectR, round_up16(engine.min_d + engine.num_d)), repeats),
+        "roi_ms": _timeit(lambda: engine.compute_roi(rectL, rectR, boxes), repeats),
+        "roi_c2f_ms": _timeit(lambda: c2f_engine.compute_roi(rectL, rectR, boxes), repeats),
+        "median_disp_full": [full_median(r) for r in roi],
+        "median_disp_roi": [r.median() for r in roi],
+        "median_disp_roi_c2f": [r.median() for r in c2f],
+        "c2f_windows": [(r.min_disparity, r.num_disparities) for r in c2f],
+    }
+
+def compare_disparity(a: np.ndarray, b: np.ndarray, min_disparity: int = 0, tol_px: float = 1.0) -> Dict[str, float]:
+    """두 float 시차 맵 비교: 둘 다 유효한 픽셀 중 |차이| > tol_px 비율 + 유효성 불일치 비율"""
+    va, vb = a >= min_disparity, b >= min_disparity
+    both = va & vb
+    diff = np.abs(a[both] - b[both])
+    return {
+        "valid_mismatch": float(np.mean(va != vb)),
+        "bad_ratio": float(np.mean(diff > tol_px)) if diff.size else 0.0,
+        "max_abs_diff": float(diff.max()) if diff.size else 0.0,
+    }
+
+def benchmark_tiled(rectL, rectR, threads: List[int], num_disparities: int = 96,
+                    overlap_px: int = 32, repeats: int = 3) -> List[Dict[str, Any]]:
+    """
+    스레드 수별 TiledSGBM vs 단일 compute 시간/일치도.
+    OpenCV 내부 병렬화와 겹치지 않도록 tiled 측정 동안에는 cv2.setNumThreads(1).
+    """
+    ref = make_sgbm(0, num_disparities, channels=1 if rectL.ndim == 2 else rectL.shape[2])
+    single = ref.compute(rectL, rectR).astype(np.float32) / 16.0
+    rows = [{"mode": "single", "threads": cv2.getNumThreads(),
+             "ms": _timeit(lambda: ref.compute(rectL, rectR), repeats)}]
+
+    prev = cv2.getNumThreads()
+    cv2.setNumThreads(1)
+    try:
+        for n in threads:
+            with TiledSGBM(0, num_disparities, overlap_px=overlap_px, max_workers=n) as tiled:
+                disp = tiled.compute(rectL, rectR)
+                row = {"mode": "tiled", "threads": n, "ms": _timeit(lambda: tiled.compute(rectL, rectR), repeats)}
+                row.update(compare_disparity(single, disp))
+                rows.append(row)
+    finally:
+        cv2.setNumThreads(prev)
+    base = rows[0]["ms"]
+    for r in rows:
+        r["speedup"] = base / r["ms"]
+    return rows
+
+def _synthetic_pair(w: int = 1280, h: int = 720, disp: int = 40, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    tex = cv2.GaussianBlur(rng.integers(0, 255, (h, w + 256, 3), dtype=np.uint8), (3, 3), 0)
+    left = tex[:, 128:128 + w].copy()
+    right = tex[:, 128 + disp:128 + disp + w].copy()
+    return left, right, [[w // 2 - 80, h // 2 - 60, w // 2 + 80, h // 2 + 60]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ROI / coarse-to-fine SGBM benchmark")
+    parser.add_argument("--left", help="정렬된 왼쪽 영상 (없으면 합성 영상)")
+    parser.add_argument("--right", help="정렬된 오른쪽 영상")
+    parser.add_argument("--boxes", help="왼쪽 bbox JSON (yolo_run.py 형식)")
+    parser.add_argument("--fx", type=float, default=415.692)
+    parser.add_argument("--baseline", type=float, default=0.06)
+    parser.add_argument("--z-min", type=float, default=0.1)
+    parser.add_argument("--z-max", type=float, default=1.5)
+    parser.add_argument("--coarse-scale", type=int, default=2)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--tiled", action="store_true", help="전체 프레임 tiled SGBM 스레드 수별 벤치마크")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--overlap", type=int, default=32)
+    args = parser.parse_args()
+
+    if args.left and args.right and args.boxes:
+        rectL, rectR = cv2.imread(args.left), cv2.imread(args.right)
+        with open(args.boxes, "r", encoding="utf-8") as f:
+            boxes = [d["bbox"] for d in json.load(f)]
+    else:
+        rectL, rectR, boxes = _synthetic_pair()
+
+    if args.tiled:
+        for row in benchmark_tiled(rectL, rectR, args.threads, overlap_px=args.overlap, repeats=args.repeats):
+            print(json.dumps(row))
+        raise SystemExit(0)
+
+    engine = DisparityEngine(args.fx, args.baseline, (args.z_min, args.z_max),
+                             coarse_scale=args.coarse_scale)
+    print(json.dumps(benchmark_roi(rectL, rectR, boxes, engine, args.repeats), indent=2))
@@ -0,0 +1,131 @@
+# stereo_matching.py
+# - 좌/우 타원 후보 간 스테레오 대응 매칭
+#   * 오른쪽 후보를 클래스별로 묶고 정렬(rectified) y 기준으로 정렬 → searchsorted 로 y 띠만 후보
+#   * 클래스별 비용 행렬 (|Δy| + (선택) 예상 시차와의 차이), 시차 범위 밖 / |Δy| > max_dy 는 불가
+#   * linear_sum_assignment(scipy)로 최적 할당, scipy 없으면 비용 오름차순 greedy
+# - 결과는 삼각측량에 바로 넣을 수 있는 배열 (pts_left / pts_right (M,2))
+
+from typing import Dict, List, Optional, Sequence, Tuple, Hashable
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # scipy 없는 환경 → greedy
+    linear_sum_assignment = None
+
+
+_INFEASIBLE = 1e6
+
+
+def _greedy_assignment(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """비용 오름차순으로 행/열 중복 없이 선택 (linear_sum_assignment 대체)"""
+    order = np.argsort(cost, axis=None)
+    rows, cols = np.unravel_index(order, cost.shape)
+    used_r = np.zeros(cost.shape[0], dtype=bool)
+    used_c = np.zeros(cost.shape[1], dtype=bool)
+    out_r, out_c = [], []
+    for r, c in zip(rows, cols):
+        if used_r[r] or used_c[c] or cost[r, c] >= _INFEASIBLE:
+            continue
+        used_r[r] = used_c[c] = True
+        out_r.append(r)
+        out_c.append(c)
+    return np.array(out_r, dtype=np.int64), np.array(out_c, dtype=np.int64)
+
+
+class RightCandidateIndex:
+    def __init__(self, classes: Sequence[Hashable], pts_rect: np.ndarray):
+        """
+        classes: (M,) 오른쪽 후보 클래스 (int 또는 핀 이름)
+        pts_rect: (M,2) 정렬 좌표계 오른쪽 후보 중심
+        클래스별로 y 오름차순 정렬된 (원래 인덱스, 좌표) 보관
+        """
+        pts_rect = np.asarray(pts_rect, dtype=np.float64).reshape(-1, 2)
+        self.groups: Dict[Hashable, Tuple[np.ndarray, np.ndarray]] = {}
+        buckets: Dict[Hashable, List[int]] = {}
+        for i, c in enumerate(classes):
+            buckets.setdefault(c, []).append(i)
+        for c, idx in buckets.items():
+            idx = np.asarray(idx, dtype=np.int64)
+            idx = idx[np.argsort(pts_rect[idx, 1], kind="stable")]
+            self.groups[c] = (idx, pts_rect[idx])
+
+    def band(self, cls: Hashable, y_lo: float, y_hi: float) -> Tuple[np.ndarray, np.ndarray]:
+        """클래스 cls 중 y ∈ [y_lo, y_hi] 후보 (원래 인덱스, 좌표)"""
+        if cls not in self.groups:
+            return np.empty(0, dtype=np.int64), np.empty((0, 2))
+        idx, pts = self.groups[cls]
+        a = np.searchsorted(pts[:, 1], y_lo, side="left")
+        b = np.searchsorted(pts[:, 1], y_hi, side="right")
+        return idx[a:b], pts[a:b]
+
+
+def match_stereo(left_cls: Sequence[Hashable],
+                 left_pts: np.ndarray,
+                 right_cls: Sequence[Hashable],
+                 right_pts: np.ndarray,
+                 rectifier=None,
+                 max_dy: float = 3.0,
+                 d_range: Tuple[float, float] = (0.0, np.inf),
+                 d_expected: Optional[float] = None,
+                 d_weight: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    left/right_pts: (N,2)/(M,2) 원본 픽셀 중심
+    rectifier: rectify_points(pl, pr) 를 가진 객체 (StereoRectifier / SparseStereoTriangulator).
+               None이면 이미 정렬된 좌표로 간주
+    max_dy: 허용 epipolar 오차 (정렬 후 |yL - yR|, px)
+    d_range: 허용 시차 범위 [d_min, d_max] (정렬 좌표 xL - xR)
+    d_expected / d_weight: 비용에 d_weight * |d - d_expected| 추가 (같은 행 후보 구분용)
+    반환: left_idx, right_idx, cls, pts_left, pts_right (원본 좌표), disparity, dy, cost
+    """
+    left_pts = np.asarray(left_pts, dtype=np.float64).reshape(-1, 2)
+    right_pts = np.asarray(right_pts, dtype=np.float64).reshape(-1, 2)
+    if rectifier is not None and len(left_pts) and len(right_pts):
+        rl, rr = rectifier.rectify_points(left_pts, right_pts)
+    else:
+        rl, rr = left_pts, right_pts
+
+    index = RightCandidateIndex(right_cls, rr)
+    left_cls = list(left_cls)
+    li_all, ri_all, cost_all = [], [], []
+
+    for c in dict.fromkeys(left_cls):
+        li = np.array([i for i, lc in enumerate(left_cls) if lc == c], dtype=np.int64)
+        yl = rl[li, 1]
+        ri, rp = index.band(c, yl.min() - max_dy, yl.max() + max_dy)
+        if len(ri) == 0:
+            continue
+
+        # (L,R) 비용 행렬 한 번에
+        dy = np.abs(yl[:, None] - rp[None, :, 1])
+        d = rl[li, 0][:, None] - rp[None, :, 0]
+        cost = dy.copy()
+        if d_expected is not None and d_weight > 0:
+            cost += d_weight * np.abs(d - d_expected)
+        feasible = (dy <= max_dy) & (d >= d_range[0]) & (d <= d_range[1])
+        cost = np.where(feasible, cost, _INFEASIBLE)
+
+        if linear_sum_assignment is not None:
+            r, k = linear_sum_assignment(cost)
+        else:
+            r, k = _greedy_assignment(cost)
+        keep = cost[r, k] < _INFEASIBLE
+        li_all.append(li[r[keep]])
+        ri_all.append(ri[k[keep]])
+        cost_all.append(cost[r[keep], k[keep]])
+
+    li = np.concatenate(li_all) if li_all else np.empty(0, dtype=np.int64)
+    ri = np.concatenate(ri_all) if ri_all else np.empty(0, dtype=np.int64)
+    order = np.argsort(li, kind="stable")
+    li, ri = li[order], ri[order]
+    return {
+        "left_idx": li,
+        "right_idx": ri,
+        "cls": np.array([left_cls[i] for i in li]),
+        "pts_left": left_pts[li],
+        "pts_right": right_pts[ri],
+        "disparity": rl[li, 0] - rr[ri, 0],
+        "dy": np.abs(rl[li, 1] - rr[ri, 1]),
+        "cost": np.concatenate(cost_all)[order] if cost_all else np.empty(0),
+    }
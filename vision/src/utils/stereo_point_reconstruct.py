@@ -3,6 +3,9 @@ import numpy as np
 import json
 import os
 
+from depth_io import find_artifact, load_disparity, meta_Q
+from stereo_rectify import get_rectifier
+
 def load_Q_from_yaml(calib_path):
     fs = cv2.FileStorage(calib_path, cv2.FILE_STORAGE_READ)
     Q = fs.getNode("Q").mat()
@@ -11,38 +14,111 @@ def load_Q_from_yaml(calib_path):
 
 
 def disparity_from_depth_png(depth_png_path):
+    # compute_depth_map 이 옆에 저장한 disparity artifact(.npy/.png + .json)가 있으면 실제 값 사용
+    # 반환: (시차 맵, 사이드카 meta — 레거시 PNG 면 None)
+    artifact = find_artifact(depth_png_path)
+    if artifact is not None:
+        return load_disparity(artifact)
+
+    # 레거시: 시각화 PNG 뿐인 경우 (MIN-MAX 정규화라 근사값일 뿐)
+    print("⚠️ disparity artifact 없음 → depth_map.png 근사 복원 (/255*96)")
     disp = cv2.imread(depth_png_path, cv2.IMREAD_UNCHANGED)
     # normalize to float disparity (0~255 → 0~max_disp)
     disp = disp.astype(np.float32)
     disp = (disp / 255.0) * 96.0  # stereo_depth_run.py에서 numDisparities=96 기준
-    return disp
-
-
-def reconstruct_3d_points(centers_left, centers_right, disp_map, Q):
-    points_3d = []
-    for l, r in zip(centers_left, centers_right):
-        xL, yL = l["center"]
-        xR, yR = r["center"]
-
-        # disparity 계산
-        d = xL - xR
-        if d <= 0:
-            print(f"⚠️ class {l['class']} : disparity <= 0 → 스킵")
-            continue
-
-        # Q 행렬 이용한 재투영
-        pts4d = cv2.perspectiveTransform(
-            np.array([[[xL, yL, d]]], dtype=np.float32),
-            Q
-        )  # 1x1x3 → 1x1x3 (homogeneous)
-
-        X, Y, Z = pts4d[0, 0]
-        points_3d.append({"class": l["class"], "X": float(X), "Y": float(Y), "Z": float(Z)})
-
-    return points_3d
+    return disp, None
+
+
+# 복원 결과 (점 단위 structured array)
+POINT_DTYPE = np.dtype([
+    ("cls", np.int32),
+    ("X", np.float64), ("Y", np.float64), ("Z", np.float64),
+    ("disparity", np.float64),
+    ("valid", np.bool_),      # d > 0 & 유한한 3D 좌표
+    ("refined", np.bool_),    # dense 시차 맵으로 d 보정됨
+])
+
+
+def _as_points(centers):
+    """[{"class", "center": [x, y]}, ...] 또는 (N,2) 배열 → (N,2) float64, (N,) 클래스"""
+    if len(centers) and isinstance(centers[0], dict):
+        pts = np.array([c["center"] for c in centers], dtype=np.float64).reshape(-1, 2)
+        cls = np.array([c.get("class", -1) for c in centers], dtype=np.int32)
+        return pts, cls
+    pts = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+    return pts, np.full(len(pts), -1, dtype=np.int32)
+
+
+def sample_disparity_bilinear(disp_map, pts):
+    """
+    (N,2) 서브픽셀 좌표에서 dense 시차 맵 bilinear 샘플링 → (N,).
+    4개 이웃 중 하나라도 무효(NaN / <= 0)거나 영상 밖이면 NaN.
+    """
+    disp_map = np.asarray(disp_map, dtype=np.float32)
+    h, w = disp_map.shape[:2]
+    x, y = pts[:, 0], pts[:, 1]
+    x0, y0 = np.floor(x).astype(np.int64), np.floor(y).astype(np.int64)
+    inside = (x0 >= 0) & (y0 >= 0) & (x0 + 1 < w) & (y0 + 1 < h)
+    x0c, y0c = np.clip(x0, 0, w - 2), np.clip(y0, 0, h - 2)
+    fx, fy = (x - x0c)[:, None], (y - y0c)[:, None]
+
+    n = np.stack([disp_map[y0c, x0c], disp_map[y0c, x0c + 1],
+                  disp_map[y0c + 1, x0c], disp_map[y0c + 1, x0c + 1]], axis=1).astype(np.float64)
+    ok = inside & np.all(np.isfinite(n) & (n > 0), axis=1)
+    wts = np.concatenate([(1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy], axis=1)
+    return np.where(ok, np.sum(n * wts, axis=1), np.nan)
+
+
+def reconstruct_3d_points(centers_left, centers_right, disp_map, Q, refine=False, max_refine_px=2.0,
+                          rectifier=None):
+    """
+    매칭된 좌/우 중심 → 3D (Q 재투영, 전체 점 한 번의 행렬곱)
+    centers_left/right: (N,2) 배열 또는 ellipse_centers.json 의 dict 목록 (같은 순서로 매칭된 상태)
+    disp_map: dense 시차 (정렬 좌표계, refine=True 일 때만 사용, None 가능)
+    Q: disp_map 을 만든 정렬의 Q (depth_io 사이드카 값 권장)
+    refine: True면 좌측 중심에서 disp_map bilinear 샘플링 값으로 d 보정
+            (매칭 시차와 max_refine_px 이상 차이나면 잘못된 dense 값으로 보고 무시)
+    rectifier: StereoRectifier — 주면 원본 픽셀 중심을 정렬 좌표로 바꾼 뒤 시차/샘플링/재투영
+               (None 이면 중심이 이미 정렬 좌표라고 가정)
+    반환: POINT_DTYPE structured array (N,) — 무효 점도 포함, valid 마스크로 구분
+    """
+    pl, cls = _as_points(centers_left)
+    pr, _ = _as_points(centers_right)
+    n = min(len(pl), len(pr))
+    pl, pr, cls = pl[:n], pr[:n], cls[:n]
+    if rectifier is not None and n:
+        pl, pr = rectifier.rectify_points(pl, pr)
+
+    d = pl[:, 0] - pr[:, 0]
+    refined = np.zeros(n, dtype=bool)
+    if refine and disp_map is not None and n:
+        ds = sample_disparity_bilinear(disp_map, pl)
+        refined = np.isfinite(ds) & (np.abs(ds - d) <= max_refine_px)
+        d = np.where(refined, ds, d)
+
+    # [x, y, d, 1] @ Q^T → 동차 좌표 (cv2.perspectiveTransform 과 동일)
+    xyd1 = np.column_stack([pl, d, np.ones(n)])
+    h = xyd1 @ np.asarray(Q, dtype=np.float64).T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xyz = h[:, :3] / h[:, 3:4]
+
+    out = np.zeros(n, dtype=POINT_DTYPE)
+    out["cls"] = cls
+    out["X"], out["Y"], out["Z"] = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+    out["disparity"] = d
+    out["valid"] = (d > 0) & np.all(np.isfinite(xyz), axis=1)
+    out["refined"] = refined
+    return out
 
 
 def save_3d_points(points_3d, save_path="vision/Inference/result/points_3d.json"):
+    # structured array → 유효한 점만 기존 JSON 형식 ({"class","X","Y","Z"}) 으로
+    if isinstance(points_3d, np.ndarray):
+        points_3d = [
+            {"class": int(p["cls"]), "X": float(p["X"]), "Y": float(p["Y"]), "Z": float(p["Z"]),
+             "disparity": float(p["disparity"]), "refined": bool(p["refined"])}
+            for p in points_3d[points_3d["valid"]]
+        ]
     os.makedirs(os.path.dirname(save_path), exist_ok=True)
     with open(save_path, "w") as f:
         json.dump(points_3d, f, indent=2)
@@ -57,8 +133,13 @@ if __name__ == "__main__":
     save_path = "vision/Inference/result/points_3d.json"
 
     # ======== 파일 로드 ========
-    Q = load_Q_from_yaml(calib_file)
-    disp_map = disparity_from_depth_png(depth_png)
+    disp_map, meta = disparity_from_depth_png(depth_png)
+    # 시차 맵과 같은 정렬의 Q 사용 (사이드카 우선, 없으면 yaml)
+    Q = meta_Q(meta) if meta is not None else None
+    if Q is None:
+        Q = load_Q_from_yaml(calib_file)
+    h, w = disp_map.shape[:2]
+    rectifier = get_rectifier(calib_file, (w, h), lazy_maps=True)
 
     with open(centers_json, "r") as f:
         centers = json.load(f)
@@ -67,7 +148,11 @@ if __name__ == "__main__":
     centers_right = centers["right"]
 
     # ======== 3D 복원 ========
-    points_3d = reconstruct_3d_points(centers_left, centers_right, disp_map, Q)
+    points_3d = reconstruct_3d_points(centers_left, centers_right, disp_map, Q, refine=True,
+                                      rectifier=rectifier)
+    skipped = int((~points_3d["valid"]).sum())
+    if skipped:
+        print(f"⚠️ disparity <= 0 / 무효 점 {skipped}개 제외")
 
     # ======== 결과 저장 ========
     save_3d_points(points_3d, save_path)
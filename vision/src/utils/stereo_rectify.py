@@ -0,0 +1,153 @@
+# stereo_rectify.py
+# - 스테레오 정렬(rectification) 맵을 캘리브레이션당 1회만 계산하는 StereoRectifier
+# - 맵은 고정소수점 CV_16SC2 (+ 보간 테이블 uint16) 로 만들어 remap 속도 향상
+# - K1/D1/K2/D2/R/T + 이미지 크기 + alpha 해시를 키로 디스크에 캐시
+#   (.npz 는 zip 이라 mmap 이 안 되므로 키별 폴더에 비압축 .npy 로 저장 → np.load(mmap_mode='r'))
+# - 다음 실행부터는 맵 생성 없이 mmap 으로 바로 사용
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, Tuple, Optional
+
+import cv2
+import numpy as np
+
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "cache", "rectify"
+)
+
+_MAP_NAMES = ("left_map1", "left_map2", "right_map1", "right_map2")
+
+
+def load_stereo_calib(calib_file):
+    """stereo_calib.yaml → dict(K1, D1, K2, D2, R, T(3x1), Q)"""
+    fs = cv2.FileStorage(calib_file, cv2.FILE_STORAGE_READ)
+    calib = {k: fs.getNode(k).mat() for k in ("K1", "D1", "K2", "D2", "R", "T", "Q")}
+    fs.release()
+
+    # 🔹 T 형상 수정
+    if calib["T"].shape == (1, 3):
+        calib["T"] = calib["T"].T
+    return calib
+
+
+def calib_hash(calib: Dict[str, np.ndarray], image_size: Tuple[int, int], alpha: float = 0) -> str:
+    """정렬 맵에 영향을 주는 값들만으로 만든 캐시 키"""
+    h = hashlib.sha1()
+    for k in ("K1", "D1", "K2", "D2", "R", "T"):
+        h.update(k.encode())
+        h.update(np.ascontiguousarray(calib[k], dtype=np.float64).ravel().tobytes())
+    h.update(f"{int(image_size[0])}x{int(image_size[1])}:{float(alpha)}".encode())
+    return h.hexdigest()[:16]
+
+
+class StereoRectifier:
+    def __init__(self,
+                 calib: Dict[str, np.ndarray],
+                 image_size: Tuple[int, int],
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 alpha: float = 0,
+                 lazy_maps: bool = False):
+        """
+        calib: load_stereo_calib 결과
+        image_size: (w, h)
+        cache_dir: None이면 디스크 캐시 없이 메모리에서만 계산
+        lazy_maps: True면 remap 맵은 첫 rectify() 때 생성/로드 (점 정렬만 쓰는 경우 생략)
+        """
+        self.image_size = (int(image_size[0]), int(image_size[1]))
+        self.K1, self.D1 = calib["K1"].astype(np.float64), calib["D1"].astype(np.float64)
+        self.K2, self.D2 = calib["K2"].astype(np.float64), calib["D2"].astype(np.float64)
+        R = calib["R"].astype(np.float64)
+        T = calib["T"].astype(np.float64).reshape(3, 1)
+        self.key = calib_hash(calib, self.image_size, alpha)
+
+        # stereoRectify 자체는 가벼우므로 매번 계산 (P/Q는 점 정렬/재투영에 필요)
+        self.R1, self.R2, self.P1, self.P2, self.Q, _, _ = cv2.stereoRectify(
+            self.K1, self.D1, self.K2, self.D2, self.image_size, R, T, alpha=alpha
+        )
+
+        self.cache_path = os.path.join(cache_dir, self.key) if cache_dir else None
+        self.from_cache = False
+        self.left_map1 = self.left_map2 = self.right_map1 = self.right_map2 = None
+        if not lazy_maps:
+            self._ensure_maps()
+
+    @classmethod
+    def from_yaml(cls, calib_file: str, image_size: Tuple[int, int], **kwargs) -> "StereoRectifier":
+        return cls(load_stereo_calib(calib_file), image_size, **kwargs)
+
+    # ------------------------------
+    # Map build / cache
+    # ------------------------------
+    def _ensure_maps(self):
+        if self.left_map1 is not None:
+            return
+        maps = self._load_cache()
+        if maps is None:
+            maps = self._build_maps()
+            self._save_cache(maps)
+        else:
+            self.from_cache = True
+        self.left_map1, self.left_map2, self.right_map1, self.right_map2 = (maps[n] for n in _MAP_NAMES)
+
+    def _build_maps(self) -> Dict[str, np.ndarray]:
+        lm1, lm2 = cv2.initUndistortRectifyMap(self.K1, self.D1, self.R1, self.P1, self.image_size, cv2.CV_16SC2)
+        rm1, rm2 = cv2.initUndistortRectifyMap(self.K2, self.D2, self.R2, self.P2, self.image_size, cv2.CV_16SC2)
+        return dict(zip(_MAP_NAMES, (lm1, lm2, rm1, rm2)))
+
+    def _load_cache(self) -> Optional[Dict[str, np.ndarray]]:
+        if not self.cache_path or not os.path.isfile(os.path.join(self.cache_path, "meta.json")):
+            return None
+        try:
+            return {n: np.load(os.path.join(self.cache_path, f"{n}.npy"), mmap_mode="r") for n in _MAP_NAMES}
+        except (OSError, ValueError):
+            return None
+
+    def _save_cache(self, maps: Dict[str, np.ndarray]):
+        if not self.cache_path:
+            return
+        parent = os.path.dirname(self.cache_path)
+        os.makedirs(parent, exist_ok=True)
+        # 임시 폴더에 다 쓴 뒤 rename → 다른 프로세스가 반쯤 쓰인 캐시를 읽지 않음
+        tmp = tempfile.mkdtemp(prefix=f".{self.key}.", dir=parent)
+        try:
+            for n in _MAP_NAMES:
+                np.save(os.path.join(tmp, f"{n}.npy"), maps[n])
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"key": self.key, "image_size": self.image_size, "map_type": "CV_16SC2"}, f)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            # 동시에 다른 프로세스가 먼저 저장한 경우 등 → 메모리 맵만 사용
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    # ------------------------------
+    # Public API
+    # ------------------------------
+    def rectify(self, left, right, interpolation=cv2.INTER_LINEAR) -> Tuple[np.ndarray, np.ndarray]:
+        self._ensure_maps()
+        rectL = cv2.remap(left, self.left_map1, self.left_map2, interpolation)
+        rectR = cv2.remap(right, self.right_map1, self.right_map2, interpolation)
+        return rectL, rectR
+
+    def rectify_points(self, pts_left: np.ndarray, pts_right: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(N,2) 원본 픽셀 좌표 → (N,2) 정렬 픽셀 좌표"""
+        pl = np.asarray(pts_left, dtype=np.float64).reshape(-1, 1, 2)
+        pr = np.asarray(pts_right, dtype=np.float64).reshape(-1, 1, 2)
+        rl = cv2.undistortPoints(pl, self.K1, self.D1, R=self.R1, P=self.P1).reshape(-1, 2)
+        rr = cv2.undistortPoints(pr, self.K2, self.D2, R=self.R2, P=self.P2).reshape(-1, 2)
+        return rl, rr
+
+
+# 프로세스 내 재사용 (같은 yaml + 크기 + 옵션이면 yaml 재파싱도 생략)
+_RECTIFIERS: Dict[Tuple, StereoRectifier] = {}
+
+def get_rectifier(calib_file: str, image_size: Tuple[int, int], **kwargs) -> StereoRectifier:
+    key = (os.path.abspath(calib_file), os.path.getmtime(calib_file), tuple(image_size),
+           tuple(sorted(kwargs.items())))
+    if key not in _RECTIFIERS:
+        _RECTIFIERS[key] = StereoRectifier.from_yaml(calib_file, image_size, **kwargs)
+    return _RECTIFIERS[key]
@@ -0,0 +1,143 @@
+# stereo_sparse.py
+# - 좌/우 핀 중심(타원 결과)만으로 3D 복원 (dense SGBM 불필요)
+# - 매칭된 점들만 StereoRectifier.rectify_points (undistortPoints R1/P1, R2/P2) 로 정렬 좌표계로 변환
+# - 모든 점을 cv2.triangulatePoints 한 번으로 삼각측량
+# - (선택) CAD 핀 모델과 rigid transform(Kabsch) 피팅 → 6-DoF pose
+#
+# 사용 예:
+#   python vision/src/utils/stereo_sparse.py  (아래 __main__ 경로 참고)
+
+import json
+from typing import Dict, Any, Optional, Tuple, List
+
+import cv2
+import numpy as np
+
+from ellipse_run_v2 import PIN_ORDER, to_objpts_from_json, rot2euler_zyx
+from stereo_rectify import StereoRectifier, get_rectifier
+
+
+# ==============================
+# Rigid fit
+# ==============================
+def fit_rigid_transform(model_pts: np.ndarray, observed_pts: np.ndarray) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    observed ≈ R @ model + t 를 만족하는 R, t (Kabsch, 스케일 없음)
+    반환: R (3,3), t (3,), rms 오차 (m)
+    """
+    A = np.asarray(model_pts, dtype=np.float64)
+    B = np.asarray(observed_pts, dtype=np.float64)
+    ca, cb = A.mean(axis=0), B.mean(axis=0)
+    H = (A - ca).T @ (B - cb)
+    U, _, Vt = np.linalg.svd(H)
+    d = np.sign(np.linalg.det(Vt.T @ U.T))
+    R = Vt.T @ np.diag([1.0, 1.0, d]) @ U.T
+    t = cb - R @ ca
+    rms = float(np.sqrt(np.mean(np.sum((A @ R.T + t - B) ** 2, axis=1))))
+    return R, t, rms
+
+
+# ==============================
+# Triangulator
+# ==============================
+class SparseStereoTriangulator:
+    def __init__(self, calib: Dict[str, np.ndarray], image_size: Tuple[int, int]):
+        """
+        calib: load_stereo_calib 결과 (K1, D1, K2, D2, R, T)
+        image_size: (w, h)
+        정렬 파라미터는 StereoRectifier 가 관리 (점만 다루므로 remap 맵은 만들지 않음)
+        """
+        self._bind(StereoRectifier(calib, image_size, cache_dir=None, lazy_maps=True))
+
+    def _bind(self, rectifier: StereoRectifier):
+        self.rectifier = rectifier
+        self.R1, self.P1, self.P2, self.Q = rectifier.R1, rectifier.P1, rectifier.P2, rectifier.Q
+
+    @classmethod
+    def from_rectifier(cls, rectifier: StereoRectifier) -> "SparseStereoTriangulator":
+        obj = cls.__new__(cls)
+        obj._bind(rectifier)
+        return obj
+
+    @classmethod
+    def from_yaml(cls, calib_file: str, image_size: Tuple[int, int]) -> "SparseStereoTriangulator":
+        return cls.from_rectifier(get_rectifier(calib_file, image_size, lazy_maps=True))
+
+    def rectify_points(self, pts_left: np.ndarray, pts_right: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(N,2) 원본 픽셀 좌표 → (N,2) 정렬(rectified) 픽셀 좌표"""
+        return self.rectifier.rectify_points(pts_left, pts_right)
+
+    def triangulate(self, pts_left: np.ndarray, pts_right: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        매칭된 (N,2) 좌/우 점 → 왼쪽 원본 카메라 좌표계 (N,3) [m]
+        반환 dict:
+          points    : (N,3)
+          disparity : (N,) 정렬 좌표계 xL - xR
+          epipolar  : (N,) |yL - yR| (정렬 후 매칭 품질 지표, px)
+          valid     : (N,) disparity > 0
+        """
+        rl, rr = self.rectify_points(pts_left, pts_right)
+        X = cv2.triangulatePoints(self.P1, self.P2, rl.T, rr.T)   # (4,N) 한 번에
+        X = (X[:3] / X[3]).T                                      # 정렬된 왼쪽 카메라 좌표계
+        X = X @ self.R1                                           # R1^T 적용 → 원본 왼쪽 카메라
+        disparity = rl[:, 0] - rr[:, 0]
+        return {
+            "points": X,
+            "disparity": disparity,
+            "epipolar": np.abs(rl[:, 1] - rr[:, 1]),
+            "valid": disparity > 0,
+        }
+
+    def triangulate_pins(self,
+                         left_points: Dict[str, Dict[str, Any]],
+                         right_points: Dict[str, Dict[str, Any]],
+                         obj_points_json: Optional[str] = None,
+                         fit_pose: bool = True) -> Dict[str, Any]:
+        """
+        ellipse_run_v2 의 "points" dict(핀 이름별 cx, cy) 좌/우 → 핀별 3D + (선택) 6-DoF pose.
+        양쪽에 모두 있는 핀만 사용.
+        """
+        names: List[str] = [n for n in PIN_ORDER if n in left_points and n in right_points]
+        out: Dict[str, Any] = {"names": names, "points": {}, "pose": None}
+        if not names:
+            return out
+
+        pl = np.array([[left_points[n]["cx"], left_points[n]["cy"]] for n in names])
+        pr = np.array([[right_points[n]["cx"], right_points[n]["cy"]] for n in names])
+        tri = self.triangulate(pl, pr)
+        valid = tri["valid"]
+        out["points"] = {n: tri["points"][i].tolist() for i, n in enumerate(names) if valid[i]}
+        out["epipolar_px"] = {n: float(tri["epipolar"][i]) for i, n in enumerate(names)}
+
+        if fit_pose and valid.sum() >= 3:
+            model = to_objpts_from_json(obj_points_json)
+            idx = [PIN_ORDER.index(n) for n in names]
+            R, t, rms = fit_rigid_transform(model[idx][valid], tri["points"][valid])
+            roll, pitch, yaw = rot2euler_zyx(R)
+            out["pose"] = {
+                "R": R.tolist(),
+                "tvec": t.tolist(),
+                "rvec": cv2.Rodrigues(R)[0].ravel().tolist(),
+                "roll_deg": float(np.degrees(roll)),
+                "pitch_deg": float(np.degrees(pitch)),
+                "yaw_deg": float(np.degrees(yaw)),
+                "rms_m": rms,
+            }
+        return out
+
+
+if __name__ == "__main__":
+    calib_file = "vision/config/stereo_calib.yaml"
+    objpoints_json = "vision/config/ccs_type1_reference.json"
+    left_json = "vision/Inference/image/detect_left_view/left_view_left_ellipse.json"
+    right_json = "vision/Inference/image/detect_right_view/right_view_right_ellipse.json"
+    image_size = (640, 480)
+
+    with open(left_json, "r", encoding="utf-8") as f:
+        left = json.load(f)
+    with open(right_json, "r", encoding="utf-8") as f:
+        right = json.load(f)
+
+    tri = SparseStereoTriangulator.from_yaml(calib_file, image_size)
+    result = tri.triangulate_pins(left["points"], right["points"], objpoints_json)
+    print(json.dumps(result, indent=2))